@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: tiempo de CPU de FFmpeg por hora de audio al convertir siempre a MP3
+frente al perfil passthrough (copia o cambio de contenedor sin recodificar).
+
+Genera audio de prueba con FFmpeg (Opus en WebM y AAC en M4A, como los streams
+de audio habituales) y mide el tiempo de CPU de los procesos hijos.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/audio_passthrough.py [--seconds N]
+"""
+
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from download.formats import plan_audio  # noqa: E402
+from download.postprocess import PostProcessTask, run_ffmpeg  # noqa: E402
+
+# Streams de audio de prueba: (archivo, formato de yt-dlp, argumentos de FFmpeg)
+SOURCES = [
+    ('opus.webm', {'ext': 'webm', 'acodec': 'opus', 'vcodec': 'none'},
+     ['-c:a', 'libopus', '-b:a', '128k']),
+    ('aac.m4a', {'ext': 'm4a', 'acodec': 'mp4a.40.2', 'vcodec': 'none'},
+     ['-c:a', 'aac', '-b:a', '128k']),
+]
+
+
+def make_source(path, codec_args, seconds):
+    """Genera audio estéreo de prueba (ruido rosa, más realista que un tono puro)"""
+    subprocess.run(
+        ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y', '-f', 'lavfi',
+         '-i', f'anoisesrc=color=pink:duration={seconds}:sample_rate=48000',
+         '-ac', '2'] + codec_args + [path],
+        check=True
+    )
+
+
+def child_cpu():
+    """Tiempo de CPU (usuario + sistema) acumulado por los procesos hijos"""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def measure(source, fmt, profile, tmp):
+    """Posprocesa un archivo con el perfil dado; devuelve (plan, segundos de CPU, segundos reales)"""
+    plan = plan_audio(fmt, profile)
+    if not plan.needs_ffmpeg:
+        return plan, 0.0, 0.0
+    task = PostProcessTask(
+        PostProcessTask.EXTRACT_AUDIO, [source],
+        os.path.join(tmp, f"{profile}.{plan.ext}"), audio=plan
+    )
+    inputs, outputs = task.ffmpeg_args()
+    cpu, start = child_cpu(), time.perf_counter()
+    run_ffmpeg(inputs, outputs, task.target, threads=1)
+    return plan, child_cpu() - cpu, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=int, default=600, help="duración del audio de prueba")
+    args = parser.parse_args()
+
+    if not shutil.which('ffmpeg'):
+        print("FFmpeg no está instalado", file=sys.stderr)
+        return 1
+
+    per_hour = 3600 / args.seconds
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Audio de prueba: {args.seconds} s por archivo; CPU de FFmpeg escalada a 1 h\n")
+        print(f"{'origen':<11} {'perfil':<12} {'accion':<10} {'CPU/h':>9} {'real/h':>9}")
+        for name, fmt, codec_args in SOURCES:
+            source = os.path.join(tmp, name)
+            make_source(source, codec_args, args.seconds)
+            results = {}
+            for profile in ('mp3', 'passthrough'):
+                plan, cpu, wall = measure(source, fmt, profile, tmp)
+                results[profile] = cpu
+                print(f"{name:<11} {profile:<12} {plan.mode:<10} "
+                      f"{cpu * per_hour:8.1f}s {wall * per_hour:8.1f}s")
+            saved = (results['mp3'] - results['passthrough']) * per_hour
+            print(f"{'':<11} ahorro de CPU por hora de audio: {saved:.1f} s\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
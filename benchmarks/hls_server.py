@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor HLS local que imita a una CDN: latencia por petición, ancho de banda
+por conexión y total limitados, y HTTP 429 al superar las conexiones permitidas.
+También sirve un archivo progresivo (``/media.mp4``, con rangos).
+"""
+
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _TokenBucket:
+    """Limitador de bytes/s compartido entre conexiones"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, amount: int):
+        """Espera hasta poder enviar ``amount`` bytes"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class HLSStandInServer:
+    """
+    Sirve ``/stream.m3u8`` con ``segments`` fragmentos ``/segN.ts``.
+
+    Args:
+        segments: Número de fragmentos
+        segment_size: Bytes por fragmento
+        latency: Segundos de espera antes de responder cada fragmento
+        per_connection_rate: Bytes/s máximos por conexión
+        total_rate: Bytes/s máximos del servidor
+        max_connections: Conexiones simultáneas antes de responder 429
+        file_size: Bytes del archivo progresivo ``/media.mp4``
+    """
+
+    def __init__(self, segments=40, segment_size=256 * 1024, latency=0.1,
+                 per_connection_rate=4 * 1024 * 1024, total_rate=24 * 1024 * 1024,
+                 max_connections=12, file_size=16 * 1024 * 1024):
+        self.segments = segments
+        self.segment_size = segment_size
+        self.latency = latency
+        self.per_connection_rate = per_connection_rate
+        self.bucket = _TokenBucket(total_rate)
+        self.max_connections = max_connections
+        self.active = 0
+        self.peak = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._payload = bytes(range(256)) * (segment_size // 256)
+        self.file_size = file_size
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """URL de la lista de reproducción"""
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}/stream.m3u8"
+
+    @property
+    def file_url(self) -> str:
+        """URL del archivo progresivo"""
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}/media.mp4"
+
+    def file_bytes(self, start: int, end: int) -> bytes:
+        """Contenido del archivo progresivo entre ``start`` y ``end`` (incluido)"""
+        length = end - start + 1
+        pattern = bytes(range(251)) * (length // 251 + 2)
+        return pattern[start % 251:start % 251 + length]
+
+    def playlist(self) -> bytes:
+        """Lista de reproducción HLS (VOD)"""
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:2",
+                 "#EXT-X-MEDIA-SEQUENCE:0", "#EXT-X-PLAYLIST-TYPE:VOD"]
+        for i in range(self.segments):
+            lines += ["#EXTINF:2.0,", f"seg{i}.ts"]
+        lines.append("#EXT-X-ENDLIST")
+        return ("\n".join(lines) + "\n").encode()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.startswith('/stream.m3u8'):
+                    body = server.playlist()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/vnd.apple.mpegurl')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                if self.path.startswith('/media.mp4'):
+                    self._send_file()
+                    return
+                if not self.path.startswith('/seg'):
+                    self.send_error(404)
+                    return
+
+                with server._lock:
+                    if server.active >= server.max_connections:
+                        server.throttled += 1
+                        throttled = True
+                    else:
+                        server.active += 1
+                        server.peak = max(server.peak, server.active)
+                        throttled = False
+                if throttled:
+                    self.send_response(429)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                try:
+                    time.sleep(server.latency)
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'video/mp2t')
+                    self.send_header('Content-Length', str(len(server._payload)))
+                    self.end_headers()
+                    chunk = 32 * 1024
+                    for offset in range(0, len(server._payload), chunk):
+                        piece = server._payload[offset:offset + chunk]
+                        server.bucket.take(len(piece))
+                        self.wfile.write(piece)
+                        time.sleep(len(piece) / server.per_connection_rate)
+                finally:
+                    with server._lock:
+                        server.active -= 1
+
+            def _send_file(self):
+                size = server.file_size
+                start, end = 0, size - 1
+                match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+                if match:
+                    start = int(match.group(1))
+                    end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+                else:
+                    self.send_response(200)
+                self.send_header('Content-Type', 'video/mp4')
+                self.send_header('Content-Length', str(end - start + 1))
+                self.send_header('Accept-Ranges', 'bytes')
+                self.end_headers()
+                time.sleep(server.latency)
+                chunk = 64 * 1024
+                try:
+                    for offset in range(start, end + 1, chunk):
+                        piece = server.file_bytes(offset, min(offset + chunk, end + 1) - 1)
+                        server.bucket.take(len(piece))
+                        self.wfile.write(piece)
+                        time.sleep(len(piece) / server.per_connection_rate)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # el extractor solo lee la cabecera
+
+        return Handler
+
+    def start(self):
+        """Arranca el servidor en un hilo"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Detiene el servidor"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
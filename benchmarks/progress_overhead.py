@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: coste de CPU de los informes de progreso, emitiendo cada llamada
+de yt-dlp o de SFTP frente a agruparlas (PROGRESS_RATE_HZ por trabajo y un
+único tick de la interfaz para todos los trabajos).
+
+Varios hilos de trabajo llaman al hook al ritmo de una descarga fragmentada
+(yt-dlp) o de una subida SFTP (un callback por paquete de 32 KB). El hilo de
+la interfaz se emula sin Qt:
+
+- antes: cada progreso cruza de hilo por una cola (como una señal de Qt
+  encolada) y repinta su fila y la barra global;
+- ahora: el hook descarta los progresos por encima de rate_hz, el agregador
+  guarda el último de cada trabajo y el tick aplica todos de una vez.
+
+El repintado se simula con un coste fijo de CPU (--repaint-us), así que las
+cifras absolutas dependen de ese valor; el número de actualizaciones que
+llegan a la interfaz no.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/progress_overhead.py [--jobs N] [--seconds S] [--repaint-us US]
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import PROGRESS_RATE_HZ  # noqa: E402
+from download.progress_hook import DownloadProgressHook, ProgressAggregator  # noqa: E402
+
+# Escenarios: (nombre, callbacks por segundo y trabajo, usa report de subida)
+SCENARIOS = [
+    ("yt-dlp (fragmentos)", 500, False),
+    ("SFTP (paquetes 32 KB)", 640, True),
+]
+
+TICK = 0.01  # los callbacks llegan en ráfagas cada 10 ms
+
+
+def busy(microseconds):
+    """Gasta CPU durante el tiempo dado (coste simulado de repintar)"""
+    end = time.perf_counter() + microseconds / 1e6
+    while time.perf_counter() < end:
+        pass
+
+
+class FakeGui:
+    """Estado de las filas de la interfaz y repintado simulado"""
+
+    def __init__(self, repaint_us):
+        self.rows = {}
+        self.repaint_us = repaint_us
+        self.updates = 0
+        self.overall = 0
+
+    def apply(self, job_id, percent, message):
+        self.rows[job_id] = (percent, message)
+        self.updates += 1
+        busy(self.repaint_us)
+
+    def refresh_overall(self):
+        self.overall = sum(p for p, _ in self.rows.values()) // max(1, len(self.rows))
+        busy(self.repaint_us)
+
+
+def worker(hook, rate, seconds, upload):
+    """Llama al hook como lo haría yt-dlp o el callback de subida SFTP"""
+    total = rate * seconds * 32 * 1024
+    per_tick = max(1, int(rate * TICK))
+    transferred = 0
+    started = time.monotonic()
+    while time.monotonic() - started < seconds:
+        for _ in range(per_tick):
+            transferred += 32 * 1024
+            if upload:
+                pct = int(70 + (transferred / total) * 28)
+                hook.report(pct, f"Subiendo... {transferred / 1024 / 1024:.1f} / "
+                                 f"{total / 1024 / 1024:.1f} MB", throttle=True)
+            else:
+                hook.hook({'status': 'downloading', 'downloaded_bytes': transferred,
+                           'total_bytes': total, 'speed': rate * 32 * 1024})
+        time.sleep(TICK)
+
+
+def run(mode, jobs, rate, seconds, upload, repaint_us):
+    """Ejecuta un escenario; devuelve (callbacks, actualizaciones de la interfaz, CPU en s)"""
+    gui = FakeGui(repaint_us)
+    stop = threading.Event()
+    hooks = []
+
+    if mode == "antes":
+        events = queue.Queue()
+
+        def gui_loop():
+            while not (stop.is_set() and events.empty()):
+                try:
+                    job_id, percent, message = events.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                gui.apply(job_id, percent, message)
+                gui.refresh_overall()
+
+        for job_id in range(jobs):
+            hook = DownloadProgressHook(job_id=job_id, rate_hz=0)
+            hook.job_progress.connect(lambda *args: events.put(args))
+            hooks.append(hook)
+    else:
+        aggregator = ProgressAggregator()
+
+        def gui_loop():
+            while True:
+                done = stop.is_set()
+                updates = aggregator.drain()
+                for job_id, (percent, message) in updates.items():
+                    gui.apply(job_id, percent, message)
+                if updates:
+                    gui.refresh_overall()
+                if done:
+                    break
+                time.sleep(1.0 / PROGRESS_RATE_HZ)
+
+        for job_id in range(jobs):
+            hook = DownloadProgressHook(job_id=job_id)
+            hook.job_progress.connect(aggregator.update)
+            hooks.append(hook)
+
+    calls = [0]
+    for hook in hooks:
+        original = hook.hook if not upload else hook.report
+
+        def counting(*args, _original=original, **kwargs):
+            calls[0] += 1
+            return _original(*args, **kwargs)
+
+        if upload:
+            hook.report = counting
+        else:
+            hook.hook = counting
+
+    cpu_start = time.process_time()
+    gui_thread = threading.Thread(target=gui_loop)
+    gui_thread.start()
+    threads = [threading.Thread(target=worker, args=(hook, rate, seconds, upload)) for hook in hooks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stop.set()
+    gui_thread.join()
+    return calls[0], gui.updates, time.process_time() - cpu_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--jobs', type=int, default=4, help="trabajos simultáneos")
+    parser.add_argument('--seconds', type=int, default=5, help="duración de cada medida")
+    parser.add_argument('--repaint-us', type=int, default=150,
+                        help="coste simulado de repintar una fila o la barra (µs)")
+    args = parser.parse_args()
+
+    print(f"{args.jobs} trabajos, {args.seconds} s por medida, repintado simulado "
+          f"{args.repaint_us} µs, {PROGRESS_RATE_HZ} Hz\n")
+    print(f"{'escenario':<24}{'modo':<7}{'callbacks':>10}{'a la UI':>10}{'CPU':>10}{'µs/callback':>13}")
+    for name, rate, upload in SCENARIOS:
+        cpu = {}
+        for mode in ("antes", "ahora"):
+            calls, updates, seconds = run(mode, args.jobs, rate, args.seconds, upload, args.repaint_us)
+            cpu[mode] = seconds
+            print(f"{name:<24}{mode:<7}{calls:>10}{updates:>10}{seconds * 1000:>8.0f} ms"
+                  f"{seconds / max(1, calls) * 1e6:>11.1f}")
+        print(f"{'':<24}CPU ahorrada: {(1 - cpu['ahora'] / cpu['antes']) * 100:.0f}%\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: rendimiento de la subida SFTP según el número de canales en
+paralelo, contra un servidor SFTP local con latencia por petición.
+
+Con un solo canal cada escritura espera a la anterior en el servidor; con
+varios, los trozos del archivo se suben a la vez. Se comprueba además que el
+archivo remoto es idéntico al local.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/sftp_parallel.py [--size-mb N] [--latency-ms MS] [--rate-mb N]
+        [--streams 1,2,4,8,16] [--chunk-mb N]
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sftp_server import SFTPStandInServer  # noqa: E402
+from utils.ssh_client import SSHClient  # noqa: E402
+
+
+def sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=32, help="tamaño del archivo")
+    parser.add_argument('--latency-ms', type=float, default=5,
+                        help="latencia de cada escritura SFTP en el servidor")
+    parser.add_argument('--rate-mb', type=float, default=0,
+                        help="MB/s máximos del servidor (0 = sin límite)")
+    parser.add_argument('--streams', default="1,2,4,8,16", help="canales a medir, separados por comas")
+    parser.add_argument('--chunk-mb', type=int, default=4, help="tamaño de cada trozo")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('paramiko').setLevel(logging.CRITICAL)
+    warnings.simplefilter('ignore')  # clave de host desconocida del servidor local
+
+    size = args.size_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp, \
+            SFTPStandInServer(upload_rate=int(args.rate_mb * 1024 * 1024),
+                              request_latency=args.latency_ms / 1000) as server:
+        local_path = os.path.join(tmp, 'local.bin')
+        with open(local_path, 'wb') as f:
+            f.write(os.urandom(size))
+        expected = sha256(local_path)
+        config = server.config(tmp)
+
+        client = SSHClient()
+        ok, message = client.connect(config['host'], config['port'], config['username'],
+                                     config['password'], config['key_file'])
+        if not ok:
+            raise SystemExit(f"No se pudo conectar: {message}")
+
+        limit = f"{args.rate_mb:.0f} MB/s" if args.rate_mb else "sin limite"
+        print(f"Archivo de {args.size_mb} MB, {args.latency_ms:.0f} ms por escritura SFTP, "
+              f"servidor {limit}, trozos de {args.chunk_mb} MB\n")
+        print(f"{'canales':>8}{'segundos':>10}{'MB/s':>8}{'mejora':>8}  integridad")
+        baseline = None
+        try:
+            for streams in (int(n) for n in args.streams.split(',')):
+                remote_path = os.path.join(tmp, f'remote-{streams}.bin')
+                start = time.perf_counter()
+                ok, message = client.upload_file(local_path, remote_path, streams=streams,
+                                                 chunk_size=args.chunk_mb * 1024 * 1024)
+                elapsed = time.perf_counter() - start
+                if not ok:
+                    raise SystemExit(f"La subida falló: {message}")
+                baseline = baseline or elapsed
+                intact = "ok" if sha256(remote_path) == expected else "DISTINTO"
+                print(f"{streams:>8}{elapsed:>10.2f}{args.size_mb / elapsed:>8.1f}"
+                      f"{baseline / elapsed:>7.1f}x  {intact}")
+                os.remove(remote_path)
+        finally:
+            client.disconnect()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor SSH/SFTP local (paramiko) que imita a un servidor remoto: latencia y
+ancho de banda de subida limitados. Acepta cualquier usuario y contraseña,
+trabaja sobre el sistema de archivos local y ejecuta los comandos con /bin/sh.
+Solo para pruebas y benchmarks en 127.0.0.1.
+"""
+
+import os
+import socket
+import subprocess
+import threading
+import time
+
+import paramiko
+from paramiko.sftp import SFTP_OK, SFTP_OP_UNSUPPORTED
+
+
+class _Handle(paramiko.SFTPHandle):
+    """Archivo abierto; la escritura respeta el ancho de banda del servidor"""
+
+    def __init__(self, server, flags=0):
+        super().__init__(flags)
+        self._server = server
+
+    def write(self, offset, data):
+        if self._server.request_latency:
+            time.sleep(self._server.request_latency)
+        self._server.bucket.take(len(data))
+        return super().write(offset, data)
+
+
+class _SFTPInterface(paramiko.SFTPServerInterface):
+    """Operaciones SFTP directas sobre el sistema de archivos local"""
+
+    def __init__(self, server, *args, stand_in=None, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self._stand_in = stand_in
+
+    @staticmethod
+    def _error(e):
+        return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def list_folder(self, path):
+        try:
+            result = []
+            for name in os.listdir(path):
+                attr = paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(path, name)))
+                attr.filename = name
+                result.append(attr)
+            return result
+        except OSError as e:
+            return self._error(e)
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(path))
+        except OSError as e:
+            return self._error(e)
+
+    def lstat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.lstat(path))
+        except OSError as e:
+            return self._error(e)
+
+    def open(self, path, flags, attr):
+        try:
+            fd = os.open(path, flags | getattr(os, 'O_BINARY', 0), 0o644)
+        except OSError as e:
+            return self._error(e)
+        if flags & os.O_WRONLY:
+            mode = 'ab' if flags & os.O_APPEND else 'wb'
+        elif flags & os.O_RDWR:
+            mode = 'a+b' if flags & os.O_APPEND else 'r+b'
+        else:
+            mode = 'rb'
+        try:
+            f = os.fdopen(fd, mode)
+        except OSError as e:
+            return self._error(e)
+        handle = _Handle(self._stand_in, flags)
+        handle.filename = path
+        handle.readfile = f
+        handle.writefile = f
+        return handle
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            return self._error(e)
+        return SFTP_OK
+
+    def rename(self, oldpath, newpath):
+        if os.path.exists(newpath):
+            return SFTP_OP_UNSUPPORTED
+        try:
+            os.rename(oldpath, newpath)
+        except OSError as e:
+            return self._error(e)
+        return SFTP_OK
+
+    def posix_rename(self, oldpath, newpath):
+        try:
+            os.replace(oldpath, newpath)
+        except OSError as e:
+            return self._error(e)
+        return SFTP_OK
+
+    def mkdir(self, path, attr):
+        try:
+            os.mkdir(path)
+        except OSError as e:
+            return self._error(e)
+        return SFTP_OK
+
+    def rmdir(self, path):
+        try:
+            os.rmdir(path)
+        except OSError as e:
+            return self._error(e)
+        return SFTP_OK
+
+    def chattr(self, path, attr):
+        # SFTPServer.set_file_attr truncates by reopening with "w+", which empties the file
+        try:
+            if attr._flags & attr.FLAG_SIZE:
+                os.truncate(path, attr.st_size)
+            if attr._flags & attr.FLAG_PERMISSIONS:
+                os.chmod(path, attr.st_mode)
+            if attr._flags & attr.FLAG_AMTIME:
+                os.utime(path, (attr.st_atime, attr.st_mtime))
+        except OSError as e:
+            return self._error(e)
+        return SFTP_OK
+
+
+class _TokenBucket:
+    """Limitador de bytes/s compartido entre conexiones (0 = sin límite)"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, amount: int):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate / 10, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class _ServerInterface(paramiko.ServerInterface):
+    """Acepta cualquier credencial; canales de sesión con exec y sftp"""
+
+    def __init__(self, stand_in, transport):
+        self._stand_in = stand_in
+        self._transport = transport
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_auth_publickey(self, username, key):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return 'password,publickey'
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            # Like OpenSSH's MaxSessions: refuse the channel, keep the connection
+            limit = self._stand_in.max_sessions
+            if limit and len(self._transport._channels.values()) >= limit:
+                self._stand_in.refused_sessions += 1
+                return paramiko.common.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.common.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self._stand_in.run_command, args=(channel, command),
+                         daemon=True).start()
+        return True
+
+
+class SFTPStandInServer:
+    """
+    Servidor SSH/SFTP en 127.0.0.1 con un puerto libre.
+
+    Args:
+        upload_rate: Bytes/s máximos que acepta el servidor (0 = sin límite)
+        latency: Segundos de espera añadidos a cada comando remoto
+        request_latency: Segundos que tarda cada escritura SFTP. Cada canal
+            atiende sus peticiones de una en una, así que limita lo que sube
+            un solo canal, como la ventana de un canal en un enlace con latencia.
+        max_sessions: Canales de sesión abiertos a la vez por conexión (0 = sin
+            límite); OpenSSH admite 10 (MaxSessions)
+    """
+
+    def __init__(self, upload_rate=0, latency=0.0, request_latency=0.0, max_sessions=0):
+        self.bucket = _TokenBucket(upload_rate)
+        self.latency = latency
+        self.request_latency = request_latency
+        self.max_sessions = max_sessions
+        self.refused_sessions = 0
+        self.commands = []
+        self._host_key = paramiko.RSAKey.generate(2048)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(('127.0.0.1', 0))
+        self._sock.listen(16)
+        self._transports = []
+        self._running = False
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self._sock.getsockname()[1]
+
+    def config(self, remote_folder: str) -> dict:
+        """Configuración SSH como la de la aplicación"""
+        return {
+            'host': '127.0.0.1', 'port': self.port, 'username': 'bench',
+            'password': 'bench', 'key_file': None, 'remote_folder': remote_folder,
+        }
+
+    def run_command(self, channel, command):
+        """Ejecuta un comando de exec_command localmente"""
+        command = command.decode() if isinstance(command, bytes) else command
+        self.commands.append(command)
+        time.sleep(self.latency)
+        try:
+            result = subprocess.run(['/bin/sh', '-c', command], capture_output=True)
+            channel.sendall(result.stdout)
+            channel.sendall_stderr(result.stderr)
+            channel.send_exit_status(result.returncode)
+        finally:
+            channel.close()
+
+    def _serve(self):
+        while self._running:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                break
+            transport = paramiko.Transport(conn)
+            transport.add_server_key(self._host_key)
+            transport.set_subsystem_handler(
+                'sftp', paramiko.SFTPServer, _SFTPInterface, stand_in=self
+            )
+            transport.start_server(server=_ServerInterface(self, transport))
+            self._transports.append(transport)
+
+    def start(self):
+        """Arranca el servidor en un hilo"""
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Detiene el servidor y cierra las conexiones"""
+        self._running = False
+        self._sock.close()
+        for transport in self._transports:
+            transport.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
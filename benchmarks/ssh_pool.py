@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: subidas SSH seguidas al mismo servidor conectando en cada una
+frente a reutilizar las conexiones del pool.
+
+Cada subida hace lo mismo que un trabajo del pipeline: conectar (o pedir
+una conexión al pool), subir un archivo pequeño y desconectar (o devolverla).
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/ssh_pool.py [--uploads N] [--size-kb N]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sftp_server import SFTPStandInServer  # noqa: E402
+from utils.ssh_client import SSHClient  # noqa: E402
+from utils.ssh_pool import SSHPool  # noqa: E402
+
+
+def upload_fresh(config, local_path, remote_path):
+    client = SSHClient()
+    ok, message = client.connect(config['host'], config['port'], config['username'],
+                                 config['password'], config['key_file'])
+    if not ok:
+        raise SystemExit(f"No se pudo conectar: {message}")
+    try:
+        return client.upload_file(local_path, remote_path)
+    finally:
+        client.disconnect()
+
+
+def upload_pooled(pool, config, local_path, remote_path):
+    client, message = pool.acquire(config)
+    if client is None:
+        raise SystemExit(f"No se pudo conectar: {message}")
+    ok = False
+    try:
+        ok, message = client.upload_file(local_path, remote_path)
+        return ok, message
+    finally:
+        client.disconnect(reusable=ok)
+
+
+def timed(upload, count, local_path, remote_folder):
+    """Milisegundos de cada subida"""
+    samples = []
+    for i in range(count):
+        remote_path = os.path.join(remote_folder, f"upload-{i}.bin")
+        start = time.perf_counter()
+        ok, message = upload(local_path, remote_path)
+        samples.append((time.perf_counter() - start) * 1000)
+        if not ok:
+            raise SystemExit(f"La subida falló: {message}")
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--uploads', type=int, default=20, help="subidas en cada modo")
+    parser.add_argument('--size-kb', type=int, default=256, help="tamaño de cada archivo")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('paramiko').setLevel(logging.CRITICAL)
+    warnings.simplefilter('ignore')  # clave de host desconocida del servidor local
+
+    with tempfile.TemporaryDirectory() as tmp, SFTPStandInServer() as server:
+        remote = os.path.join(tmp, 'remote')
+        os.makedirs(remote)
+        local_path = os.path.join(tmp, 'local.bin')
+        with open(local_path, 'wb') as f:
+            f.write(os.urandom(args.size_kb * 1024))
+        config = server.config(remote)
+        pool = SSHPool()
+
+        print(f"{args.uploads} subidas de {args.size_kb} KB por modo, servidor SSH local\n")
+        results = {}
+        for name, upload in (
+            ("conexion nueva", lambda src, dst: upload_fresh(config, src, dst)),
+            ("pool", lambda src, dst: upload_pooled(pool, config, src, dst)),
+        ):
+            samples = timed(upload, args.uploads, local_path, remote)
+            results[name] = statistics.median(samples)
+            print(f"{name:<16} mediana {results[name]:7.1f} ms   "
+                  f"total {sum(samples) / 1000:6.2f} s")
+
+        stats = pool.stats()
+        pool.close()
+        print(f"\nPool: {stats['hits']} reutilizadas, {stats['misses']} nuevas "
+              f"(acierto {stats['hit_rate'] * 100:.0f}%), {stats['connections']} conexion(es) abierta(s)")
+        print(f"Mejora: {results['conexion nueva'] / results['pool']:.1f}x por subida")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: subida SSH con carpeta temporal frente a streaming directo al servidor.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/ssh_streaming.py [--size-mb N] [--rate-mb N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.hls_server import HLSStandInServer  # noqa: E402
+from benchmarks.sftp_server import SFTPStandInServer  # noqa: E402
+from download.job_queue import DownloadJob, JobState  # noqa: E402
+from download.pipeline import DownloadPipeline  # noqa: E402
+
+
+def run(url, ssh_config, temp_root, stream):
+    """Ejecuta un trabajo con subida SSH y devuelve los segundos empleados"""
+    job = DownloadJob(
+        url, ssh_config['remote_folder'], is_audio=False, quality="Mejor calidad disponible",
+        use_ssh=True, ssh_config=ssh_config, use_archive=False, stream_upload=stream
+    )
+    start = time.perf_counter()
+    DownloadPipeline(temp_root=temp_root).run(job)
+    elapsed = time.perf_counter() - start
+    if job.state != JobState.COMPLETED:
+        raise SystemExit(f"El trabajo falló: {job.result_message}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=16, help="tamaño del archivo")
+    parser.add_argument('--rate-mb', type=float, default=4, help="MB/s de bajada y de subida")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('paramiko').setLevel(logging.CRITICAL)
+    warnings.simplefilter('ignore')  # clave de host desconocida del servidor local
+
+    rate = int(args.rate_mb * 1024 * 1024)
+    size = args.size_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp, \
+            HLSStandInServer(latency=0.02, per_connection_rate=rate, total_rate=rate,
+                             file_size=size) as http, \
+            SFTPStandInServer(upload_rate=rate) as sftp:
+        remote = os.path.join(tmp, 'remote')
+        os.makedirs(remote)
+        config = sftp.config(remote)
+        ideal = size / rate
+        print(f"Archivo de {args.size_mb} MB, bajada y subida a {args.rate_mb:.0f} MB/s "
+              f"(ideal: {ideal:.1f} s en paralelo, {2 * ideal:.1f} s en serie)\n")
+
+        temp = run(http.file_url, config, os.path.join(tmp, 'temp'), stream=False)
+        print(f"carpeta temporal: {temp:6.2f} s")
+        streamed = run(http.file_url, config, os.path.join(tmp, 'temp'), stream=True)
+        print(f"streaming:        {streamed:6.2f} s")
+
+        for name in os.listdir(remote):
+            if os.path.getsize(os.path.join(remote, name)) != size:
+                raise SystemExit(f"Tamaño remoto incorrecto: {name}")
+        print(f"\nAceleración: {temp / streamed:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
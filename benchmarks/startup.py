@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: tiempo de arranque de la aplicación.
+
+Cada medida se hace en un proceso nuevo (sin módulos ya cargados):
+
+- importación de la ventana principal (ui.main_window) y qué módulos pesados
+  (yt-dlp, paramiko, whisper, torch) arrastra consigo;
+- tiempo hasta el primer frame: desde el inicio del script hasta el primer
+  evento Paint de la ventana (plataforma Qt "offscreen", HOME temporal);
+- como referencia, lo que cuesta importar el pipeline de descarga, que se
+  carga en segundo plano después de mostrar la ventana.
+
+Sin PySide6 se mide solo la parte de la ventana que no depende de Qt.
+Sale con código 1 si se supera un umbral o si la ventana importa un módulo
+pesado, así que sirve como prueba de regresión.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/startup.py [--runs N] [--max-import-ms MS] [--max-frame-ms MS]
+"""
+
+import argparse
+import ast
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que no deben cargarse antes de mostrar la ventana
+HEAVY_MODULES = ('yt_dlp', 'paramiko', 'whisper', 'torch')
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({'ms': elapsed * 1000,
+                  'heavy': [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+FRAME_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from PySide6.QtCore import QEvent, QObject, QTimer
+from PySide6.QtWidgets import QApplication
+from ui.main_window import YouTubeDownloaderApp
+imported = time.perf_counter()
+
+
+class FirstPaint(QObject):
+    at = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.at is None:
+            self.at = time.perf_counter()
+            self.heavy = [m for m in %r if m in sys.modules]
+            QTimer.singleShot(0, app.quit)
+        return False
+
+
+app = QApplication(sys.argv[:1])
+probe = FirstPaint()
+app.installEventFilter(probe)
+window = YouTubeDownloaderApp()
+window.show()
+QTimer.singleShot(10000, app.quit)
+app.exec()
+if probe.at is None:
+    sys.exit("no paint event")
+print(json.dumps({'import_ms': (imported - start) * 1000,
+                  'frame_ms': (probe.at - start) * 1000,
+                  'heavy': probe.heavy}))
+""" % (HEAVY_MODULES,)
+
+
+def window_imports(module='ui.main_window', seen=None):
+    """
+    Módulos que importa la ventana al cargarse, sin contar Qt
+
+    Recorre los imports de nivel de módulo de ui/ (los de dentro de funciones
+    ya son diferidos) para medir el arranque aunque PySide6 no esté instalado.
+
+    Returns:
+        list: Módulos fuera de ui/ y de PySide6
+    """
+    seen = set() if seen is None else seen
+    found = []
+    parts = module.split('.')
+    # Importar ui.widgets.x ejecuta antes ui/__init__.py y ui/widgets/__init__.py
+    for depth in range(1, len(parts) + 1):
+        name = '.'.join(parts[:depth])
+        if name in seen:
+            continue
+        seen.add(name)
+        base = os.path.join(ROOT, *parts[:depth])
+        path = os.path.join(base, '__init__.py') if os.path.isdir(base) else base + '.py'
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for imported in names:
+                if imported.split('.')[0] == 'PySide6':
+                    continue
+                nested = window_imports(imported, seen) if imported.split('.')[0] == 'ui' else [imported]
+                found += [name for name in nested if name not in found]
+    return found
+
+
+def run_probe(code, args=(), home=None):
+    """Ejecuta una sonda en un intérprete nuevo y devuelve su resultado JSON"""
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    if home:
+        env['HOME'] = home
+    result = subprocess.run(
+        [sys.executable, '-c', code, *args], cwd=ROOT, env=env,
+        capture_output=True, text=True, timeout=60
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else
+                           f"exit code {result.returncode}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def repeat(runs, code, args=(), home=None):
+    """Repite una sonda; devuelve (todos los resultados, el último)"""
+    results = [run_probe(code, args, home) for _ in range(runs)]
+    return results, results[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5, help="ejecuciones por medida")
+    parser.add_argument('--max-import-ms', type=float, default=400.0,
+                        help="umbral de importación de la ventana (ms)")
+    parser.add_argument('--max-frame-ms', type=float, default=1500.0,
+                        help="umbral hasta el primer frame (ms)")
+    args = parser.parse_args()
+
+    failures = []
+    has_qt = importlib.util.find_spec('PySide6') is not None
+
+    # Importación de la ventana (o de su parte sin Qt)
+    target = ('ui.main_window',) if has_qt else window_imports()
+    label = "ui.main_window" if has_qt else "ventana sin Qt"
+    results, last = repeat(args.runs, IMPORT_PROBE, target)
+    import_ms = statistics.median(r['ms'] for r in results)
+    print(f"Importacion  {label:<22} mediana {import_ms:8.1f} ms   "
+          f"modulos pesados: {', '.join(last['heavy']) or 'ninguno'}")
+    if import_ms > args.max_import_ms:
+        failures.append(f"importacion {import_ms:.0f} ms > {args.max_import_ms:.0f} ms")
+    if last['heavy']:
+        failures.append(f"la ventana importa {', '.join(last['heavy'])} al arrancar")
+
+    # Referencia: lo que se difiere al hilo de precarga
+    results, last = repeat(args.runs, IMPORT_PROBE, ('download.pipeline',))
+    print(f"Referencia   {'download.pipeline':<22} mediana "
+          f"{statistics.median(r['ms'] for r in results):8.1f} ms   "
+          f"(se carga en segundo plano: {', '.join(last['heavy'])})")
+
+    # Tiempo hasta el primer frame
+    if has_qt:
+        with tempfile.TemporaryDirectory() as home:
+            results, last = repeat(args.runs, FRAME_PROBE, home=home)
+        frame_ms = statistics.median(r['frame_ms'] for r in results)
+        print(f"Primer frame {'YouTubeDownloaderApp':<22} mediana {frame_ms:8.1f} ms   "
+              f"(importacion {statistics.median(r['import_ms'] for r in results):.1f} ms, "
+              f"ya cargados: {', '.join(last['heavy']) or 'ninguno'})")
+        if frame_ms > args.max_frame_ms:
+            failures.append(f"primer frame {frame_ms:.0f} ms > {args.max_frame_ms:.0f} ms")
+    else:
+        print("Primer frame: PySide6 no esta instalado, medida omitida")
+
+    if failures:
+        print("\nREGRESION: " + "; ".join(failures))
+        return 1
+    print("\nArranque dentro de los umbrales")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
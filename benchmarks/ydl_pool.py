@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: consultas de metadatos creando un YoutubeDL por URL frente al pool
+de instancias reutilizables.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/ydl_pool.py [--urls N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp  # noqa: E402
+
+from benchmarks.hls_server import HLSStandInServer  # noqa: E402
+from download.ydl_pool import YdlPool  # noqa: E402
+
+# Mismas opciones que YouTubeDownloader.get_video_info
+PROBE_OPTIONS = {'quiet': True, 'no_warnings': True}
+
+
+def probe_fresh(url):
+    with yt_dlp.YoutubeDL(dict(PROBE_OPTIONS)) as ydl:
+        ydl.extract_info(url, download=False)
+
+
+def probe_pooled(pool, url):
+    with pool.checkout(dict(PROBE_OPTIONS)) as ydl:
+        ydl.extract_info(url, download=False)
+
+
+def timed(probe, urls):
+    """Milisegundos de cada consulta"""
+    samples = []
+    for url in urls:
+        start = time.perf_counter()
+        probe(url)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--urls', type=int, default=40, help="URLs consultadas en cada modo")
+    args = parser.parse_args()
+
+    with HLSStandInServer(file_size=64 * 1024) as server:
+        # URLs distintas de la misma plataforma (sin caché de metadatos)
+        urls = [f"{server.file_url}?v={i}" for i in range(args.urls)]
+        pool = YdlPool()
+        probe_pooled(pool, server.file_url)  # primera instancia, fuera de la medida
+
+        print(f"{args.urls} consultas de metadatos por modo, servidor local "
+              f"({server.latency * 1000:.0f} ms de latencia)\n")
+        results = {
+            'YoutubeDL nuevo': timed(probe_fresh, urls),
+            'pool': timed(lambda url: probe_pooled(pool, url), urls),
+        }
+        for name, samples in results.items():
+            print(f"{name:<16} media {statistics.mean(samples):7.1f} ms   "
+                  f"mediana {statistics.median(samples):7.1f} ms   "
+                  f"total {sum(samples) / 1000:6.2f} s")
+
+        fresh, pooled = (statistics.mean(v) for v in results.values())
+        print(f"\nAceleración por consulta: {fresh / pooled:.1f}x  "
+              f"(instancias creadas por el pool: {pool.stats()['created']})")
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Headless batch entry point for Media Downloader (no Qt).
+
+Reads URLs (one per line, '#' for comments) from files or stdin, runs them
+through the same pipeline as the GUI with N concurrent jobs and prints one
+JSON line per finished job on stdout. Logs go to stderr.
+
+Usage:
+    python -m cli urls.txt --jobs 4 -o ~/Descargas
+    cat urls.txt | python -m cli --audio --ssh servidor
+"""
+
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+
+from config import (
+    DEFAULT_DOWNLOAD_FOLDER, MAX_CONCURRENT_DOWNLOADS, VIDEO_QUALITIES,
+    JOB_WEIGHT_BULK, PLAYLIST_ENTRY_RETRIES, AUDIO_PROFILE, AUDIO_PROFILES
+)
+from download.job_queue import DownloadJob, JobQueue, JobState
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv=None):
+    """Command line options"""
+    parser = argparse.ArgumentParser(
+        prog="python -m cli",
+        description="Descarga por lotes sin interfaz grafica (resultados en JSON lines)"
+    )
+    parser.add_argument('inputs', nargs='*', default=['-'],
+                        help="archivos con una URL por linea ('-' = stdin, por defecto)")
+    parser.add_argument('-j', '--jobs', type=int, default=MAX_CONCURRENT_DOWNLOADS,
+                        help="descargas simultaneas (por defecto %(default)s)")
+    parser.add_argument('-o', '--output', default=DEFAULT_DOWNLOAD_FOLDER,
+                        help="carpeta local de destino (por defecto %(default)s)")
+    fmt = parser.add_mutually_exclusive_group()
+    fmt.add_argument('--audio', dest='is_audio', action='store_true', default=True,
+                     help="solo audio, en el formato que marque --audio-profile (por defecto)")
+    fmt.add_argument('--video', dest='is_audio', action='store_false', help="video MP4")
+    parser.add_argument('--quality', default=VIDEO_QUALITIES[0], choices=VIDEO_QUALITIES,
+                        help="calidad de video")
+    parser.add_argument('--ssh', metavar='NOMBRE',
+                        help="subir por SSH usando una configuracion guardada en la app")
+    parser.add_argument('--remote-folder', help="carpeta remota (sustituye a la guardada)")
+    parser.add_argument('--audio-profile', default=AUDIO_PROFILE, choices=sorted(AUDIO_PROFILES),
+                        help="audio: 'passthrough' conserva m4a/opus sin recodificar, "
+                             "'mp3' convierte siempre (por defecto %(default)s)")
+    parser.add_argument('--no-stream', action='store_true',
+                        help="descargar a una carpeta temporal antes de subir por SSH")
+    parser.add_argument('--transcribe', action='store_true',
+                        help="transcribir el audio con Whisper (solo descargas locales)")
+    parser.add_argument('--whisper-model', default='base', help="modelo de Whisper")
+    parser.add_argument('--retries', type=int, default=0, help="reintentos por trabajo")
+    parser.add_argument('--no-archive', action='store_true',
+                        help="no omitir contenidos ya descargados")
+    parser.add_argument('--no-expand', action='store_true',
+                        help="no expandir listas y canales en trabajos individuales")
+    parser.add_argument('--limit-down', type=int, default=0, metavar='KBPS',
+                        help="limite de bajada compartido en KB/s (0 = sin limite)")
+    parser.add_argument('--limit-up', type=int, default=0, metavar='KBPS',
+                        help="limite de subida compartido en KB/s (0 = sin limite)")
+    trace = parser.add_mutually_exclusive_group()
+    trace.add_argument('--trace', metavar='ARCHIVO',
+                       help="traza por fases de toda la sesion (Chrome trace / Perfetto)")
+    trace.add_argument('--trace-dir', metavar='CARPETA',
+                       help="una traza por fases por trabajo en la carpeta")
+    parser.add_argument('-q', '--quiet', action='store_true', help="solo avisos y errores en stderr")
+    return parser.parse_args(argv)
+
+
+def read_urls(inputs):
+    """Yield the URLs listed in the given files ('-' = stdin)"""
+    for name in inputs:
+        stream = sys.stdin if name == '-' else open(name, 'r', encoding='utf-8')
+        try:
+            for line in stream:
+                url = line.strip()
+                if url and not url.startswith('#'):
+                    yield url
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def load_ssh_config(name, remote_folder=None):
+    """Saved SSH configuration by name, or None if it does not exist"""
+    from utils.config_manager import SSHConfigManager
+
+    config = SSHConfigManager().get_config(name)
+    if config is None:
+        return None
+    config = dict(config)
+    config['port'] = int(config.get('port') or 22)
+    config['password'] = config.get('password') or None
+    config['key_file'] = config.get('key_file') or None
+    if remote_folder:
+        config['remote_folder'] = remote_folder
+    return config
+
+
+class ResultWriter:
+    """Queue listener that prints one JSON line per finished job"""
+
+    def __init__(self, stream=sys.stdout):
+        self._stream = stream
+        self._lock = threading.Lock()
+        self.failed = 0
+
+    def __call__(self, job):
+        if not job.is_finished:
+            return
+        record = job.to_dict()
+        record['elapsed'] = round(job.finished_at - job.started_at, 3) if job.started_at else None
+        with self._lock:
+            if job.state not in (JobState.COMPLETED, JobState.SKIPPED):
+                self.failed += 1
+            self._stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._stream.flush()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from utils.logger import setup_logging
+    setup_logging()
+    if args.quiet:
+        for handler in logging.getLogger().handlers:
+            if type(handler) is logging.StreamHandler:
+                handler.setLevel(logging.WARNING)
+
+    ssh_config = None
+    if args.ssh:
+        ssh_config = load_ssh_config(args.ssh, args.remote_folder)
+        if ssh_config is None:
+            print(f"Configuracion SSH no encontrada: {args.ssh}", file=sys.stderr)
+            return 2
+        if not ssh_config.get('remote_folder'):
+            print("Falta la carpeta remota (--remote-folder)", file=sys.stderr)
+            return 2
+
+    # Heavy imports (yt-dlp, paramiko) only once the arguments are valid
+    from download.downloader import YouTubeDownloader
+    from download.pipeline import DownloadPipeline
+    from download.playlist import looks_like_playlist, iter_playlist_entries
+    from download.stages import StageScheduler, STAGE_DOWNLOAD
+    from download.telemetry import TelemetryLog
+    from utils.bandwidth import DOWNLOAD, UPLOAD, get_bandwidth_manager
+    from utils.ssh_pool import get_ssh_pool
+    from utils.tracing import TraceRecorder
+
+    YouTubeDownloader.audio_profile = args.audio_profile
+    bandwidth = get_bandwidth_manager()
+    bandwidth.set_limit(DOWNLOAD, args.limit_down * 1024)
+    bandwidth.set_limit(UPLOAD, args.limit_up * 1024)
+
+    trace = None
+    if args.trace or args.trace_dir:
+        trace = TraceRecorder(directory=args.trace_dir, session_file=args.trace)
+
+    stages = StageScheduler({STAGE_DOWNLOAD: max(1, args.jobs)})
+    pipeline = DownloadPipeline(
+        on_message=lambda job, message, msg_type: logger.info("[#%d] %s", job.job_id, message),
+        stages=stages, trace=trace
+    )
+    queue = JobQueue(pipeline.run, max_workers=stages.capacity())
+    writer = ResultWriter()
+    queue.add_listener(writer)
+    queue.add_listener(TelemetryLog().on_job_update)
+    queue.add_listener(lambda job: job.is_finished and bandwidth.release(job.job_id))
+
+    job_options = dict(
+        output_folder=ssh_config['remote_folder'] if ssh_config else args.output,
+        is_audio=args.is_audio,
+        quality=None if args.is_audio else args.quality,
+        use_ssh=ssh_config is not None,
+        ssh_config=ssh_config,
+        transcribe=args.transcribe and args.is_audio and ssh_config is None,
+        whisper_model=args.whisper_model,
+        use_archive=not args.no_archive,
+        stream_upload=not args.no_stream,
+    )
+
+    def submit(url, **extra):
+        options = dict(job_options, max_retries=args.retries)
+        options.update(extra)
+        job = DownloadJob(url, **options)
+        bandwidth.set_weight(job.job_id, job.weight)
+        queue.submit(job)
+        return job
+
+    def expansion_failed(url, error):
+        # One result line for the playlist itself, counted as a failed job
+        job = DownloadJob(url, **dict(job_options, max_retries=args.retries))
+        job.state = JobState.FAILED
+        job.message = job.result_message = f"Error al expandir la lista: {error}"
+        job.finished_at = time.time()
+        writer(job)
+
+    submitted = 0
+    try:
+        for url in read_urls(args.inputs):
+            if not args.no_expand and looks_like_playlist(url):
+                try:
+                    for entry in iter_playlist_entries(url):
+                        job = submit(entry['url'], weight=JOB_WEIGHT_BULK,
+                                     max_retries=max(args.retries, PLAYLIST_ENTRY_RETRIES))
+                        job.title = entry.get('title')
+                        submitted += 1
+                except Exception as e:
+                    # Entries already submitted keep running; the batch goes on
+                    logger.error("Playlist expansion failed for %s: %s", url, e)
+                    expansion_failed(url, e)
+                    submitted += 1
+            else:
+                submit(url)
+                submitted += 1
+
+        while not queue.wait_idle(timeout=0.5):
+            pass
+    except KeyboardInterrupt:
+        logger.warning("Interrupted, cancelling %d job(s)", queue.active_count() + queue.pending_count())
+        queue.cancel_all()
+        queue.wait_idle()
+        return 130
+
+    ssh_pool = get_ssh_pool()
+    ssh_stats = ssh_pool.stats()
+    if ssh_stats['hit_rate'] is not None:
+        logger.info("SSH connections reused for %d of %d uploads (%.0f%%)", ssh_stats['hits'],
+                    ssh_stats['hits'] + ssh_stats['misses'], ssh_stats['hit_rate'] * 100)
+    ssh_pool.close()
+
+    if not submitted:
+        print("No hay URLs que descargar", file=sys.stderr)
+        return 2
+    return 1 if writer.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
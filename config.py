@@ -4,6 +4,7 @@
 Configuración de la aplicación
 """
 
+import os
 from pathlib import Path
 
 # Configuración de la aplicación
@@ -111,9 +112,128 @@ VIDEO_QUALITIES = [
     "240p"
 ]
 
+# Cola de descargas
+MAX_CONCURRENT_DOWNLOADS = 3  # trabajos simultáneos por defecto
+MAX_CONCURRENT_DOWNLOADS_LIMIT = 16
+PLAYLIST_ENTRY_RETRIES = 2  # reintentos por entrada de una lista
+
+# Etapas del pipeline (la bajada usa MAX_CONCURRENT_DOWNLOADS o el valor elegido)
+STAGE_UPLOAD_WORKERS = 2       # subidas SSH simultáneas
+STAGE_TRANSCRIBE_WORKERS = 1   # transcripciones simultáneas (Whisper usa toda la CPU)
+STAGE_QUEUE_SIZE = 2           # trabajos que pueden esperar a la entrada de cada etapa
+STAGE_UTILIZATION_WINDOW = 10  # segundos para calcular la ocupación de cada etapa
+
+# Posprocesado con FFmpeg (extracción de audio y unión de pistas), en procesos aparte
+POSTPROCESS_WORKERS = os.cpu_count() or 2   # procesos (y huecos de la etapa de procesado)
+FFMPEG_THREAD_BUDGET = os.cpu_count() or 2  # hilos de FFmpeg repartidos entre los procesos
+
+# Reparto del ancho de banda (peso relativo de cada trabajo)
+JOB_WEIGHT_NORMAL = 1.0
+JOB_WEIGHT_BULK = 0.25      # entradas de listas y canales
+JOB_WEIGHT_PRIORITY = 4.0   # trabajos priorizados desde la cola
+BANDWIDTH_LIMIT_MAX_KBPS = 1024 * 1024
+
+# Informes de progreso: como mucho PROGRESS_RATE_HZ por trabajo, y la
+# interfaz aplica los de todos los trabajos en un único tick con esa frecuencia
+PROGRESS_RATE_HZ = 10
+
+# Diario de trabajos: se compacta (solo quedan los trabajos sin terminar) cada
+# JOURNAL_COMPACT_FINISHED trabajos terminados o al pasar de JOURNAL_COMPACT_BYTES
+JOURNAL_COMPACT_FINISHED = 200
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+# Telemetría de los trabajos (velocidad, tiempo restante y tiempo por fase)
+SPEED_EWMA_TAU = 3.0                          # segundos: constante de la media de velocidad
+TELEMETRY_LOG_MAX_BYTES = 16 * 1024 * 1024    # job_results.jsonl se rota al superarlo
+
+# Modo servicio (API HTTP local)
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 8765
+DAEMON_KEEP_FINISHED = 500        # trabajos terminados que siguen consultables
+DAEMON_DRAIN_TIMEOUT = 300        # segundos para dejar terminar los trabajos en curso
+DAEMON_EVENT_BUFFER = 1000        # eventos SSE pendientes por cliente antes de cortarlo
+DAEMON_PROGRESS_INTERVAL = 0.5    # segundos mínimos entre eventos de progreso de un trabajo
+
+# Caché de metadatos (info dicts de yt-dlp)
+METADATA_CACHE_MAX_BYTES = 64 * 1024 * 1024
+METADATA_CACHE_DEFAULT_TTL = 2 * 3600  # segundos
+# Las URLs de los formatos caducan: el TTL depende de la plataforma
+METADATA_CACHE_TTL = {
+    "YouTube": 3 * 3600,
+    "Instagram": 30 * 60,
+    "X (Twitter)": 30 * 60,
+    "TikTok": 30 * 60,
+    "Facebook": 30 * 60,
+    "Vimeo": 3600,
+    "Twitch": 3600,
+    "Dailymotion": 3600,
+    "SoundCloud": 6 * 3600,
+    "iVoox": 12 * 3600,
+}
+
+# Descarga de fragmentos (HLS/DASH)
+FRAGMENT_CONCURRENCY_INITIAL = 4   # fragmentos simultáneos en el primer intento
+FRAGMENT_CONCURRENCY_MAX = 16
+FRAGMENT_GAIN_THRESHOLD = 0.10     # mejora mínima para seguir subiendo
+FRAGMENT_MIN_SAMPLE = 8            # fragmentos necesarios para una medición
+FRAGMENT_RETRIES = 10              # reintentos por fragmento (yt-dlp no reintenta por defecto)
+HTTP_CHUNK_SIZE = 10 * 1024 * 1024  # descargas HTTP no fragmentadas, por rangos
+
+# Instancias de yt-dlp reutilizables (pool por perfil de opciones)
+YDL_POOL_MAX_IDLE = 4     # instancias libres por perfil
+YDL_POOL_MAX_USES = 200   # usos antes de renovar una instancia (cookies y cachés)
+
+# Conexiones SSH/SFTP reutilizables entre trabajos (pool por servidor y usuario)
+SSH_POOL_MAX_CHANNELS = 8      # canales de sesión por conexión (OpenSSH admite 10: deja margen)
+SSH_POOL_IDLE_TIMEOUT = 120    # segundos sin uso antes de cerrar una conexión
+SSH_POOL_PROBE_AFTER = 15      # segundos de inactividad tras los que se comprueba al prestarla
+SSH_POOL_PROBE_TIMEOUT = 5     # segundos de espera de la comprobación
+SSH_POOL_CHANNEL_WAIT = 30     # segundos que un comando espera un canal libre
+SSH_KEEPALIVE_INTERVAL = 30    # segundos entre keepalives de las conexiones abiertas
+
+# Subida SFTP en paralelo: varios canales escriben trozos del mismo archivo
+SFTP_PARALLEL_STREAMS = 4                    # canales por subida (1 = un solo canal); sin
+                                             # sitio en SSH_POOL_MAX_CHANNELS, los que quepan
+SFTP_PARALLEL_CHUNK_SIZE = 8 * 1024 * 1024   # bytes de cada trozo
+SFTP_PARALLEL_MIN_SIZE = 16 * 1024 * 1024    # los archivos más pequeños van por un canal
+
+# Subidas reanudables: se escriben como <archivo>.part y se renombran al terminar;
+# al reanudar se comprueba que el .part coincide con el principio del archivo local
+UPLOAD_PART_SUFFIX = ".part"
+RESUME_VERIFY = "sampled"            # "sampled" (muestras del prefijo) o "full" (prefijo entero)
+RESUME_SAMPLES = 16                  # ventanas repartidas por el prefijo en modo "sampled"
+RESUME_SAMPLE_SIZE = 64 * 1024       # bytes de cada ventana
+RESUME_TAIL_SIZE = 4 * 1024 * 1024   # final del prefijo (lo último escrito), siempre comparado
+
+# Verificación de las subidas: SHA-256 calculado mientras se envían los datos y
+# comparado con el del servidor (extensión SFTP check-file o sha256sum por SSH)
+UPLOAD_VERIFY_HASH = True
+UPLOAD_VERIFY_RETRIES = 1            # resubidas del archivo si el hash no coincide
+
+# Deduplicación de subidas: índice local del contenido subido a cada servidor;
+# si el servidor ya tiene el archivo no se envía, y si lo tiene con otro nombre
+# se enlaza allí mismo (ln, o cp --reflink=auto entre sistemas de archivos)
+UPLOAD_DEDUP = True
+UPLOAD_DEDUP_VERIFY = True           # comprobar el hash remoto de la copia antes de reutilizarla
+
+# Subida en streaming (descarga directa al servidor SSH, sin temporal local)
+STREAM_UPLOADS = True                 # por defecto en los trabajos con subida SSH
+STREAM_BLOCK_SIZE = 256 * 1024
+STREAM_QUEUE_BLOCKS = 32              # bloques en memoria entre bajada y subida (8 MB)
+STREAM_RETRIES = 5                    # reconexiones si se corta la descarga
+STREAM_STALL_TIMEOUT = 60             # segundos sin recibir datos antes de abandonar (con FFmpeg)
+
 # Configuración de audio
 AUDIO_QUALITY = "192"  # kbps
-AUDIO_CODEC = "mp3"
+AUDIO_CODEC = "mp3"    # códec al que se convierte el audio que el perfil no acepta
+
+# Perfiles de audio: códecs que se guardan sin recodificar (tal cual o cambiando
+# solo el contenedor); el resto se convierte a AUDIO_CODEC
+AUDIO_PROFILES = {
+    "mp3": ("mp3",),                                  # siempre MP3
+    "passthrough": ("mp3", "aac", "opus", "vorbis"),  # conserva el códec original
+}
+AUDIO_PROFILE = "passthrough"
 
 # Configuración de la ventana
 WINDOW_WIDTH = 900
@@ -0,0 +1,692 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local HTTP service for Media Downloader (no Qt).
+
+Runs the same queue and pipeline as the GUI behind a small JSON API so other
+services can enqueue downloads programmatically:
+
+    POST   /jobs         submit {"url": ...} or {"urls": [...]} -> 202
+    GET    /jobs         list jobs (?state=running)
+    GET    /jobs/<id>    state and progress of one job
+    DELETE /jobs/<id>    cancel a job
+    GET    /expansions   playlists being (or already) listed into jobs
+    GET    /events       Server-Sent Events: job, progress, message and expansion events
+    GET    /status       queue counters and per-stage utilization
+
+Playlists and channels are listed in the background: POST /jobs answers at
+once with an expansion handle for each of them, and their entries show up as
+job events (plus an expansion event per entry) while the listing goes on.
+
+Usage:
+    python -m daemon --port 8765 --jobs 4
+    curl -X POST localhost:8765/jobs -d '{"url": "https://...", "format": "video"}'
+
+SIGTERM/SIGINT drain the service: new submissions get 503, pending jobs are
+not started, and running jobs get up to --drain-timeout seconds to finish.
+Whatever is left stays in the daemon's own journal and resumes on next start.
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import queue
+import re
+import signal
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+from config import (
+    DEFAULT_DOWNLOAD_FOLDER, MAX_CONCURRENT_DOWNLOADS, VIDEO_QUALITIES,
+    JOB_WEIGHT_NORMAL, JOB_WEIGHT_BULK, JOB_WEIGHT_PRIORITY, PLAYLIST_ENTRY_RETRIES,
+    DAEMON_HOST, DAEMON_PORT, DAEMON_KEEP_FINISHED, DAEMON_DRAIN_TIMEOUT,
+    DAEMON_EVENT_BUFFER, DAEMON_PROGRESS_INTERVAL, STREAM_UPLOADS,
+    AUDIO_PROFILE, AUDIO_PROFILES
+)
+from download.job_queue import DownloadJob, JobQueue
+
+logger = logging.getLogger(__name__)
+
+# Separate from the GUI's so neither process cleans up the other's temp files
+DAEMON_TEMP_ROOT = os.path.join(tempfile.gettempdir(), "youtube_download_daemon")
+
+PRIORITY_WEIGHTS = {
+    'bulk': JOB_WEIGHT_BULK,
+    'normal': JOB_WEIGHT_NORMAL,
+    'high': JOB_WEIGHT_PRIORITY,
+}
+
+MAX_BODY_BYTES = 1024 * 1024
+KEEPALIVE_INTERVAL = 15  # seconds between SSE comments on an idle stream
+
+
+class JobRequestError(ValueError):
+    """Invalid job submission (answered with HTTP 400)"""
+
+
+class EventBroker:
+    """
+    Fan-out of server-sent events to every connected client.
+
+    Each event is serialized once and shared by all subscribers. A client
+    whose buffer fills up is dropped instead of slowing down the workers.
+    """
+
+    def __init__(self, buffer_size: int = DAEMON_EVENT_BUFFER):
+        self._buffer_size = buffer_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> queue.Queue:
+        """Register a client; None in its queue means the stream must end"""
+        subscriber = queue.Queue(maxsize=self._buffer_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event: str, data: dict):
+        """Queue an event for every client"""
+        payload = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(payload)
+            except queue.Full:
+                logger.warning("Dropping slow event subscriber")
+                self._close(subscriber)
+
+    def close(self):
+        """End every stream (on shutdown)"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            self._close(subscriber)
+
+    def _close(self, subscriber: queue.Queue):
+        self.unsubscribe(subscriber)
+        # Make room for the end marker if the client is behind
+        while True:
+            try:
+                subscriber.put_nowait(None)
+                return
+            except queue.Full:
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+
+
+class JobService:
+    """Queue, pipeline and journal of the daemon, with events for API clients"""
+
+    def __init__(self, max_workers: int = MAX_CONCURRENT_DOWNLOADS,
+                 keep_finished: int = DAEMON_KEEP_FINISHED, journal_file=None, trace=None):
+        from download.job_journal import JobJournal
+        from download.pipeline import DownloadPipeline
+        from download.stages import StageScheduler, STAGE_DOWNLOAD
+        from download.telemetry import TelemetryLog
+        from download.ydl_pool import get_ydl_pool
+        from utils.bandwidth import get_bandwidth_manager
+        from utils.ssh_pool import get_ssh_pool
+
+        if journal_file is None:
+            config_dir = Path.home() / ".youtube_downloader"
+            config_dir.mkdir(exist_ok=True)
+            journal_file = config_dir / "daemon_journal.jsonl"
+
+        self.journal = JobJournal(journal_file)
+        self.telemetry_log = TelemetryLog()
+        self.bandwidth = get_bandwidth_manager()
+        self.ydl_pool = get_ydl_pool()
+        self.ssh_pool = get_ssh_pool()
+        self.events = EventBroker()
+        self.stages = StageScheduler({STAGE_DOWNLOAD: max_workers})
+        self.pipeline = DownloadPipeline(
+            journal=self.journal, on_message=self._on_message,
+            temp_root=DAEMON_TEMP_ROOT, stages=self.stages, trace=trace
+        )
+        self.queue = JobQueue(self.pipeline.run, max_workers=self.stages.capacity())
+        self.queue.add_listener(self.journal.on_job_update)
+        self.queue.add_listener(self.telemetry_log.on_job_update)
+        self.queue.add_listener(self._on_job_update)
+        self.keep_finished = keep_finished
+        self.draining = False
+        self.started_at = time.time()
+        self._last_progress = {}
+        self._expansions = {}  # id -> expansion record (see _expand)
+        self._expansion_ids = itertools.count(1)
+        self._expansion_cancel = threading.Event()
+        self._expansion_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+
+    def submit(self, payload: dict) -> tuple:
+        """
+        Build and enqueue the jobs described by an API request
+
+        Playlists are not listed here: each one gets an expansion that
+        enqueues its entries from a background thread.
+
+        Returns:
+            tuple: (submitted DownloadJob objects, expansion records)
+        """
+        from download.playlist import looks_like_playlist
+        from utils.validators import InputValidator
+
+        if not isinstance(payload, dict):
+            raise JobRequestError("Request body must be a JSON object")
+        urls = payload.get('urls')
+        if urls is None:
+            urls = [payload.get('url')]
+        if not isinstance(urls, list) or not urls:
+            raise JobRequestError("'urls' must be a non-empty list")
+        for url in urls:
+            valid, message = InputValidator.validate_url(url if isinstance(url, str) else "")
+            if not valid:
+                raise JobRequestError(f"{url!r}: {message}")
+
+        options = self._job_options(payload)
+        expand = bool(payload.get('expand', True))
+
+        jobs = []
+        playlists = []
+        for url in urls:
+            url = url.strip()
+            if expand and looks_like_playlist(url):
+                playlists.append(url)
+            else:
+                jobs.append(self._enqueue(DownloadJob(url, **options)))
+        expansions = [self._start_expansion(url, options) for url in playlists]
+        logger.info("API submitted %d job(s) and %d playlist(s)", len(jobs), len(expansions))
+        return jobs, expansions
+
+    def _start_expansion(self, url: str, options: dict) -> dict:
+        """Start listing a playlist in the background; returns its expansion record"""
+        with self._expansion_lock:
+            expansion = {
+                'id': next(self._expansion_ids), 'url': url, 'state': 'running',
+                'count': 0, 'job_ids': [], 'error': None,
+            }
+            self._expansions[expansion['id']] = expansion
+            record = dict(expansion, job_ids=[])
+            # Finished expansions are kept like finished jobs
+            finished = [key for key, e in self._expansions.items() if e['state'] != 'running']
+            for key in finished[:max(0, len(finished) - self.keep_finished)]:
+                del self._expansions[key]
+        threading.Thread(
+            target=self._expand, args=(expansion, options),
+            name=f"playlist-expansion-{expansion['id']}", daemon=True
+        ).start()
+        return record
+
+    def _expand(self, expansion: dict, options: dict):
+        """
+        List a playlist and enqueue one job per entry as soon as it is known
+
+        Runs in its own thread, like the GUI's expansion. A failure halfway
+        keeps the jobs already enqueued (their ids are in the expansion events)
+        and ends the expansion as 'failed'; draining cancels it.
+        """
+        from download.playlist import iter_playlist_entries
+
+        entry_options = dict(
+            options, weight=min(options['weight'], JOB_WEIGHT_BULK),
+            max_retries=max(options['max_retries'], PLAYLIST_ENTRY_RETRIES)
+        )
+        state, error = 'done', None
+        try:
+            for entry in iter_playlist_entries(expansion['url'], self._expansion_cancel):
+                if self._expansion_cancel.is_set():
+                    break
+                job = DownloadJob(entry['url'], **entry_options)
+                job.title = entry.get('title')
+                self._enqueue(job)
+                with self._expansion_lock:
+                    expansion['count'] += 1
+                    expansion['job_ids'].append(job.job_id)
+                self._publish_expansion(expansion, job_id=job.job_id)
+            if self._expansion_cancel.is_set():
+                state = 'cancelled'
+        except Exception as e:
+            logger.exception("Playlist expansion failed: %s", expansion['url'])
+            state, error = 'failed', str(e)
+        with self._expansion_lock:
+            expansion['state'] = state
+            expansion['error'] = error
+        logger.info("Playlist %s %s: %d job(s)", expansion['url'], state, expansion['count'])
+        self._publish_expansion(expansion)
+
+    def _publish_expansion(self, expansion: dict, job_id: int = None):
+        with self._expansion_lock:
+            data = {k: v for k, v in expansion.items() if k != 'job_ids'}
+        if job_id is not None:
+            data['job_id'] = job_id
+        self.events.publish('expansion', data)
+
+    def expansions(self) -> list:
+        """Expansion records (id, url, state, count, job_ids, error)"""
+        with self._expansion_lock:
+            return [dict(e, job_ids=list(e['job_ids'])) for e in self._expansions.values()]
+
+    def _job_options(self, payload: dict) -> dict:
+        """Map request fields onto DownloadJob options (validated)"""
+        from cli import load_ssh_config
+
+        fmt = payload.get('format', 'audio')
+        if fmt not in ('audio', 'video'):
+            raise JobRequestError("'format' must be 'audio' or 'video'")
+        is_audio = fmt == 'audio'
+
+        quality = None
+        if not is_audio:
+            quality = payload.get('quality', VIDEO_QUALITIES[0])
+            if quality not in VIDEO_QUALITIES:
+                raise JobRequestError(f"'quality' must be one of {VIDEO_QUALITIES}")
+
+        priority = payload.get('priority', 'normal')
+        if priority not in PRIORITY_WEIGHTS:
+            raise JobRequestError(f"'priority' must be one of {list(PRIORITY_WEIGHTS)}")
+
+        try:
+            max_retries = max(0, int(payload.get('max_retries', 0)))
+        except (TypeError, ValueError):
+            raise JobRequestError("'max_retries' must be an integer")
+
+        ssh_config = None
+        if payload.get('ssh'):
+            ssh_config = load_ssh_config(str(payload['ssh']), payload.get('remote_folder'))
+            if ssh_config is None:
+                raise JobRequestError(f"Unknown SSH configuration: {payload['ssh']}")
+            if not ssh_config.get('remote_folder'):
+                raise JobRequestError("'remote_folder' is required for SSH uploads")
+            output_folder = ssh_config['remote_folder']
+        else:
+            output_folder = os.path.expanduser(
+                str(payload.get('output_folder') or DEFAULT_DOWNLOAD_FOLDER)
+            )
+
+        return dict(
+            output_folder=output_folder,
+            is_audio=is_audio,
+            quality=quality,
+            use_ssh=ssh_config is not None,
+            ssh_config=ssh_config,
+            transcribe=bool(payload.get('transcribe')) and is_audio and ssh_config is None,
+            whisper_model=str(payload.get('whisper_model', 'base')),
+            max_retries=max_retries,
+            use_archive=bool(payload.get('use_archive', True)),
+            weight=PRIORITY_WEIGHTS[priority],
+            stream_upload=bool(payload.get('stream', STREAM_UPLOADS)),
+        )
+
+    def _enqueue(self, job: DownloadJob) -> DownloadJob:
+        from download.progress_hook import DownloadProgressHook
+
+        job.progress_hook = DownloadProgressHook(
+            cancel_event=job.cancel_event, job_id=job.job_id
+        )
+        job.progress_hook.job_progress.connect(self._on_progress)
+        self.bandwidth.set_weight(job.job_id, job.weight)
+        return self.queue.submit(job)
+
+    def cancel(self, job_id: int) -> bool:
+        return self.queue.cancel(job_id)
+
+    # ------------------------------------------------------------------
+    # Events
+    # ------------------------------------------------------------------
+
+    def _on_job_update(self, job: DownloadJob):
+        self.events.publish('job', job.to_dict())
+        if job.is_finished:
+            # Keep finished jobs light: the hook and its callbacks are no longer needed
+            job.progress_hook = None
+            self._last_progress.pop(job.job_id, None)
+            self.bandwidth.release(job.job_id)
+            self.queue.remove_finished(keep=self.keep_finished)
+
+    def _on_progress(self, job_id: int, percent: int, message: str):
+        job = self.queue.get_job(job_id)
+        if job is None:
+            return
+        job.progress = percent
+        job.message = message
+        now = time.monotonic()
+        if percent < 100 and now - self._last_progress.get(job_id, 0) < DAEMON_PROGRESS_INTERVAL:
+            return
+        self._last_progress[job_id] = now
+        self.events.publish('progress', {
+            'job_id': job_id, 'progress': percent, 'message': message,
+        })
+
+    def _on_message(self, job: DownloadJob, message: str, msg_type: str):
+        logger.info("[#%d] %s", job.job_id, message)
+        self.events.publish('message', {
+            'job_id': job.job_id, 'type': msg_type, 'message': message,
+        })
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def restore(self):
+        """Resume the jobs the previous daemon run left unfinished"""
+        from download.job_journal import JobJournal
+        from download.pipeline import cleanup_temp_files
+
+        entries = self.journal.unfinished()
+        self.journal.compact()
+        cleanup_temp_files(self.journal.claimed_paths(), DAEMON_TEMP_ROOT)
+        for entry in entries:
+            job = JobJournal.restore_job(
+                entry, ssh_password=_saved_ssh_password(entry['options'].get('ssh_config'))
+            )
+            self._enqueue(job)
+        if entries:
+            logger.info("Resuming %d unfinished job(s) from the journal", len(entries))
+
+    def drain(self, timeout: float = DAEMON_DRAIN_TIMEOUT) -> bool:
+        """
+        Stop taking and starting jobs, then wait for the running ones
+
+        Returns:
+            bool: True if every running job finished within the timeout
+        """
+        self.draining = True
+        self._expansion_cancel.set()
+        self.queue.pause()
+        self.events.publish('drain', self.status())
+        logger.info("Draining: waiting for %d running job(s), %d pending left for next start",
+                    self.queue.active_count(), self.queue.pending_count())
+        finished = self.queue.wait_running(timeout)
+        if not finished:
+            logger.warning("Drain timed out with %d job(s) still running; "
+                           "they will resume on next start", self.queue.active_count())
+        return finished
+
+    def status(self) -> dict:
+        jobs = self.queue.jobs()
+        counts = {}
+        for job in jobs:
+            counts[job.state] = counts.get(job.state, 0) + 1
+        return {
+            'running': self.queue.active_count(),
+            'pending': self.queue.pending_count(),
+            'max_workers': self.queue.max_workers,
+            'stages': self.stages.stats(),
+            'draining': self.draining,
+            'uptime': round(time.time() - self.started_at, 1),
+            'states': counts,
+            'bandwidth': self.bandwidth.stats(),
+            'ydl_pool': self.ydl_pool.stats(),
+            'ssh_pool': self.ssh_pool.stats(),
+            'expanding': sum(e['state'] == 'running' for e in self.expansions()),
+        }
+
+
+def _saved_ssh_password(ssh_config):
+    """Password of a journaled SSH job, looked up in the saved configurations"""
+    from utils.config_manager import SSHConfigManager
+
+    if not ssh_config:
+        return None
+    for config in SSHConfigManager().load_configs():
+        if (config.get('host') == ssh_config.get('host')
+                and config.get('username') == ssh_config.get('username')
+                and int(config.get('port', 22)) == int(ssh_config.get('port', 22))):
+            return config.get('password') or None
+    return None
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """JSON API over the JobService attached to the server"""
+
+    server_version = "MediaDownloader"
+    _job_path = re.compile(r'^/jobs/(\d+)$')
+
+    @property
+    def service(self) -> JobService:
+        return self.server.service
+
+    def log_message(self, fmt, *args):
+        logger.debug("%s - %s", self.address_string(), fmt % args)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _send_json(self, status: int, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str):
+        self._send_json(status, {'error': message})
+
+    def _authorized(self) -> bool:
+        token = self.server.token
+        if not token or self.headers.get('Authorization') == f"Bearer {token}":
+            return True
+        self._send_error(401, "Missing or invalid bearer token")
+        return False
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise JobRequestError("Request body too large")
+        try:
+            return json.loads(self.rfile.read(length) or b'{}')
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise JobRequestError("Request body is not valid JSON")
+
+    def _job_or_404(self, path: str):
+        match = self._job_path.match(path)
+        job = self.service.queue.get_job(int(match.group(1))) if match else None
+        if job is None:
+            self._send_error(404, "Job not found")
+        return job
+
+    # ------------------------------------------------------------------
+    # Routes
+    # ------------------------------------------------------------------
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        url = urlsplit(self.path)
+        if url.path == '/jobs':
+            states = parse_qs(url.query).get('state')
+            jobs = [job.to_dict() for job in self.service.queue.jobs()
+                    if not states or job.state in states]
+            self._send_json(200, {'jobs': jobs})
+        elif url.path.startswith('/jobs/'):
+            job = self._job_or_404(url.path)
+            if job is not None:
+                self._send_json(200, job.to_dict())
+        elif url.path == '/expansions':
+            self._send_json(200, {'expansions': self.service.expansions()})
+        elif url.path == '/status':
+            self._send_json(200, self.service.status())
+        elif url.path == '/events':
+            self._stream_events()
+        else:
+            self._send_error(404, "Not found")
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if urlsplit(self.path).path != '/jobs':
+            self._send_error(404, "Not found")
+            return
+        if self.service.draining:
+            self._send_error(503, "Service is shutting down")
+            return
+        try:
+            jobs, expansions = self.service.submit(self._read_json())
+        except JobRequestError as e:
+            self._send_error(400, str(e))
+            return
+        except Exception as e:
+            logger.exception("Job submission failed")
+            self._send_error(500, str(e))
+            return
+        self._send_json(202, {'jobs': [job.to_dict() for job in jobs],
+                              'expansions': expansions})
+
+    def do_DELETE(self):
+        if not self._authorized():
+            return
+        job = self._job_or_404(urlsplit(self.path).path)
+        if job is None:
+            return
+        if not self.service.cancel(job.job_id):
+            self._send_error(409, f"Job already {job.state}")
+            return
+        self._send_json(200, job.to_dict())
+
+    def _stream_events(self):
+        """Server-Sent Events until the client leaves or the service stops"""
+        subscriber = self.service.events.subscribe()
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            # Current state first so clients don't miss jobs already running
+            for job in self.service.queue.jobs():
+                if not job.is_finished:
+                    data = json.dumps(job.to_dict(), ensure_ascii=False)
+                    self.wfile.write(f"event: job\ndata: {data}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            while True:
+                try:
+                    payload = subscriber.get(timeout=KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    payload = ": keep-alive\n\n"
+                if payload is None:
+                    break
+                self.wfile.write(payload.encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.service.events.unsubscribe(subscriber)
+            self.close_connection = True
+
+
+class DaemonServer(ThreadingHTTPServer):
+    """HTTP server carrying the JobService and the optional bearer token"""
+
+    daemon_threads = True
+
+    def __init__(self, address, service: JobService, token: str = None):
+        super().__init__(address, ApiHandler)
+        self.service = service
+        self.token = token
+
+
+def parse_args(argv=None):
+    """Command line options"""
+    parser = argparse.ArgumentParser(
+        prog="python -m daemon",
+        description="Servicio local con API HTTP para encolar descargas"
+    )
+    parser.add_argument('--host', default=DAEMON_HOST,
+                        help="direccion de escucha (por defecto %(default)s)")
+    parser.add_argument('--port', type=int, default=DAEMON_PORT,
+                        help="puerto (por defecto %(default)s)")
+    parser.add_argument('-j', '--jobs', type=int, default=MAX_CONCURRENT_DOWNLOADS,
+                        help="descargas simultaneas (por defecto %(default)s)")
+    parser.add_argument('--token', default=os.environ.get('MEDIA_DOWNLOADER_TOKEN'),
+                        help="exigir 'Authorization: Bearer TOKEN' "
+                             "(por defecto $MEDIA_DOWNLOADER_TOKEN)")
+    parser.add_argument('--drain-timeout', type=float, default=DAEMON_DRAIN_TIMEOUT,
+                        help="segundos para terminar los trabajos en curso al parar")
+    parser.add_argument('--keep-finished', type=int, default=DAEMON_KEEP_FINISHED,
+                        help="trabajos terminados que siguen consultables")
+    parser.add_argument('--no-resume', action='store_true',
+                        help="no reanudar los trabajos pendientes de la ejecucion anterior")
+    parser.add_argument('--audio-profile', default=AUDIO_PROFILE, choices=sorted(AUDIO_PROFILES),
+                        help="audio: 'passthrough' conserva m4a/opus sin recodificar, "
+                             "'mp3' convierte siempre (por defecto %(default)s)")
+    parser.add_argument('--limit-down', type=int, default=0, metavar='KBPS',
+                        help="limite de bajada compartido en KB/s (0 = sin limite)")
+    parser.add_argument('--limit-up', type=int, default=0, metavar='KBPS',
+                        help="limite de subida compartido en KB/s (0 = sin limite)")
+    parser.add_argument('--trace-dir', metavar='CARPETA',
+                        help="guardar una traza por fases (Chrome trace / Perfetto) por trabajo")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from utils.logger import setup_logging
+    from utils.bandwidth import DOWNLOAD, UPLOAD
+    from download.downloader import YouTubeDownloader
+    from download.stages import STAGE_DOWNLOAD
+    setup_logging()
+
+    YouTubeDownloader.audio_profile = args.audio_profile
+
+    trace = None
+    if args.trace_dir:
+        from utils.tracing import TraceRecorder
+        trace = TraceRecorder(directory=args.trace_dir)
+
+    service = JobService(max_workers=max(1, args.jobs), keep_finished=args.keep_finished,
+                         trace=trace)
+    service.bandwidth.set_limit(DOWNLOAD, args.limit_down * 1024)
+    service.bandwidth.set_limit(UPLOAD, args.limit_up * 1024)
+    if args.no_resume:
+        for entry in service.journal.unfinished():
+            service.journal.discard(entry['key'])
+
+    try:
+        server = DaemonServer((args.host, args.port), service, token=args.token)
+    except OSError as e:
+        print(f"No se puede escuchar en {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 2
+    service.restore()
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    thread = threading.Thread(target=server.serve_forever, name="daemon-http", daemon=True)
+    thread.start()
+    logger.info("Daemon listening on http://%s:%d (%d download slots)",
+                args.host, server.server_address[1], service.stages.get_workers(STAGE_DOWNLOAD))
+
+    while not stop.wait(1):
+        pass
+
+    # Keep answering status requests while running jobs finish
+    drained = service.drain(args.drain_timeout)
+    service.events.close()
+    service.ssh_pool.close()
+    server.shutdown()
+    server.server_close()
+    logger.info("Daemon stopped")
+    return 0 if drained else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
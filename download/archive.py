@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice persistente de descargas ya realizadas (compatible con download_archive de yt-dlp)
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Comodín para entradas importadas de un archivo de yt-dlp (sin perfil ni destino)
+ANY = "*"
+
+
+class DownloadArchive:
+    """
+    Índice SQLite de (extractor, id, perfil de formato, destino).
+
+    La clave primaria hace que cada consulta sea O(1) aunque haya cientos de
+    miles de entradas. El extractor se guarda en minúsculas, igual que las
+    líneas "extractor id" del ``download_archive`` de yt-dlp.
+    """
+
+    def __init__(self, db_file: Optional[str] = None):
+        """
+        Inicializa el índice
+
+        Args:
+            db_file: Ruta a la base de datos. Si es None, usa la predeterminada.
+        """
+        if db_file is None:
+            config_dir = Path.home() / ".youtube_downloader"
+            config_dir.mkdir(exist_ok=True)
+            self.db_file = config_dir / "download_archive.sqlite3"
+        else:
+            self.db_file = Path(db_file)
+
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre una conexión a la base de datos"""
+        return sqlite3.connect(str(self.db_file), timeout=10)
+
+    def _init_db(self):
+        """Crea la tabla si no existe"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS archive ("
+                " extractor TEXT NOT NULL,"
+                " video_id TEXT NOT NULL,"
+                " profile TEXT NOT NULL,"
+                " destination TEXT NOT NULL,"
+                " title TEXT,"
+                " added_at REAL NOT NULL,"
+                " PRIMARY KEY (extractor, video_id, profile, destination))"
+                " WITHOUT ROWID"
+            )
+
+    def contains(self, extractor: str, video_id: str,
+                 profile: str, destination: str) -> bool:
+        """
+        Indica si el contenido ya se descargó con ese perfil en ese destino
+
+        Las entradas importadas de yt-dlp valen para cualquier perfil y destino.
+
+        Args:
+            extractor: Nombre del extractor de yt-dlp
+            video_id: Id del contenido
+            profile: Perfil de formato (ver YouTubeDownloader.get_format_profile)
+            destination: Carpeta local o "usuario@host:carpeta"
+
+        Returns:
+            bool: True si ya está en el índice
+        """
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT 1 FROM archive WHERE extractor = ? AND video_id = ?"
+                    " AND profile IN (?, ?) AND destination IN (?, ?) LIMIT 1",
+                    (extractor.lower(), str(video_id), profile, ANY, destination, ANY)
+                ).fetchone()
+                return row is not None
+        except sqlite3.Error as e:
+            logger.error("Download archive lookup failed: %s", e)
+            return False
+
+    def add(self, extractor: str, video_id: str, profile: str,
+            destination: str, title: Optional[str] = None) -> bool:
+        """
+        Registra una descarga completada
+
+        Returns:
+            True si se guardó correctamente
+        """
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO archive "
+                    "(extractor, video_id, profile, destination, title, added_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (extractor.lower(), str(video_id), profile, destination,
+                     title, time.time())
+                )
+            return True
+        except sqlite3.Error as e:
+            logger.error("Download archive write failed: %s", e)
+            return False
+
+    def remove(self, extractor: str, video_id: str,
+               profile: str = None, destination: str = None) -> int:
+        """
+        Elimina entradas de un contenido (todas, o solo las de un perfil/destino)
+
+        Returns:
+            int: Número de entradas eliminadas
+        """
+        query = "DELETE FROM archive WHERE extractor = ? AND video_id = ?"
+        params = [extractor.lower(), str(video_id)]
+        if profile is not None:
+            query += " AND profile = ?"
+            params.append(profile)
+        if destination is not None:
+            query += " AND destination = ?"
+            params.append(destination)
+        try:
+            with self._lock, self._connect() as conn:
+                return conn.execute(query, params).rowcount
+        except sqlite3.Error as e:
+            logger.error("Download archive delete failed: %s", e)
+            return 0
+
+    def count(self) -> int:
+        """Número de entradas del índice"""
+        try:
+            with self._lock, self._connect() as conn:
+                return conn.execute("SELECT COUNT(*) FROM archive").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error("Download archive count failed: %s", e)
+            return 0
+
+    def import_ytdlp_archive(self, archive_file: str) -> int:
+        """
+        Importa un archivo ``download_archive`` de yt-dlp ("extractor id" por línea)
+
+        Las entradas importadas valen para cualquier perfil y destino.
+
+        Args:
+            archive_file: Ruta al archivo de yt-dlp
+
+        Returns:
+            int: Número de líneas importadas
+        """
+        rows = []
+        now = time.time()
+        with open(archive_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.strip().split(' ', 1)
+                if len(parts) == 2 and parts[0] and parts[1]:
+                    rows.append((parts[0].lower(), parts[1], ANY, ANY, None, now))
+        try:
+            with self._lock, self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO archive "
+                    "(extractor, video_id, profile, destination, title, added_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+        except sqlite3.Error as e:
+            logger.error("Download archive import failed: %s", e)
+            return 0
+        return len(rows)
+
+    def export_ytdlp_archive(self, archive_file: str) -> int:
+        """
+        Exporta el índice en formato ``download_archive`` de yt-dlp
+
+        Args:
+            archive_file: Ruta del archivo a escribir
+
+        Returns:
+            int: Número de líneas escritas
+        """
+        try:
+            with self._lock, self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT DISTINCT extractor, video_id FROM archive"
+                    " ORDER BY extractor, video_id"
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Download archive export failed: %s", e)
+            return 0
+        with open(archive_file, 'w', encoding='utf-8') as f:
+            for extractor, video_id in rows:
+                f.write(f"{extractor} {video_id}\n")
+        return len(rows)
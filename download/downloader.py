@@ -4,24 +4,207 @@
 Lógica de descarga de vídeos de YouTube
 """
 
+import copy
 import logging
 import os
+import threading
+from urllib.parse import urlparse
 
-import yt_dlp
-
-from config import AUDIO_QUALITY, AUDIO_CODEC
+from config import AUDIO_QUALITY, AUDIO_PROFILE, VIDEO_QUALITIES
+from download.archive import DownloadArchive
+from download.formats import plan_audio, ytdlp_audio_format
+from download.fragment_tuner import FragmentTuner
+from download.media_id import extractor_key, resolve_media_id
+from utils.bandwidth import ThrottleHook, get_bandwidth_manager
+from download.metadata_cache import MetadataCache
+from download.postprocess import PostProcessTask
+from download.ydl_pool import get_ydl_pool
 
 logger = logging.getLogger(__name__)
 
 
 class YouTubeDownloader:
     """Clase para manejar las descargas de YouTube"""
+
+    # Número de extracciones completas (extract_info) realizadas
+    extraction_count = 0
+    _stats_lock = threading.Lock()
+    _metadata_cache = None
+    _archive = None
+    _fragment_tuner = None
+    # Fragmentos simultáneos fijos; None para ajustarlos automáticamente
+    fragment_concurrency = None
+    # Perfil de audio (AUDIO_PROFILES): qué códecs se guardan sin recodificar
+    audio_profile = AUDIO_PROFILE
+
+    SKIPPED_MESSAGE = "Omitido: ya descargado anteriormente"
+
+    @staticmethod
+    def get_metadata_cache():
+        """
+        Obtiene la caché de metadatos compartida (se crea en el primer uso)
+
+        Returns:
+            MetadataCache: Caché de info dicts
+        """
+        with YouTubeDownloader._stats_lock:
+            if YouTubeDownloader._metadata_cache is None:
+                YouTubeDownloader._metadata_cache = MetadataCache()
+            return YouTubeDownloader._metadata_cache
+
+    @staticmethod
+    def get_archive():
+        """
+        Obtiene el índice de descargas compartido (se crea en el primer uso)
+
+        Returns:
+            DownloadArchive: Índice de descargas realizadas
+        """
+        with YouTubeDownloader._stats_lock:
+            if YouTubeDownloader._archive is None:
+                YouTubeDownloader._archive = DownloadArchive()
+            return YouTubeDownloader._archive
+
+    @staticmethod
+    def get_fragment_tuner():
+        """
+        Obtiene el ajustador de fragmentos compartido (se crea en el primer uso)
+
+        Returns:
+            FragmentTuner: Ajustador de concurrencia de fragmentos
+        """
+        with YouTubeDownloader._stats_lock:
+            if YouTubeDownloader._fragment_tuner is None:
+                YouTubeDownloader._fragment_tuner = FragmentTuner()
+            return YouTubeDownloader._fragment_tuner
+
+    @staticmethod
+    def set_fragment_concurrency(level=None):
+        """
+        Fija el número de fragmentos simultáneos
+
+        Args:
+            level: Fragmentos simultáneos, o None/0 para el modo automático
+        """
+        YouTubeDownloader.fragment_concurrency = level or None
+
+    @staticmethod
+    def _fragment_key(url, info=None):
+        """Plataforma con la que se agrupan las mediciones de fragmentos"""
+        if info and info.get('extractor_key'):
+            return info['extractor_key']
+        return extractor_key(url) or urlparse(url).netloc or 'generic'
+
+    @staticmethod
+    def get_format_profile(is_audio, quality=None):
+        """
+        Obtiene el perfil de formato con el que se registra una descarga
+
+        Args:
+            is_audio: True si es solo audio, False si es vídeo
+            quality: Calidad del vídeo (solo si is_audio=False)
+
+        Returns:
+            str: Perfil (p. ej. "audio-mp3-192", "audio-passthrough-192" o "video-720p")
+        """
+        if is_audio:
+            return f"audio-{YouTubeDownloader.audio_profile}-{AUDIO_QUALITY}"
+        if not quality or quality not in VIDEO_QUALITIES[1:]:
+            return "video-best"
+        return f"video-{quality}"
+
+    @staticmethod
+    def _archive_id(url, info=None):
+        """(extractor, id) del contenido, desde el info dict o desde la URL"""
+        if info and info.get('extractor_key') and info.get('id'):
+            return info['extractor_key'], info['id']
+        return resolve_media_id(url)
+
+    @staticmethod
+    def is_archived(url, is_audio, quality, destination, info=None):
+        """
+        Indica si el contenido ya se descargó con el mismo perfil en el mismo destino
+
+        No accede a la red: el id se obtiene de la URL (o del info dict si se pasa).
+
+        Args:
+            url: URL del contenido
+            is_audio: True si es solo audio, False si es vídeo
+            quality: Calidad del vídeo (solo si is_audio=False)
+            destination: Carpeta local o "usuario@host:carpeta"
+            info: Información ya extraída del vídeo (opcional)
+
+        Returns:
+            bool: True si ya está en el índice
+        """
+        archive_id = YouTubeDownloader._archive_id(url, info)
+        if archive_id is None:
+            return False
+        return YouTubeDownloader.get_archive().contains(
+            archive_id[0], archive_id[1],
+            YouTubeDownloader.get_format_profile(is_audio, quality), destination
+        )
+
+    @staticmethod
+    def record_download(url, is_audio, quality, destination, info=None):
+        """
+        Registra en el índice una descarga completada
+
+        Returns:
+            bool: True si se pudo registrar
+        """
+        archive_id = YouTubeDownloader._archive_id(url, info)
+        if archive_id is None:
+            return False
+        return YouTubeDownloader.get_archive().add(
+            archive_id[0], archive_id[1],
+            YouTubeDownloader.get_format_profile(is_audio, quality), destination,
+            title=info.get('title') if info else None
+        )
+
+    @staticmethod
+    def get_cache_stats():
+        """
+        Obtiene las estadísticas de la caché de metadatos
+
+        Returns:
+            dict: hits, misses, hit_rate, entries y size_bytes
+        """
+        return YouTubeDownloader.get_metadata_cache().stats()
+
+    @staticmethod
+    def _count_extraction():
+        """Registra una extracción completa de metadatos"""
+        with YouTubeDownloader._stats_lock:
+            YouTubeDownloader.extraction_count += 1
+
+    @staticmethod
+    def get_extraction_count():
+        """
+        Obtiene el número de extracciones realizadas desde el último reinicio
+
+        Returns:
+            int: Número de llamadas a extract_info
+        """
+        with YouTubeDownloader._stats_lock:
+            return YouTubeDownloader.extraction_count
+
+    @staticmethod
+    def reset_extraction_count():
+        """Pone a cero el contador de extracciones"""
+        with YouTubeDownloader._stats_lock:
+            YouTubeDownloader.extraction_count = 0
     
     @staticmethod
     def get_audio_options(output_path):
         """
         Obtiene las opciones de configuración para descargar solo audio
         
+        El posprocesador de audio sigue el perfil de audio activo (ver
+        ytdlp_audio_format). El pipeline no lo usa: fetch() lo quita y decide
+        con plan_audio() según el códec; queda para quien ejecute yt-dlp con
+        estas opciones tal cual.
+        
         Args:
             output_path: Ruta completa del archivo o carpeta donde guardar
             
@@ -39,7 +222,7 @@ class YouTubeDownloader:
             'outtmpl': output_template,
             'postprocessors': [{
                 'key': 'FFmpegExtractAudio',
-                'preferredcodec': AUDIO_CODEC,
+                'preferredcodec': ytdlp_audio_format(YouTubeDownloader.audio_profile),
                 'preferredquality': AUDIO_QUALITY,
             }],
             'quiet': False,
@@ -114,56 +297,169 @@ class YouTubeDownloader:
             return YouTubeDownloader.get_video_options(output_folder, quality)
     
     @staticmethod
-    def get_video_info(url):
+    def get_video_info(url, use_cache=True):
         """
         Obtiene información del vídeo sin descargarlo
         
+        Consulta primero la caché de metadatos y guarda en ella el resultado.
+        
         Args:
             url: URL del vídeo de YouTube
+            use_cache: False para forzar una extracción nueva
             
         Returns:
             dict: Información del vídeo
         """
+        cache = YouTubeDownloader.get_metadata_cache()
+        if use_cache:
+            info = cache.get(url)
+            if info is not None:
+                return info
+
         ydl_opts = {
             'quiet': True,
             'no_warnings': True,
         }
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            return ydl.extract_info(url, download=False)
+        with get_ydl_pool().checkout(ydl_opts) as ydl:
+            YouTubeDownloader._count_extraction()
+            info = ydl.extract_info(url, download=False)
+
+        cache.put(url, info)
+        return info
     
     @staticmethod
-    def download(url, output_folder, is_audio, quality, progress_hook):
+    def _session_options(url, output_folder, is_audio, quality, progress_hook, info):
         """
-        Descarga el vídeo o audio de YouTube
-        
+        Opciones de yt-dlp de una descarga, con el progreso, el limitador de
+        ancho de banda y la sesión de fragmentos ya aplicados
+
+        Returns:
+            tuple: (opciones de yt-dlp, FragmentSession que hay que cerrar)
+        """
+        ydl_opts = YouTubeDownloader.get_download_options(
+            output_folder, is_audio, quality
+        )
+        # La bajada descuenta del limitador compartido, por trabajo
+        flow = getattr(progress_hook, 'job_id', 0) or id(progress_hook)
+        ydl_opts['progress_hooks'] = [
+            progress_hook.hook, ThrottleHook(get_bandwidth_manager(), flow)
+        ]
+        fragments = YouTubeDownloader.get_fragment_tuner().session(
+            YouTubeDownloader._fragment_key(url, info),
+            fixed=YouTubeDownloader.fragment_concurrency
+        )
+        fragments.apply(ydl_opts)
+        return ydl_opts, fragments
+
+    @staticmethod
+    def downloaded_paths(info):
+        """
+        Rutas de los archivos que yt-dlp ha escrito para un contenido
+
+        Se toman de ``requested_downloads`` (los posprocesadores actualizan
+        cada ruta con la del archivo final), así que no hay que buscar en la
+        carpeta ni esperar a que aparezca el archivo, y los trabajos que
+        comparten carpeta no se confunden entre sí.
+
         Args:
-            url: URL del vídeo de YouTube
-            output_folder: Carpeta donde guardar el archivo
+            info: Info dict devuelto por extract_info/process_ie_result con
+                download=True (si es una lista, se recorren sus entradas)
+
+        Returns:
+            list: Rutas en el orden en que se descargaron
+        """
+        if not info:
+            return []
+        paths = [d['filepath'] for d in info.get('requested_downloads') or () if d.get('filepath')]
+        for entry in info.get('entries') or ():
+            paths += YouTubeDownloader.downloaded_paths(entry)
+        return paths
+
+    @staticmethod
+    def fetch(url, output_path, is_audio, quality, progress_hook, info=None):
+        """
+        Descarga el contenido sin posprocesarlo con FFmpeg
+
+        La extracción del audio y la unión de las pistas de vídeo y audio
+        quedan en la tarea devuelta, para ejecutarlas en el pool de
+        posprocesado mientras el hilo de descarga pasa al siguiente trabajo.
+        No consulta ni registra el índice de descargas.
+
+        Args:
+            url: URL del vídeo
+            output_path: Carpeta o ruta de archivo de destino
             is_audio: True si es solo audio, False si es vídeo
             quality: Calidad del vídeo (solo si is_audio=False)
             progress_hook: Hook para reportar el progreso
-            
+            info: Información ya extraída del vídeo (opcional)
+
         Returns:
-            tuple: (éxito: bool, mensaje: str, título: str)
+            PostProcessTask: Archivos descargados, archivo final y la
+            información del contenido
+
+        Raises:
+            Exception: Si falla la descarga
         """
+        cache = YouTubeDownloader.get_metadata_cache()
+        if info is None:
+            info = cache.get(url)
+
+        fragments = None
         try:
-            ydl_opts = YouTubeDownloader.get_download_options(
-                output_folder, is_audio, quality
+            ydl_opts, fragments = YouTubeDownloader._session_options(
+                url, output_path, is_audio, quality, progress_hook, info
             )
-            ydl_opts['progress_hooks'] = [progress_hook.hook]
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # Obtener información del vídeo
-                info = ydl.extract_info(url, download=False)
-                video_title = info.get('title', 'Video')
-                
-                # Descargar
-                ydl.download([url])
-                
-                return True, "Descarga completada", video_title
-        
+            ydl_opts.pop('postprocessors', None)
+
+            pool = get_ydl_pool()
+            with pool.checkout(ydl_opts) as ydl:
+                fragments.attach(ydl)
+                if info is None:
+                    YouTubeDownloader._count_extraction()
+                    info = ydl.extract_info(url, download=False)
+                    cache.put(url, info)
+                selected = ydl.process_ie_result(copy.deepcopy(info), download=False)
+                target = ydl.prepare_filename(selected)
+                parts = selected.get('requested_formats')
+
+                if not parts:
+                    # Un solo formato: yt-dlp lo descarga tal cual
+                    result = ydl.process_ie_result(copy.deepcopy(info), download=True)
+                    sources = YouTubeDownloader.downloaded_paths(result)
+                else:
+                    # Cada pista por separado; FFmpeg las une después en el pool
+                    result = selected
+                    sources = []
+                    base = os.path.splitext(target)[0].replace('%', '%%')
+                    for fmt in parts:
+                        pool.retarget(
+                            ydl, outtmpl=f"{base}.f{fmt['format_id']}.%(ext)s",
+                            format_spec=fmt['format_id']
+                        )
+                        part = ydl.process_ie_result(copy.deepcopy(info), download=True)
+                        sources += YouTubeDownloader.downloaded_paths(part)
+            fragments.close()
         except Exception as e:
-            logger.exception("Download failed for URL: %s", url)
-            error_msg = str(e)
-            return False, error_msg, None
+            logger.warning("Download failed for URL %s: %s", url, e)
+            if fragments is not None:
+                fragments.close()
+            # Las URLs de formato guardadas pueden haber caducado
+            cache.invalidate(url)
+            raise
+
+        if not sources:
+            raise Exception("yt-dlp no devolvio ningun archivo descargado")
+
+        if parts:
+            return PostProcessTask(PostProcessTask.MERGE, sources, target, result)
+        if is_audio:
+            # Copiar, cambiar de contenedor o convertir según el stream elegido
+            audio = plan_audio(result, YouTubeDownloader.audio_profile)
+            logger.debug("Audio plan for %s: %r", url, audio)
+            if audio.needs_ffmpeg:
+                target = f"{os.path.splitext(sources[0])[0]}.{audio.ext}"
+                return PostProcessTask(
+                    PostProcessTask.EXTRACT_AUDIO, sources, target, result, audio=audio
+                )
+        return PostProcessTask(None, sources, sources[0], result)
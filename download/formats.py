@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perfiles de formato de audio: se conserva el códec del stream elegido cuando
+el perfil lo acepta (copia o cambio de contenedor) y solo se recodifica si hace falta
+"""
+
+from config import AUDIO_CODEC, AUDIO_QUALITY, AUDIO_PROFILES
+
+# Contenedor de salida de cada códec de audio
+AUDIO_CONTAINERS = {
+    'mp3': 'mp3',
+    'aac': 'm4a',
+    'opus': 'opus',
+    'vorbis': 'ogg',
+    'flac': 'flac',
+}
+
+# Codificador de FFmpeg de cada códec
+AUDIO_ENCODERS = {
+    'mp3': 'libmp3lame',
+    'aac': 'aac',
+    'opus': 'libopus',
+    'vorbis': 'libvorbis',
+    'flac': 'flac',
+}
+
+# Destino de FFmpegExtractAudio de yt-dlp para cada códec (el AAC va en m4a)
+YTDLP_AUDIO_TARGETS = {
+    'aac': 'm4a',
+}
+
+# Formato de FFmpeg (-f) de los contenedores que se pueden escribir en una tubería
+PIPE_MUXERS = {
+    'mp3': 'mp3',
+    'opus': 'opus',
+    'ogg': 'ogg',
+    'flac': 'flac',
+}
+
+
+def normalize_codec(acodec) -> str:
+    """
+    Nombre corto del códec de audio de yt-dlp ('mp4a.40.2' -> 'aac')
+
+    Returns:
+        str: Códec o None si no hay audio o no se conoce
+    """
+    if not acodec or acodec == 'none':
+        return None
+    acodec = acodec.lower()
+    if acodec.startswith('mp4a') or acodec == 'aac':
+        return 'aac'
+    if acodec in ('mp3', 'mp4a.40.34', 'mp4a.6b'):
+        return 'mp3'
+    for codec in ('opus', 'vorbis', 'flac'):
+        if acodec.startswith(codec):
+            return codec
+    return None
+
+
+class AudioPlan:
+    """Qué hacer con el audio descargado para cumplir el perfil"""
+
+    COPY = "copy"            # el archivo ya vale tal cual
+    REMUX = "remux"          # mismo códec, otro contenedor (sin recodificar)
+    TRANSCODE = "transcode"  # recodificar a AUDIO_CODEC
+
+    def __init__(self, mode: str, codec: str, ext: str):
+        self.mode = mode
+        self.codec = codec
+        self.ext = ext
+
+    @property
+    def needs_ffmpeg(self) -> bool:
+        return self.mode != self.COPY
+
+    def ffmpeg_args(self) -> list:
+        """Argumentos de salida de FFmpeg para el audio"""
+        if self.mode == self.TRANSCODE:
+            encoder = AUDIO_ENCODERS.get(self.codec, self.codec)
+            return ['-vn', '-c:a', encoder, '-b:a', f'{AUDIO_QUALITY}k']
+        return ['-vn', '-c:a', 'copy']
+
+    def __repr__(self):
+        return f"AudioPlan({self.mode}, {self.codec}, .{self.ext})"
+
+
+def plan_audio(fmt: dict, profile: str) -> AudioPlan:
+    """
+    Elige el destino del audio a partir del formato que yt-dlp ha seleccionado
+
+    Args:
+        fmt: Formato elegido (info dict devuelto por process_ie_result)
+        profile: Nombre del perfil en AUDIO_PROFILES
+
+    Returns:
+        AudioPlan: Copia si el códec y el contenedor ya valen, cambio de
+        contenedor si solo vale el códec, conversión a AUDIO_CODEC si no
+    """
+    codec = normalize_codec(fmt.get('acodec'))
+    if codec is not None and codec in AUDIO_PROFILES[profile]:
+        ext = AUDIO_CONTAINERS[codec]
+        audio_only = fmt.get('vcodec') in (None, 'none')
+        if audio_only and fmt.get('ext') == ext:
+            return AudioPlan(AudioPlan.COPY, codec, ext)
+        return AudioPlan(AudioPlan.REMUX, codec, ext)
+    return AudioPlan(AudioPlan.TRANSCODE, AUDIO_CODEC, AUDIO_CONTAINERS.get(AUDIO_CODEC, AUDIO_CODEC))
+
+
+def ytdlp_audio_format(profile: str) -> str:
+    """
+    Reglas de FFmpegExtractAudio de yt-dlp (``--audio-format``) equivalentes al perfil
+
+    yt-dlp decide por la extensión del archivo descargado y no por el códec,
+    así que es una aproximación a plan_audio(): cada contenedor de un códec
+    aceptado se conserva, webm se conserva si se aceptan sus dos códecs
+    (Opus y Vorbis) y el resto se convierte a AUDIO_CODEC.
+
+    Args:
+        profile: Nombre del perfil en AUDIO_PROFILES
+
+    Returns:
+        str: Reglas "origen>destino/.../destino" para 'preferredcodec'
+    """
+    codecs = AUDIO_PROFILES[profile]
+    rules = [f"{AUDIO_CONTAINERS[codec]}>{YTDLP_AUDIO_TARGETS.get(codec, codec)}"
+             for codec in codecs]
+    webm = [codec for codec in ('opus', 'vorbis') if codec in codecs]
+    if len(webm) == 2:
+        rules.append("webm>best")
+    elif webm:
+        rules.append(f"webm>{webm[0]}")
+    rules.append(YTDLP_AUDIO_TARGETS.get(AUDIO_CODEC, AUDIO_CODEC))
+    return "/".join(rules)
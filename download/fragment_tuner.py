@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ajuste adaptativo de la descarga concurrente de fragmentos (HLS/DASH)
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import (
+    FRAGMENT_CONCURRENCY_INITIAL, FRAGMENT_CONCURRENCY_MAX,
+    FRAGMENT_GAIN_THRESHOLD, FRAGMENT_MIN_SAMPLE, FRAGMENT_RETRIES, HTTP_CHUNK_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+# Errores con los que el servidor indica que vamos demasiado deprisa
+_THROTTLE_RE = re.compile(r'HTTP Error (429|403)')
+
+# Tras una limitación no se vuelve a superar el nivel reducido durante este tiempo
+THROTTLE_COOLDOWN = 3600  # segundos
+
+# Cada cuántas mediciones se vuelve a probar un nivel mayor tras converger
+REPROBE_EVERY = 10
+
+# Peso de la última medición en la media exponencial de cada nivel
+_EWMA_ALPHA = 0.5
+
+
+def _fragment_retry_sleep(n: int) -> float:
+    """Espera exponencial entre reintentos de un fragmento"""
+    return min(0.25 * 2 ** n, 8.0)
+
+
+class FragmentTuner:
+    """
+    Elige cuántos fragmentos se descargan a la vez para cada plataforma.
+
+    Parte de FRAGMENT_CONCURRENCY_INITIAL y, con cada descarga fragmentada,
+    mide el rendimiento (bytes/s) y la latencia por fragmento. Duplica el nivel
+    mientras el rendimiento mejora al menos FRAGMENT_GAIN_THRESHOLD respecto al
+    nivel anterior y se queda con el mejor nivel medido cuando la mejora se
+    aplana. Un HTTP 429/403 reduce el nivel a la mitad y fija un techo temporal.
+    El estado se guarda entre sesiones.
+    """
+
+    def __init__(self, state_file: Optional[str] = None,
+                 initial: int = FRAGMENT_CONCURRENCY_INITIAL,
+                 maximum: int = FRAGMENT_CONCURRENCY_MAX,
+                 gain_threshold: float = FRAGMENT_GAIN_THRESHOLD,
+                 min_sample: int = FRAGMENT_MIN_SAMPLE):
+        """
+        Inicializa el ajustador
+
+        Args:
+            state_file: Ruta al archivo de estado. Si es None, usa el predeterminado.
+            initial: Nivel con el que se prueba una plataforma nueva
+            maximum: Nivel máximo
+            gain_threshold: Mejora relativa mínima para seguir subiendo
+            min_sample: Fragmentos mínimos para dar una medición por buena
+        """
+        if state_file is None:
+            config_dir = Path.home() / ".youtube_downloader"
+            config_dir.mkdir(exist_ok=True)
+            self.state_file = config_dir / "fragment_tuning.json"
+        else:
+            self.state_file = Path(state_file)
+
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        self.initial = max(1, min(initial, maximum))
+        self.maximum = maximum
+        self.gain_threshold = gain_threshold
+        self.min_sample = min_sample
+        self._lock = threading.Lock()
+        self._hosts = self._load()
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+
+    def _load(self) -> Dict[str, dict]:
+        """Carga el estado guardado"""
+        if not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error("Failed to load fragment tuning state: %s", e)
+            return {}
+
+    def _save(self):
+        """Guarda el estado (llamar con el lock adquirido)"""
+        try:
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(self._hosts, f, indent=2)
+        except OSError as e:
+            logger.error("Failed to save fragment tuning state: %s", e)
+
+    def _state(self, key: str) -> dict:
+        """Estado de una plataforma (se crea si no existe)"""
+        state = self._hosts.get(key)
+        if state is None:
+            state = self._hosts[key] = {
+                'level': self.initial,
+                'samples': {},        # nivel -> bytes/s
+                'latency': {},        # nivel -> segundos por fragmento
+                'ceiling': None,
+                'ceiling_until': 0,
+                'converged': False,
+                'recorded': 0,
+            }
+        return state
+
+    def _ceiling(self, state: dict) -> int:
+        """Nivel máximo permitido ahora mismo para una plataforma"""
+        if state['ceiling'] and state['ceiling_until'] > time.time():
+            return min(state['ceiling'], self.maximum)
+        return self.maximum
+
+    def concurrency_for(self, key: str) -> int:
+        """
+        Nivel de concurrencia con el que descargar de una plataforma
+
+        Args:
+            key: Plataforma (extractor de yt-dlp o host)
+
+        Returns:
+            int: Fragmentos simultáneos
+        """
+        with self._lock:
+            state = self._state(key)
+            return max(1, min(state['level'], self._ceiling(state)))
+
+    def record(self, key: str, level: int, throughput: Optional[float] = None,
+               latency: Optional[float] = None, throttled: bool = False) -> int:
+        """
+        Registra una medición y calcula el siguiente nivel
+
+        Args:
+            key: Plataforma (extractor de yt-dlp o host)
+            level: Nivel con el que se midió
+            throughput: Bytes/s obtenidos (None si solo se informa de limitación)
+            latency: Segundos por fragmento medidos
+            throttled: True si el servidor respondió 429/403
+
+        Returns:
+            int: Nivel para la próxima descarga
+        """
+        with self._lock:
+            state = self._state(key)
+            samples = state['samples']
+
+            if throttled:
+                backoff = max(1, level // 2)
+                logger.info("Fragment downloads throttled on %s at %d, backing off to %d",
+                            key, level, backoff)
+                state['level'] = backoff
+                state['ceiling'] = backoff
+                state['ceiling_until'] = time.time() + THROTTLE_COOLDOWN
+                state['converged'] = False
+                for stale in [lvl for lvl in samples if int(lvl) > backoff]:
+                    samples.pop(stale)
+                    state['latency'].pop(stale, None)
+            elif throughput:
+                slot = str(level)
+                previous = samples.get(slot)
+                samples[slot] = (throughput if previous is None
+                                 else _EWMA_ALPHA * throughput + (1 - _EWMA_ALPHA) * previous)
+                if latency is not None:
+                    state['latency'][slot] = latency
+                state['recorded'] += 1
+                state['level'] = self._next_level(state, level)
+
+            self._save()
+            return max(1, min(state['level'], self._ceiling(state)))
+
+    def _next_level(self, state: dict, level: int) -> int:
+        """Decide el siguiente nivel a partir de las mediciones por nivel"""
+        samples = {int(lvl): value for lvl, value in state['samples'].items()}
+        best = min(samples, key=lambda lvl: (-samples[lvl], lvl))
+
+        if state['converged']:
+            if state['recorded'] % REPROBE_EVERY:
+                return best
+            # Volver a probar por encima por si la red ha mejorado
+            state['converged'] = False
+
+        lower = [lvl for lvl in samples if lvl < level]
+        if lower:
+            previous = max(lower)
+            if samples[level] < samples[previous] * (1 + self.gain_threshold):
+                # La ganancia se ha aplanado: quedarse con el mejor nivel medido
+                state['converged'] = True
+                return best
+
+        candidate = min(level * 2, self._ceiling(state))
+        if candidate <= level:
+            state['converged'] = True
+            return best
+        return candidate
+
+    def session(self, key: str, fixed: Optional[int] = None) -> 'FragmentSession':
+        """
+        Crea una sesión de medición para una descarga
+
+        Args:
+            key: Plataforma (extractor de yt-dlp o host)
+            fixed: Nivel fijo (sin ajuste); None para modo automático
+
+        Returns:
+            FragmentSession: Sesión a aplicar sobre las opciones de yt-dlp
+        """
+        level = fixed if fixed else self.concurrency_for(key)
+        return FragmentSession(self, key, level, adaptive=not fixed)
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Estado de cada plataforma
+
+        Returns:
+            dict: plataforma -> {'level', 'converged', 'throughput', 'latency'}
+        """
+        with self._lock:
+            return {
+                key: {
+                    'level': state['level'],
+                    'converged': state['converged'],
+                    'throughput': dict(state['samples']),
+                    'latency': dict(state['latency']),
+                }
+                for key, state in self._hosts.items()
+            }
+
+
+class FragmentSession:
+    """
+    Mediciones de una descarga: hook de progreso y logger para yt-dlp.
+
+    Cada formato fragmentado (vídeo y audio se descargan por separado) es una
+    medición; el nivel calculado se aplica a los formatos que queden de la
+    misma descarga actualizando los parámetros del YoutubeDL.
+    """
+
+    def __init__(self, tuner: FragmentTuner, key: str, level: int, adaptive: bool = True):
+        self.tuner = tuner
+        self.key = key
+        self.level = level
+        self.adaptive = adaptive
+        self.throttled = False
+        self._streams = {}  # archivo -> [t0, bytes0, frag0, t, bytes, frag]
+        self._ydl = None
+        self._lock = threading.Lock()
+
+    def apply(self, ydl_opts: dict) -> dict:
+        """
+        Añade a las opciones de yt-dlp la concurrencia, el hook y el logger
+
+        Args:
+            ydl_opts: Opciones de yt-dlp (se modifican)
+
+        Returns:
+            dict: Las mismas opciones
+        """
+        ydl_opts['concurrent_fragment_downloads'] = self.level
+        ydl_opts['http_chunk_size'] = HTTP_CHUNK_SIZE
+        # Sin reintentos un 429 hace que yt-dlp se salte el fragmento en silencio
+        ydl_opts['fragment_retries'] = FRAGMENT_RETRIES
+        ydl_opts['retry_sleep_functions'] = {'fragment': _fragment_retry_sleep}
+        ydl_opts.setdefault('progress_hooks', []).append(self.hook)
+        ydl_opts['logger'] = YtDlpLogger(self)
+        ydl_opts['noprogress'] = True
+        return ydl_opts
+
+    def attach(self, ydl):
+        """Asocia el YoutubeDL para ajustar los formatos restantes de la descarga"""
+        self._ydl = ydl
+
+    def hook(self, d: dict):
+        """Hook de progreso de yt-dlp: mide los formatos fragmentados"""
+        filename = d.get('filename') or d.get('tmpfilename')
+        now = time.monotonic()
+        downloaded = d.get('downloaded_bytes') or 0
+        fragment = d.get('fragment_index') or 0
+
+        with self._lock:
+            if d['status'] == 'downloading':
+                if d.get('fragment_count') is None and d.get('fragment_index') is None:
+                    return
+                stream = self._streams.get(filename)
+                if stream is None:
+                    self._streams[filename] = [now, downloaded, fragment, now, downloaded, fragment]
+                else:
+                    stream[3:] = [now, downloaded, fragment]
+                return
+            stream = self._streams.pop(filename, None)
+
+        if d['status'] == 'finished' and stream is not None:
+            self._commit(stream)
+
+    def notice(self, message: str):
+        """Revisa un mensaje de yt-dlp en busca de respuestas de limitación"""
+        if _THROTTLE_RE.search(message):
+            self.throttled = True
+
+    def _commit(self, stream):
+        """Envía al ajustador la medición de un formato terminado"""
+        t0, bytes0, frag0, t1, bytes1, frag1 = stream
+        fragments = frag1 - frag0
+        elapsed = t1 - t0
+        if not self.adaptive:
+            return
+        if self.throttled:
+            self._set_level(self.tuner.record(self.key, self.level, throttled=True))
+            self.throttled = False
+        elif fragments >= self.tuner.min_sample and elapsed > 0:
+            throughput = (bytes1 - bytes0) / elapsed
+            latency = elapsed * self.level / fragments
+            logger.debug("Fragment sample on %s: %d workers, %.0f B/s, %.3f s/fragment",
+                         self.key, self.level, throughput, latency)
+            self._set_level(self.tuner.record(
+                self.key, self.level, throughput, latency
+            ))
+
+    def _set_level(self, level: int):
+        """Aplica un nuevo nivel a los formatos que queden"""
+        self.level = level
+        if self._ydl is not None:
+            self._ydl.params['concurrent_fragment_downloads'] = level
+
+    def close(self):
+        """Cierra la sesión; informa de una limitación aún no registrada"""
+        if self.adaptive and self.throttled:
+            self.tuner.record(self.key, self.level, throttled=True)
+            self.throttled = False
+
+
+class YtDlpLogger:
+    """Logger para yt-dlp: reenvía al logging de la aplicación y detecta 429/403"""
+
+    _log = logging.getLogger('yt_dlp')
+
+    def __init__(self, session: FragmentSession):
+        self._session = session
+
+    def debug(self, msg):
+        self._session.notice(msg)
+        self._log.debug(msg)
+
+    def info(self, msg):
+        self._log.info(msg)
+
+    def warning(self, msg):
+        self._session.notice(msg)
+        self._log.warning(msg)
+
+    def error(self, msg):
+        self._session.notice(msg)
+        self._log.error(msg)
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diario de trabajos (write-ahead log) para reanudar descargas tras un cierre inesperado
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import JOURNAL_COMPACT_BYTES, JOURNAL_COMPACT_FINISHED
+
+logger = logging.getLogger(__name__)
+
+# Fases registradas en el diario
+PHASE_DOWNLOAD = "download"
+PHASE_UPLOAD = "upload"
+PHASE_TRANSCRIBE = "transcribe"
+
+# Opciones del trabajo que se guardan para poder recrearlo
+_JOB_OPTIONS = (
+    'output_folder', 'is_audio', 'quality', 'use_ssh', 'transcribe',
+    'whisper_model', 'max_retries', 'use_archive', 'weight', 'stream_upload',
+)
+
+
+class JobJournal:
+    """
+    Diario append-only en JSON Lines de los trabajos de descarga.
+
+    Cada cambio (alta, fase, archivos parciales, fin) se escribe y sincroniza
+    a disco antes de continuar, de modo que tras un cierre inesperado se puede
+    saber qué trabajos quedaron a medias y qué archivos temporales les pertenecen.
+    Las contraseñas SSH nunca se escriben en el diario. Para que un proceso de
+    larga duración no lo haga crecer sin límite, se compacta solo tras
+    ``compact_finished`` trabajos terminados o al pasar de ``compact_bytes``.
+    """
+
+    def __init__(self, journal_file: Optional[str] = None,
+                 compact_finished: int = JOURNAL_COMPACT_FINISHED,
+                 compact_bytes: int = JOURNAL_COMPACT_BYTES):
+        """
+        Inicializa el diario
+
+        Args:
+            journal_file: Ruta al archivo del diario. Si es None, usa el predeterminado.
+            compact_finished: Trabajos terminados tras los que se compacta (0 = nunca)
+            compact_bytes: Tamaño a partir del que se compacta (0 = sin límite)
+        """
+        if journal_file is None:
+            config_dir = Path.home() / ".youtube_downloader"
+            config_dir.mkdir(exist_ok=True)
+            self.journal_file = config_dir / "job_journal.jsonl"
+        else:
+            self.journal_file = Path(journal_file)
+
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.compact_finished = compact_finished
+        self.compact_bytes = compact_bytes
+        self._finished = 0        # registros 'finish' desde la última compactación
+        self._compacted_size = 0  # tamaño tras la última compactación
+        self._tail_checked = False
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def _append(self, record: dict):
+        """Añade un registro al diario y lo sincroniza a disco"""
+        record['ts'] = time.time()
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        try:
+            with self._lock:
+                if not self._tail_checked:
+                    self._tail_checked = True
+                    # A crash may have cut the last line short; appending to it would lose this record too
+                    if self._ends_mid_line():
+                        line = "\n" + line
+                with open(self.journal_file, 'a', encoding='utf-8') as f:
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    size = f.tell()
+                if record['op'] == 'finish':
+                    self._finished += 1
+                due = self._compaction_due(size)
+        except OSError as e:
+            logger.error("Failed to write job journal: %s", e)
+            return
+        if due:
+            self.compact()
+
+    def _ends_mid_line(self) -> bool:
+        """Indica si el diario no acaba en salto de línea (última línea truncada)"""
+        try:
+            with open(self.journal_file, 'rb') as f:
+                if f.seek(0, os.SEEK_END) == 0:
+                    return False
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b"\n"
+        except FileNotFoundError:
+            return False
+
+    def _compaction_due(self, size: int) -> bool:
+        """Indica si toca compactar (con el lock tomado)"""
+        if self.compact_finished and self._finished >= self.compact_finished:
+            return True
+        # Many unfinished jobs can keep the compacted file big: wait for it to double
+        return bool(self.compact_bytes) and size > max(self.compact_bytes, 2 * self._compacted_size)
+
+    def record_submit(self, job):
+        """
+        Registra el alta de un trabajo
+
+        Args:
+            job: DownloadJob recién encolado
+        """
+        options = {name: getattr(job, name) for name in _JOB_OPTIONS}
+        if job.ssh_config:
+            options['ssh_config'] = {
+                k: v for k, v in job.ssh_config.items() if k != 'password'
+            }
+        self._append({
+            'op': 'submit',
+            'key': job.journal_key,
+            'url': job.url,
+            'title': job.title,
+            'options': options,
+        })
+
+    def record_phase(self, job, phase: str, **paths):
+        """
+        Registra que un trabajo entra en una fase y los archivos que reclama
+
+        Args:
+            job: DownloadJob en curso
+            phase: Fase (PHASE_DOWNLOAD, PHASE_UPLOAD, PHASE_TRANSCRIBE)
+            **paths: Rutas asociadas (temp_dir, local_file, remote_path...)
+        """
+        self._append({
+            'op': 'phase',
+            'key': job.journal_key,
+            'phase': phase,
+            'title': job.title,
+            'paths': paths,
+        })
+
+    def record_finish(self, job):
+        """
+        Registra el fin de un trabajo (completado, fallido, cancelado u omitido)
+
+        Args:
+            job: DownloadJob terminado
+        """
+        self._append({'op': 'finish', 'key': job.journal_key, 'state': job.state})
+
+    def on_job_update(self, job):
+        """Listener para JobQueue: registra altas y finales de trabajos"""
+        if job.is_finished:
+            self.record_finish(job)
+        elif job.attempts == 0 and not job.journaled:
+            job.journaled = True
+            self.record_submit(job)
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def _replay(self) -> Dict[str, dict]:
+        """
+        Reconstruye el estado de cada trabajo leyendo el diario completo
+
+        Se compacta periódicamente (ver compact()), así que la lectura no
+        crece con el número de trabajos ya terminados.
+        """
+        entries = {}
+        if not self.journal_file.exists():
+            return entries
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Última línea truncada por un cierre inesperado
+                        logger.warning("Ignoring corrupt job journal line")
+                        continue
+                    key = record.get('key')
+                    op = record.get('op')
+                    if op == 'submit':
+                        entries[key] = {
+                            'key': key,
+                            'url': record['url'],
+                            'title': record.get('title'),
+                            'options': record.get('options', {}),
+                            'phase': None,
+                            'paths': {},
+                        }
+                    elif key in entries and op == 'phase':
+                        entry = entries[key]
+                        entry['phase'] = record.get('phase')
+                        entry['title'] = record.get('title') or entry['title']
+                        entry['paths'].update(record.get('paths', {}))
+                    elif op == 'finish':
+                        entries.pop(key, None)
+        except OSError as e:
+            logger.error("Failed to read job journal: %s", e)
+        return entries
+
+    def unfinished(self) -> List[dict]:
+        """
+        Trabajos sin terminar según el diario
+
+        Returns:
+            list: Entradas con 'key', 'url', 'title', 'options', 'phase', 'paths'
+        """
+        return list(self._replay().values())
+
+    def claimed_paths(self) -> set:
+        """
+        Rutas locales (archivos y carpetas temporales) que reclaman los trabajos sin terminar
+
+        Returns:
+            set: Rutas absolutas
+        """
+        claimed = set()
+        for entry in self._replay().values():
+            for path in entry['paths'].values():
+                if isinstance(path, str) and os.path.isabs(path):
+                    claimed.add(os.path.normpath(path))
+        return claimed
+
+    def discard(self, key: str):
+        """Marca como abandonado un trabajo sin terminar"""
+        self._append({'op': 'finish', 'key': key, 'state': 'abandoned'})
+
+    def compact(self):
+        """Reescribe el diario dejando solo los trabajos sin terminar"""
+        tmp_file = self.journal_file.with_suffix('.tmp')
+        try:
+            # Replay under the lock too, or records appended meanwhile would be lost
+            with self._lock:
+                entries = self._replay()
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    for entry in entries.values():
+                        f.write(json.dumps({
+                            'op': 'submit', 'key': entry['key'], 'url': entry['url'],
+                            'title': entry['title'], 'options': entry['options'],
+                            'ts': time.time(),
+                        }, ensure_ascii=False) + "\n")
+                        if entry['phase']:
+                            f.write(json.dumps({
+                                'op': 'phase', 'key': entry['key'],
+                                'phase': entry['phase'], 'title': entry['title'],
+                                'paths': entry['paths'], 'ts': time.time(),
+                            }, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                    size = f.tell()
+                os.replace(tmp_file, self.journal_file)
+                self._finished = 0
+                self._compacted_size = size
+        except OSError as e:
+            logger.error("Failed to compact job journal: %s", e)
+
+    @staticmethod
+    def restore_job(entry: dict, ssh_password: Optional[str] = None):
+        """
+        Recrea un DownloadJob a partir de una entrada sin terminar
+
+        Args:
+            entry: Entrada devuelta por unfinished()
+            ssh_password: Contraseña SSH (no se guarda en el diario)
+
+        Returns:
+            DownloadJob: Trabajo listo para encolar, marcado para reanudar
+        """
+        from download.job_queue import DownloadJob
+
+        options = dict(entry['options'])
+        ssh_config = options.pop('ssh_config', None)
+        if ssh_config is not None:
+            ssh_config = dict(ssh_config, password=ssh_password)
+
+        job = DownloadJob(entry['url'], ssh_config=ssh_config, **options)
+        job.journal_key = entry['key']
+        job.journaled = True
+        job.title = entry.get('title')
+        job.resume_phase = entry.get('phase')
+        job.resume_paths = dict(entry.get('paths', {}))
+        return job
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cola de trabajos de descarga con varios hilos de trabajo concurrentes
+"""
+
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from config import MAX_CONCURRENT_DOWNLOADS, JOB_WEIGHT_NORMAL, STREAM_UPLOADS
+
+logger = logging.getLogger(__name__)
+
+
+class JobState:
+    """Estados posibles de un trabajo de descarga"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    SKIPPED = "skipped"
+
+    FINISHED = (COMPLETED, FAILED, CANCELLED, SKIPPED)
+
+
+class DownloadJob:
+    """Trabajo de descarga: URL, opciones y estado, con su propio evento de cancelación"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, url, output_folder, is_audio, quality=None,
+                 use_ssh=False, ssh_config=None,
+                 transcribe=False, whisper_model="base", max_retries=0,
+                 use_archive=True, weight=JOB_WEIGHT_NORMAL,
+                 stream_upload=STREAM_UPLOADS):
+        """
+        Crea un trabajo de descarga
+
+        Args:
+            url: URL del contenido
+            output_folder: Carpeta local o remota de destino
+            is_audio: True si es solo audio, False si es vídeo
+            quality: Calidad del vídeo (solo si is_audio=False)
+            use_ssh: True si el archivo debe subirse por SSH
+            ssh_config: Configuración SSH (incluye 'remote_folder')
+            transcribe: True para generar transcripción
+            whisper_model: Modelo de Whisper a usar
+            max_retries: Reintentos automáticos si el trabajo falla
+            use_archive: True para omitir contenidos ya descargados
+            weight: Peso del trabajo en el reparto del ancho de banda
+            stream_upload: True para subir por SSH según se descarga, sin
+                temporal local, cuando el formato lo permite
+        """
+        self.job_id = next(DownloadJob._ids)
+        self.url = url
+        self.output_folder = output_folder
+        self.is_audio = is_audio
+        self.quality = quality
+        self.use_ssh = use_ssh
+        self.ssh_config = ssh_config
+        self.transcribe = transcribe
+        self.whisper_model = whisper_model
+        self.max_retries = max_retries
+        self.use_archive = use_archive
+        self.weight = weight
+        self.stream_upload = stream_upload
+        self.attempts = 0
+
+        self.state = JobState.PENDING
+        self.progress = 0
+        self.message = ""
+        self.title = None
+        self.result_message = ""
+        self.cancel_event = threading.Event()
+        self.progress_hook = None
+        self.stage = None  # etapa del pipeline en la que está (download, upload...)
+        self.telemetry = None  # JobTelemetry del último intento
+
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+        # Diario de trabajos: clave estable entre reinicios y estado a reanudar
+        self.journal_key = uuid.uuid4().hex
+        self.journaled = False
+        self.resume_phase = None
+        self.resume_paths = {}
+
+    @property
+    def is_finished(self) -> bool:
+        """True si el trabajo ya terminó (completado, fallido, cancelado u omitido)"""
+        return self.state in JobState.FINISHED
+
+    @property
+    def is_cancelled(self) -> bool:
+        """True si se ha solicitado la cancelación del trabajo"""
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """Solicita la cancelación del trabajo"""
+        self.cancel_event.set()
+
+    def finish(self, state: str, message: str = ""):
+        """
+        Marca el trabajo como terminado
+
+        Args:
+            state: Estado final (JobState.COMPLETED, FAILED, CANCELLED o SKIPPED)
+            message: Mensaje de resultado
+        """
+        self.state = state
+        self.result_message = message
+        self.finished_at = time.time()
+        if state in (JobState.COMPLETED, JobState.SKIPPED):
+            self.progress = 100
+
+    def to_dict(self) -> dict:
+        """Representación serializable del trabajo (sin credenciales)"""
+        return {
+            'job_id': self.job_id,
+            'url': self.url,
+            'output_folder': self.output_folder,
+            'is_audio': self.is_audio,
+            'quality': self.quality,
+            'use_ssh': self.use_ssh,
+            'transcribe': self.transcribe,
+            'whisper_model': self.whisper_model,
+            'weight': self.weight,
+            'stream_upload': self.stream_upload,
+            'attempts': self.attempts,
+            'state': self.state,
+            'stage': self.stage,
+            'progress': self.progress,
+            'message': self.message,
+            'title': self.title,
+            'result_message': self.result_message,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'telemetry': self.telemetry.to_dict() if self.telemetry else None,
+        }
+
+
+class JobQueue:
+    """
+    Cola FIFO de trabajos que ejecuta hasta N trabajos a la vez.
+
+    Cada trabajo se ejecuta en su propio hilo llamando a ``runner(job)``.
+    El número de huecos puede cambiarse en caliente con set_max_workers().
+    """
+
+    def __init__(self, runner, max_workers: int = MAX_CONCURRENT_DOWNLOADS):
+        """
+        Inicializa la cola
+
+        Args:
+            runner: Función que ejecuta un trabajo; recibe el DownloadJob
+            max_workers: Número máximo de trabajos simultáneos
+        """
+        self._runner = runner
+        self._max_workers = max(1, int(max_workers))
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = deque()
+        self._jobs = OrderedDict()
+        self._running = 0
+        self._paused = False
+        self._listeners = []
+
+    # ------------------------------------------------------------------
+    # Configuración y consulta
+    # ------------------------------------------------------------------
+
+    @property
+    def max_workers(self) -> int:
+        """Número máximo de trabajos simultáneos"""
+        return self._max_workers
+
+    def set_max_workers(self, max_workers: int):
+        """
+        Cambia el número de huecos de ejecución.
+
+        Si aumenta, arranca trabajos pendientes de inmediato; si disminuye,
+        los trabajos en curso terminan normalmente.
+        """
+        with self._lock:
+            self._max_workers = max(1, int(max_workers))
+        self._dispatch()
+
+    def add_listener(self, callback):
+        """
+        Registra un callback que se llama en cada cambio de estado de un trabajo.
+
+        El callback recibe el DownloadJob y puede llamarse desde cualquier hilo.
+        """
+        self._listeners.append(callback)
+
+    def get_job(self, job_id: int):
+        """Retorna el trabajo con ese id o None"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> list:
+        """Retorna una copia de la lista de trabajos en orden de llegada"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active_count(self) -> int:
+        """Número de trabajos en ejecución"""
+        with self._lock:
+            return self._running
+
+    def pending_count(self) -> int:
+        """Número de trabajos esperando hueco"""
+        with self._lock:
+            return len(self._pending)
+
+    def is_idle(self) -> bool:
+        """True si no hay trabajos pendientes ni en ejecución"""
+        with self._lock:
+            return self._running == 0 and not self._pending
+
+    def wait_idle(self, timeout=None) -> bool:
+        """
+        Bloquea hasta que la cola quede vacía
+
+        Returns:
+            bool: True si quedó vacía, False si venció el timeout
+        """
+        with self._idle:
+            return self._idle.wait_for(
+                lambda: self._running == 0 and not self._pending, timeout
+            )
+
+    def wait_running(self, timeout=None) -> bool:
+        """
+        Bloquea hasta que no quede ningún trabajo en ejecución
+
+        Los pendientes no cuentan: junto con pause() permite vaciar la cola
+        sin arrancar trabajos nuevos.
+
+        Returns:
+            bool: True si no queda ninguno en ejecución, False si venció el timeout
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._running == 0, timeout)
+
+    def remove_finished(self, keep: int = 0):
+        """
+        Olvida los trabajos terminados
+
+        Args:
+            keep: Número de trabajos terminados más recientes que se conservan
+        """
+        with self._lock:
+            finished = [j for j, job in self._jobs.items() if job.is_finished]
+            for job_id in finished[:max(0, len(finished) - keep)]:
+                del self._jobs[job_id]
+
+    # ------------------------------------------------------------------
+    # Pausa
+    # ------------------------------------------------------------------
+
+    @property
+    def is_paused(self) -> bool:
+        """True si la cola no arranca trabajos nuevos"""
+        return self._paused
+
+    def pause(self):
+        """Deja de arrancar trabajos pendientes; los que están en curso siguen"""
+        with self._lock:
+            self._paused = True
+
+    def resume(self):
+        """Vuelve a arrancar trabajos pendientes"""
+        with self._lock:
+            self._paused = False
+        self._dispatch()
+
+    # ------------------------------------------------------------------
+    # Envío y cancelación
+    # ------------------------------------------------------------------
+
+    def submit(self, job: DownloadJob) -> DownloadJob:
+        """Encola un trabajo y lo arranca si hay hueco libre"""
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._pending.append(job)
+        self._notify(job)
+        self._dispatch()
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Cancela un trabajo pendiente o en curso
+
+        Returns:
+            bool: True si el trabajo existía y no había terminado
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.is_finished:
+                return False
+            job.cancel()
+            was_pending = job in self._pending
+            if was_pending:
+                self._pending.remove(job)
+                job.finish(JobState.CANCELLED, "Cancelado antes de empezar")
+                self._idle.notify_all()
+        if was_pending:
+            self._notify(job)
+        return True
+
+    def cancel_all(self):
+        """Cancela todos los trabajos pendientes y en curso"""
+        for job in self.jobs():
+            self.cancel(job.job_id)
+
+    # ------------------------------------------------------------------
+    # Ejecución
+    # ------------------------------------------------------------------
+
+    def _dispatch(self):
+        """Arranca trabajos pendientes mientras queden huecos libres"""
+        started = []
+        with self._lock:
+            while (self._pending and not self._paused
+                   and self._running < self._max_workers):
+                job = self._pending.popleft()
+                self._running += 1
+                job.attempts += 1
+                job.state = JobState.RUNNING
+                job.started_at = time.time()
+                started.append(job)
+
+        for job in started:
+            self._notify(job)
+            threading.Thread(
+                target=self._run, args=(job,),
+                name=f"download-job-{job.job_id}", daemon=True
+            ).start()
+
+    def _run(self, job: DownloadJob):
+        """Ejecuta un trabajo y libera su hueco al terminar"""
+        try:
+            self._runner(job)
+        except Exception as e:
+            logger.exception("Unhandled error in job %d", job.job_id)
+            job.finish(JobState.FAILED, str(e))
+        finally:
+            if not job.is_finished:
+                if job.is_cancelled:
+                    job.finish(JobState.CANCELLED, "Cancelado por el usuario")
+                else:
+                    job.finish(JobState.COMPLETED, job.result_message)
+            retry = (job.state == JobState.FAILED and not job.is_cancelled
+                     and job.attempts <= job.max_retries)
+            with self._lock:
+                self._running -= 1
+                if retry:
+                    logger.info("Retrying job %d (attempt %d of %d)",
+                                job.job_id, job.attempts + 1, job.max_retries + 1)
+                    job.state = JobState.PENDING
+                    job.progress = 0
+                    job.message = f"Reintento {job.attempts}/{job.max_retries}"
+                    job.finished_at = None
+                    self._pending.append(job)
+                self._idle.notify_all()
+            self._notify(job)
+            self._dispatch()
+
+    def _notify(self, job: DownloadJob):
+        """Avisa a los listeners de un cambio de estado"""
+        for callback in list(self._listeners):
+            try:
+                callback(job)
+            except Exception:
+                logger.exception("Job listener failed for job %d", job.job_id)
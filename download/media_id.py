@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Identificación canónica de contenidos a partir de su URL, sin acceso a red
+"""
+
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def _extractor_classes():
+    """Lista de extractores de yt-dlp (sin el genérico), cargada una sola vez"""
+    from yt_dlp.extractor import gen_extractor_classes
+    return [ie for ie in gen_extractor_classes() if ie.ie_key() != 'Generic']
+
+
+@lru_cache(maxsize=4096)
+def _match_extractor(url: str):
+    """Primer extractor de yt-dlp (sin el genérico) que reconoce la URL"""
+    for ie in _extractor_classes():
+        try:
+            if ie.suitable(url):
+                return ie
+        except Exception as e:
+            logger.debug("Extractor %s failed matching %s: %s", ie.ie_key(), url, e)
+    return None
+
+
+def extractor_key(url: str) -> Optional[str]:
+    """
+    Obtiene el nombre del extractor de yt-dlp que reconoce la URL
+
+    Args:
+        url: URL del contenido
+
+    Returns:
+        str: Nombre del extractor (p. ej. "Youtube") o None
+    """
+    ie = _match_extractor(url.strip())
+    return ie.ie_key() if ie else None
+
+
+def resolve_media_id(url: str) -> Optional[Tuple[str, str]]:
+    """
+    Obtiene el extractor y el id del contenido a partir de la URL
+
+    Usa las expresiones regulares de los extractores de yt-dlp, por lo que
+    URLs distintas del mismo vídeo (youtu.be, m.youtube.com...) dan el mismo id.
+
+    Args:
+        url: URL del contenido
+
+    Returns:
+        tuple: (extractor, id) o None si ningún extractor la reconoce
+    """
+    url = url.strip()
+    ie = _match_extractor(url)
+    if ie is None:
+        return None
+    try:
+        video_id = ie.get_temp_id(url)
+    except Exception as e:
+        logger.debug("Could not get id from %s for %s: %s", ie.ie_key(), url, e)
+        return None
+    if not video_id:
+        return None
+    return ie.ie_key(), str(video_id)
+
+
+def media_key(url: str) -> str:
+    """
+    Clave canónica de un contenido: "extractor:id", o un hash de la URL si no se reconoce
+
+    Args:
+        url: URL del contenido
+
+    Returns:
+        str: Clave canónica
+    """
+    resolved = resolve_media_id(url)
+    if resolved:
+        return f"{resolved[0]}:{resolved[1]}"
+    return "url:" + hashlib.sha1(url.strip().encode('utf-8')).hexdigest()
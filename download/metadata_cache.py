@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché persistente de metadatos de yt-dlp (info dicts) con caducidad y expulsión LRU
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import (
+    METADATA_CACHE_MAX_BYTES, METADATA_CACHE_DEFAULT_TTL, METADATA_CACHE_TTL
+)
+from download.media_id import media_key
+from utils.validators import InputValidator
+
+logger = logging.getLogger(__name__)
+
+
+class MetadataCache:
+    """
+    Caché SQLite de info dicts indexada por id canónico del contenido.
+
+    Cada entrada caduca según la plataforma (las URLs de formato expiran) y,
+    si el tamaño total supera el límite, se expulsan las menos usadas.
+    """
+
+    def __init__(self, db_file: Optional[str] = None,
+                 max_bytes: int = METADATA_CACHE_MAX_BYTES):
+        """
+        Inicializa la caché
+
+        Args:
+            db_file: Ruta a la base de datos. Si es None, usa la predeterminada.
+            max_bytes: Tamaño máximo de los datos almacenados
+        """
+        if db_file is None:
+            config_dir = Path.home() / ".youtube_downloader"
+            config_dir.mkdir(exist_ok=True)
+            self.db_file = config_dir / "metadata_cache.sqlite3"
+        else:
+            self.db_file = Path(db_file)
+
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre una conexión a la base de datos"""
+        return sqlite3.connect(str(self.db_file), timeout=10)
+
+    def _init_db(self):
+        """Crea la tabla si no existe"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS info ("
+                " key TEXT PRIMARY KEY,"
+                " platform TEXT,"
+                " expires_at REAL NOT NULL,"
+                " last_access REAL NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " data TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_info_last_access ON info (last_access)"
+            )
+
+    @staticmethod
+    def get_ttl(platform: Optional[str]) -> int:
+        """
+        Obtiene el tiempo de vida de las entradas de una plataforma
+
+        Args:
+            platform: Nombre de la plataforma (ver SUPPORTED_PLATFORMS)
+
+        Returns:
+            int: Segundos de validez
+        """
+        return METADATA_CACHE_TTL.get(platform, METADATA_CACHE_DEFAULT_TTL)
+
+    def get(self, url: str) -> Optional[dict]:
+        """
+        Busca el info dict de una URL
+
+        Args:
+            url: URL del contenido
+
+        Returns:
+            dict: Info dict guardado, o None si no existe o ha caducado
+        """
+        key = media_key(url)
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT expires_at, data FROM info WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[0] > now:
+                    conn.execute(
+                        "UPDATE info SET last_access = ? WHERE key = ?", (now, key)
+                    )
+                    self.hits += 1
+                    logger.debug("Metadata cache hit: %s", key)
+                    return json.loads(row[1])
+                if row:
+                    conn.execute("DELETE FROM info WHERE key = ?", (key,))
+                self.misses += 1
+        except (sqlite3.Error, json.JSONDecodeError) as e:
+            logger.error("Metadata cache read failed: %s", e)
+            self.misses += 1
+        logger.debug("Metadata cache miss: %s", key)
+        return None
+
+    def put(self, url: str, info: dict) -> bool:
+        """
+        Guarda el info dict de una URL
+
+        Solo se guardan vídeos individuales; las listas de reproducción no.
+
+        Args:
+            url: URL del contenido
+            info: Info dict devuelto por yt-dlp
+
+        Returns:
+            True si se guardó correctamente
+        """
+        if not info or info.get('_type', 'video') != 'video':
+            return False
+
+        import yt_dlp
+
+        try:
+            data = json.dumps(yt_dlp.YoutubeDL.sanitize_info(info), ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            logger.warning("Could not serialize info for cache: %s", e)
+            return False
+
+        key = media_key(url)
+        platform = InputValidator.detect_platform(url)
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO info "
+                    "(key, platform, expires_at, last_access, size, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, platform, now + self.get_ttl(platform), now,
+                     len(data), data)
+                )
+                self._evict(conn)
+            return True
+        except sqlite3.Error as e:
+            logger.error("Metadata cache write failed: %s", e)
+            return False
+
+    def invalidate(self, url: str):
+        """Elimina la entrada de una URL (p. ej. tras un fallo de descarga)"""
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute("DELETE FROM info WHERE key = ?", (media_key(url),))
+        except sqlite3.Error as e:
+            logger.error("Metadata cache invalidate failed: %s", e)
+
+    def clear(self):
+        """Vacía la caché"""
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute("DELETE FROM info")
+        except sqlite3.Error as e:
+            logger.error("Metadata cache clear failed: %s", e)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Borra entradas caducadas y, si hace falta, las menos usadas"""
+        conn.execute("DELETE FROM info WHERE expires_at <= ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM info").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM info ORDER BY last_access ASC"
+        ):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM info WHERE key = ?", victims)
+        logger.debug("Metadata cache evicted %d entries (%d bytes)", len(victims), freed)
+
+    def stats(self) -> dict:
+        """
+        Estadísticas de uso de la caché
+
+        Returns:
+            dict: hits, misses, hit_rate, entries y size_bytes
+        """
+        entries, size = 0, 0
+        try:
+            with self._lock, self._connect() as conn:
+                entries, size = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM info"
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error("Metadata cache stats failed: %s", e)
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'size_bytes': size,
+        }
@@ -0,0 +1,613 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline de un trabajo (descarga -> subida SSH -> transcripción) sin dependencias de interfaz
+"""
+
+import logging
+import os
+import posixpath
+import shutil
+import tempfile
+
+from download.downloader import YouTubeDownloader
+from download.job_journal import PHASE_DOWNLOAD, PHASE_UPLOAD, PHASE_TRANSCRIBE
+from download.job_queue import DownloadJob, JobState
+from download.postprocess import PostProcessTask, get_postprocess_pool
+from download.progress_hook import DownloadProgressHook, DownloadCancelled
+from download.stages import (
+    StageScheduler, STAGE_DOWNLOAD, STAGE_PROCESS, STAGE_UPLOAD, STAGE_TRANSCRIBE
+)
+from download.streaming import StreamingDownload
+from download.telemetry import (
+    JobTelemetry, PHASE_WAIT, PHASE_EXTRACT, PHASE_PROCESS, PHASE_CONNECT, PHASE_STREAM
+)
+from download.transcriber import AudioTranscriber
+from utils.ssh_client import SSHClient
+from utils.ssh_pool import get_ssh_pool
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Carpeta de descargas temporales de los trabajos con subida SSH
+TEMP_ROOT = os.path.join(tempfile.gettempdir(), "youtube_download")
+
+STAGE_LABELS = {
+    STAGE_DOWNLOAD: "descarga",
+    STAGE_PROCESS: "procesado",
+    STAGE_UPLOAD: "subida",
+    STAGE_TRANSCRIBE: "transcripcion",
+}
+
+
+class DownloadPipeline:
+    """
+    Ejecuta trabajos de descarga de principio a fin.
+
+    No depende de Qt: la interfaz (o la línea de comandos) recibe los mensajes
+    a través de ``on_message`` y el progreso a través del hook de cada trabajo.
+    Se usa como runner de JobQueue, con tantos huecos como ``stages.capacity()``:
+    cada trabajo ocupa un hueco de la etapa en la que está (descarga,
+    procesado, subida, transcripción), así que un trabajo puede subir
+    mientras otro descarga. La conversión con FFmpeg se hace en el pool de
+    posprocesado, con el hueco de descarga ya libre.
+    """
+
+    def __init__(self, journal=None, on_message=None, temp_root=TEMP_ROOT, stages=None,
+                 postprocess=None, trace=None):
+        """
+        Inicializa el pipeline
+
+        Args:
+            journal: JobJournal donde registrar las fases (opcional)
+            on_message: Callback (job, mensaje, tipo) para el registro de
+                actividad; tipo es "info", "success", "warning", "error" o "skipped"
+            temp_root: Carpeta de temporales de las subidas SSH (cada proceso
+                con diario propio debe usar la suya)
+            stages: StageScheduler con los huecos de cada etapa (por defecto,
+                los de config)
+            postprocess: PostProcessPool para FFmpeg (por defecto, el compartido)
+            trace: TraceRecorder para exportar la traza de cada trabajo (opcional)
+        """
+        self.journal = journal
+        self.on_message = on_message
+        self.temp_root = temp_root
+        self.stages = stages or StageScheduler()
+        self.postprocess = postprocess or get_postprocess_pool()
+        self.trace = trace
+
+    def run(self, job: DownloadJob):
+        """
+        Ejecuta un trabajo completo (runner de JobQueue)
+
+        Descarga, subida por SSH opcional y transcripción opcional. Comprueba
+        el evento de cancelación del trabajo antes de cada fase, de modo que
+        varios trabajos pueden ejecutarse (y cancelarse) por separado. El
+        resultado queda en el propio trabajo (estado, mensaje y título).
+
+        Args:
+            job: DownloadJob a ejecutar
+        """
+        if self.trace is None:
+            self._run(job)
+            return
+        with self.trace.job(job):
+            self._run(job)
+
+    def _run(self, job: DownloadJob):
+        """Cuerpo de run(), dentro de la traza del trabajo si la hay"""
+        url = job.url
+        output_folder = job.output_folder
+        is_audio = job.is_audio
+        quality = job.quality
+        use_ssh = job.use_ssh
+        ssh_config = job.ssh_config
+        transcribe = job.transcribe
+        whisper_model = job.whisper_model
+        if job.progress_hook is None:
+            job.progress_hook = DownloadProgressHook(
+                cancel_event=job.cancel_event, job_id=job.job_id
+            )
+        hook = job.progress_hook
+        telemetry = job.telemetry = hook.telemetry = JobTelemetry()
+
+        temp_output_dir = None
+        actual_file = None
+        destination = self.archive_destination(job) if job.use_archive else None
+
+        try:
+            # ── Phase 0: get video info ─────────────────────────────
+            if job.is_cancelled:
+                return
+            self._enter_stage(job, STAGE_DOWNLOAD)
+            telemetry.start_phase(PHASE_EXTRACT)
+
+            # Skip already-fetched media before any network I/O
+            if destination and YouTubeDownloader.is_archived(
+                    url, is_audio, quality, destination):
+                self._skip(job, destination)
+                return
+
+            with span("get_video_info", "yt-dlp", url=url) as s:
+                info = YouTubeDownloader.get_video_info(url)
+                s.set(extractor=info.get('extractor_key'), formats=len(info.get('formats') or ()))
+            video_title = info.get('title', 'Video')
+
+            # URLs not recognised offline can still be matched by their info
+            if destination and YouTubeDownloader.is_archived(
+                    url, is_audio, quality, destination, info):
+                job.title = video_title
+                self._skip(job, destination)
+                return
+
+            hook.report(0, f"Iniciando descarga: {video_title}")
+            self._message(
+                job, f"Iniciando descarga: {video_title}", "info"
+            )
+
+            # ── Phase 1: download ──────────────────────────────────
+            if job.is_cancelled:
+                return
+
+            if use_ssh and job.stream_upload and not job.resume_paths.get('local_file'):
+                # Straight into the remote file when the format allows it
+                if self._stream_upload(job, info, hook, destination):
+                    return
+
+            if use_ssh:
+                # Download to a temp directory first
+                # Per-job temp dir: claimed in the journal so .part files survive
+                temp_output_dir = os.path.join(self.temp_root, job.journal_key)
+                os.makedirs(temp_output_dir, exist_ok=True)
+
+                resume_file = (job.resume_paths.get('local_file')
+                               if job.resume_phase == PHASE_UPLOAD else None)
+                if resume_file and os.path.exists(resume_file):
+                    # Download finished before a restart or a failed attempt: go straight to upload
+                    actual_file = resume_file
+                    title = job.title or video_title
+                    self._message(
+                        job, f"Reanudando subida de {os.path.basename(actual_file)}", "info"
+                    )
+                else:
+                    self._record_phase(job, PHASE_DOWNLOAD, temp_dir=temp_output_dir)
+
+                    if is_audio:
+                        temp_output = os.path.join(temp_output_dir, "%(title)s.%(ext)s")
+                    else:
+                        temp_output = os.path.join(temp_output_dir, f"{video_title}.mp4")
+
+                    self._message(
+                        job, "Descargando a carpeta temporal...", "info"
+                    )
+                    telemetry.start_phase(PHASE_DOWNLOAD)
+                    with span("download", "yt-dlp", audio=is_audio, quality=quality) as s:
+                        task = YouTubeDownloader.fetch(
+                            url, temp_output, is_audio, quality, hook, info=info
+                        )
+                        s.set(postprocess=task.kind, parts=len(task.sources))
+                    actual_file = self._postprocess(job, task)
+                    title = task.title
+                    if not os.path.exists(actual_file):
+                        raise Exception(f"No se encuentra el archivo descargado: {actual_file}")
+
+                file_size = os.path.getsize(actual_file)
+                if file_size == 0:
+                    raise Exception(f"El archivo descargado esta vacio: {actual_file}")
+
+                self._message(
+                    job, f"Archivo descargado: {os.path.basename(actual_file)} "
+                    f"({file_size / 1024 / 1024:.2f} MB)",
+                    "info"
+                )
+
+                # A retry of this job skips the download and continues the upload
+                job.resume_phase = PHASE_UPLOAD
+                job.resume_paths = {'temp_dir': temp_output_dir, 'local_file': actual_file}
+
+                # ── Phase 2: SSH connect ───────────────────────────
+                if job.is_cancelled:
+                    remove_temp(actual_file, temp_output_dir)
+                    return
+
+                # Free the download slot; wait for an upload slot
+                try:
+                    self._enter_stage(job, STAGE_UPLOAD)
+                except DownloadCancelled:
+                    remove_temp(actual_file, temp_output_dir)
+                    raise
+
+                hook.report(60, "Conectando al servidor...")
+                ssh_client = self._connect_ssh(job)
+
+                # ── Phase 3: SSH upload ────────────────────────────
+                if job.is_cancelled:
+                    ssh_client.disconnect()
+                    remove_temp(actual_file, temp_output_dir)
+                    return
+
+                remote_filename = os.path.basename(actual_file)
+                remote_path = posixpath.join(
+                    ssh_config['remote_folder'], remote_filename
+                )
+                file_size_mb = file_size / 1024 / 1024
+                self._record_phase(
+                    job, PHASE_UPLOAD, temp_dir=temp_output_dir,
+                    local_file=actual_file, remote_path=remote_path
+                )
+
+                self._message(
+                    job, f"Subiendo {remote_filename} ({file_size_mb:.2f} MB) "
+                    f"a {ssh_config['remote_folder']}...",
+                    "info"
+                )
+                hook.report(70, "Subiendo archivo...")
+                telemetry.start_phase(PHASE_UPLOAD)
+                upload_started = False
+
+                def _upload_progress(transferred, total):
+                    nonlocal upload_started
+                    if upload_started:
+                        telemetry.transfer(transferred, total)
+                    else:
+                        # The first report is where the upload starts (a resumed .part is not sent again)
+                        upload_started = True
+                        telemetry.start_transfer(transferred)
+                    if total > 0:
+                        pct = int(70 + (transferred / total) * 28)
+                        hook.report(
+                            pct, f"Subiendo... {transferred / 1024 / 1024:.1f} / {total / 1024 / 1024:.1f} MB, "
+                            f"{telemetry.describe()}",
+                            throttle=True
+                        )
+
+                upload_ok, upload_msg = ssh_client.upload_file(
+                    actual_file, remote_path, progress_callback=_upload_progress,
+                    # A .part left by an earlier attempt is verified and continued
+                    resume=True, flow=job.job_id
+                )
+
+                ssh_client.disconnect(reusable=upload_ok)
+
+                if upload_ok:
+                    self._message(job, upload_msg, "success")
+                    if destination:
+                        YouTubeDownloader.record_download(
+                            url, is_audio, quality, destination, info
+                        )
+                    remove_temp(actual_file, temp_output_dir)
+                    hook.report(
+                        100, "Descarga y subida completadas!"
+                    )
+                    self._message(
+                        job, f"Archivo subido exitosamente a: {remote_path}!",
+                        "success"
+                    )
+                    self._finish(
+                        job, JobState.COMPLETED,
+                        f"Descarga y subida completadas!\n\n{title}"
+                        f"\n\nGuardado en servidor: {remote_path}",
+                        title
+                    )
+                else:
+                    raise Exception(f"Error al subir archivo: {upload_msg}")
+
+            else:
+                # ── Local download ─────────────────────────────────
+                self._record_phase(job, PHASE_DOWNLOAD)
+                telemetry.start_phase(PHASE_DOWNLOAD)
+                with span("download", "yt-dlp", audio=is_audio, quality=quality) as s:
+                    task = YouTubeDownloader.fetch(
+                        url, output_folder, is_audio, quality, hook, info=info
+                    )
+                    s.set(postprocess=task.kind, parts=len(task.sources))
+                output_file = self._postprocess(job, task)
+                title = task.title
+                if destination:
+                    YouTubeDownloader.record_download(
+                        url, is_audio, quality, destination, task.info
+                    )
+
+                transcription_result = ""
+
+                # ── Phase 4: transcription (local only) ────────────
+                if is_audio and transcribe:
+                    if job.is_cancelled:
+                        return
+                    self._enter_stage(job, STAGE_TRANSCRIBE)
+                    telemetry.start_phase(PHASE_TRANSCRIBE)
+
+                    hook.report(
+                        95, "Transcribiendo audio..."
+                    )
+                    self._message(
+                        job, "Iniciando transcripcion con Whisper AI...", "info"
+                    )
+
+                    # The profile may keep m4a/opus: use the file produced, whatever its extension
+                    if os.path.exists(output_file):
+                        audio_file = output_file
+                        self._record_phase(job, PHASE_TRANSCRIBE)
+                        txt_filename = (
+                            os.path.splitext(audio_file)[0]
+                            + "_transcripcion.txt"
+                        )
+                        trans_ok, trans_msg, _ = AudioTranscriber.transcribe(
+                            audio_file, txt_filename,
+                            model_name=whisper_model, language="es"
+                        )
+                        if trans_ok:
+                            self._message(
+                                job, f"Transcripcion guardada: "
+                                f"{os.path.basename(txt_filename)}",
+                                "success"
+                            )
+                            transcription_result = (
+                                f"\nTranscripcion: {txt_filename}"
+                            )
+                        else:
+                            self._message(
+                                job, f"Error en transcripcion: {trans_msg}",
+                                "warning"
+                            )
+                            transcription_result = (
+                                f"\nTranscripcion fallida: {trans_msg}"
+                            )
+                    else:
+                        self._message(
+                            job, "No se encontro archivo de audio para transcribir",
+                            "warning"
+                        )
+
+                hook.report(100, "Descarga completada!")
+                self._message(
+                    job, f"Descarga completada! Archivo guardado en: {output_folder}",
+                    "success"
+                )
+                self._finish(
+                    job, JobState.COMPLETED,
+                    f"Descarga completada!\n\n{title}"
+                    f"\n\nGuardado en: {output_folder}{transcription_result}",
+                    title
+                )
+
+        except DownloadCancelled:
+            logger.info("Download cancelled by user")
+            self._message(job, "Descarga cancelada", "warning")
+            self._finish(
+                job, JobState.CANCELLED, "Descarga cancelada por el usuario", ""
+            )
+        except Exception as e:
+            error_msg = str(e)
+            logger.exception("Error during download")
+            self._message(
+                job, f"Error en la descarga: {error_msg}", "error"
+            )
+            self._finish(
+                job, JobState.FAILED,
+                f"Error al descargar el video:\n\n{error_msg}",
+                ""
+            )
+        finally:
+            telemetry.finish()
+            self.stages.leave(job)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def archive_destination(job: DownloadJob) -> str:
+        """Destino con el que se registra un trabajo en el índice de descargas"""
+        if job.use_ssh:
+            cfg = job.ssh_config
+            return f"{cfg['username']}@{cfg['host']}:{cfg['port']}:{cfg['remote_folder']}"
+        return os.path.abspath(job.output_folder)
+
+    def _enter_stage(self, job: DownloadJob, stage: str, keep_current: bool = False):
+        """Pasa el trabajo a una etapa, avisando si tiene que esperar hueco"""
+        def on_wait():
+            job.telemetry.start_phase(PHASE_WAIT)
+            job.progress_hook.report(job.progress, f"En espera: {STAGE_LABELS[stage]}...")
+            s.set(waited=True)
+
+        with span("stage.enter", "pipeline", stage=stage, waited=False) as s:
+            self.stages.enter(job, stage, keep_current=keep_current, on_wait=on_wait)
+
+    def _postprocess(self, job: DownloadJob, task: PostProcessTask) -> str:
+        """
+        Pasa la conversión con FFmpeg al pool de posprocesado
+
+        El trabajo deja su hueco de descarga y espera en la etapa de procesado.
+
+        Returns:
+            str: Ruta del archivo final
+        """
+        if not task.needed:
+            return task.target
+        self._enter_stage(job, STAGE_PROCESS)
+        job.telemetry.start_phase(PHASE_PROCESS)
+        job.progress_hook.report(100, "Procesando con FFmpeg...")
+        with span("postprocess", "ffmpeg", kind=task.kind, inputs=len(task.sources),
+                  target=os.path.basename(task.target)):
+            return self.postprocess.run(task, job.cancel_event)
+
+    def _record_phase(self, job: DownloadJob, phase: str, **paths):
+        """Registra una fase en el diario, si hay diario"""
+        if self.journal is not None:
+            self.journal.record_phase(job, phase, **paths)
+
+    def _connect_ssh(self, job: DownloadJob) -> SSHClient:
+        """
+        Conecta al servidor del trabajo y comprueba (o crea) la carpeta remota
+
+        La conexión sale del pool compartido: si otro trabajo acaba de usar
+        el mismo servidor, no hay que volver a negociar ni autenticar.
+
+        Returns:
+            SSHClient: Cliente conectado (el llamante debe desconectarlo, lo
+            que lo devuelve al pool)
+        """
+        ssh_config = job.ssh_config
+        job.telemetry.start_phase(PHASE_CONNECT)
+        self._message(
+            job, "Conectando al servidor SSH...", "info"
+        )
+        ssh_client, conn_msg = get_ssh_pool().acquire(ssh_config)
+        if ssh_client is None:
+            raise Exception(f"Error de conexion SSH: {conn_msg}")
+
+        self._message(
+            job, "Conexion SSH establecida", "success"
+        )
+
+        # Verify remote folder
+        self._message(
+            job, "Verificando carpeta remota...", "info"
+        )
+        with span("ssh.check_remote_folder", "ssh", folder=ssh_config['remote_folder']) as s:
+            _, folder_check, _ = ssh_client.run_command(
+                f'test -d "{ssh_config["remote_folder"]}" '
+                f'&& test -w "{ssh_config["remote_folder"]}" '
+                f'&& echo "OK" || echo "ERROR"'
+            )
+            folder_check = folder_check.strip()
+            s.set(result=folder_check)
+        if folder_check != "OK":
+            create_ok, create_msg = ssh_client.create_directory(
+                ssh_config['remote_folder']
+            )
+            if not create_ok:
+                ssh_client.disconnect()
+                raise Exception(
+                    f"No se puede acceder a la carpeta remota: {create_msg}"
+                )
+        return ssh_client
+
+    def _stream_upload(self, job: DownloadJob, info: dict, hook, destination) -> bool:
+        """
+        Descarga el contenido directamente al servidor, sin archivo temporal local
+
+        Returns:
+            bool: True si el trabajo se completó; False si el formato no se
+            puede transmitir y hay que usar la carpeta temporal
+        """
+        stream = StreamingDownload(info, job.is_audio, job.quality, hook, flow=job.job_id)
+        try:
+            if not stream.prepare():
+                logger.info("Job %d not streamable (%s), using temp file", job.job_id, stream.reason)
+                return False
+
+            # Streaming uses the download and the upload link at once
+            self._enter_stage(job, STAGE_UPLOAD, keep_current=True)
+            hook.report(0, "Conectando al servidor...")
+            ssh_client = self._connect_ssh(job)
+            remote_folder = job.ssh_config['remote_folder']
+            remote_path = posixpath.join(remote_folder, stream.filename)
+            size = stream.expected_size
+            if size and ssh_client.has_uploaded(remote_path, size):
+                # The hash of a stream is only known once sent: match by name, size and remote hash
+                ssh_client.disconnect()
+                self._message(
+                    job, f"{stream.filename} ya estaba en el servidor "
+                    f"({size / 1024 / 1024:.2f} MB, sin transmitir)", "info"
+                )
+            else:
+                self._record_phase(job, PHASE_UPLOAD, remote_path=remote_path)
+                self._message(
+                    job, f"Transmitiendo {stream.filename} directamente a {remote_folder}...", "info"
+                )
+                job.telemetry.start_phase(PHASE_STREAM)
+                streamed = False
+                try:
+                    with span("stream", "pipeline", remote_path=remote_path) as s:
+                        size = stream.run(ssh_client, remote_path)
+                        s.set(bytes=size)
+                    streamed = True
+                    ssh_client.record_upload(remote_path, size, stream.sha256)
+                finally:
+                    # A transfer cut short may leave requests pending on the SFTP channel
+                    ssh_client.disconnect(reusable=streamed)
+        finally:
+            stream.close()
+
+        if destination:
+            YouTubeDownloader.record_download(
+                job.url, job.is_audio, job.quality, destination, info
+            )
+        hook.report(100, "Descarga y subida completadas!")
+        self._message(
+            job, f"Archivo subido exitosamente a: {remote_path} "
+            f"({size / 1024 / 1024:.2f} MB)!", "success"
+        )
+        title = info.get('title', 'Video')
+        self._finish(
+            job, JobState.COMPLETED,
+            f"Descarga y subida completadas!\n\n{title}"
+            f"\n\nGuardado en servidor: {remote_path}",
+            title
+        )
+        return True
+
+    def _message(self, job: DownloadJob, message: str, msg_type: str):
+        """Envía una línea de actividad asociada al trabajo"""
+        if self.on_message is not None:
+            self.on_message(job, message, msg_type)
+
+    def _skip(self, job: DownloadJob, destination: str):
+        """Termina un trabajo cuyo contenido ya está en el índice de descargas"""
+        job.progress_hook.report(100, "Omitido: ya descargado")
+        self._message(
+            job, f"Omitido (ya descargado en {destination}): {job.title or job.url}",
+            "skipped"
+        )
+        self._finish(job, JobState.SKIPPED, YouTubeDownloader.SKIPPED_MESSAGE, job.title)
+
+    @staticmethod
+    def _finish(job: DownloadJob, state: str, message: str, title: str):
+        """Registra el estado final de un trabajo"""
+        if title:
+            job.title = title
+        job.finish(state, message)
+
+
+def remove_temp(file_path, temp_dir):
+    """Elimina un archivo temporal y su carpeta si queda vacía"""
+    try:
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+    except OSError as exc:
+        logger.warning("Could not remove temp file %s: %s", file_path, exc)
+    try:
+        if temp_dir and os.path.isdir(temp_dir) and not os.listdir(temp_dir):
+            os.rmdir(temp_dir)
+    except OSError:
+        pass
+
+
+def cleanup_temp_files(claimed=(), temp_root=TEMP_ROOT):
+    """
+    Elimina los temporales de sesiones anteriores que ningún trabajo reclama
+
+    Args:
+        claimed: Rutas que reclaman los trabajos sin terminar del diario
+        temp_root: Carpeta de temporales a limpiar
+    """
+    if not os.path.isdir(temp_root):
+        return
+    try:
+        for f in os.listdir(temp_root):
+            fp = os.path.normpath(os.path.join(temp_root, f))
+            if fp in claimed or any(c.startswith(fp + os.sep) for c in claimed):
+                continue
+            try:
+                if os.path.isdir(fp):
+                    shutil.rmtree(fp)
+                else:
+                    os.remove(fp)
+            except OSError:
+                pass
+        if not os.listdir(temp_root):
+            os.rmdir(temp_root)
+    except OSError:
+        pass
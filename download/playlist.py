@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Expansión de listas de reproducción y canales con extracción plana (perezosa)
+"""
+
+import logging
+import re
+from typing import Iterator, Optional
+
+from download.media_id import extractor_key
+
+logger = logging.getLogger(__name__)
+
+# Extractores de yt-dlp que devuelven colecciones en lugar de un vídeo
+_PLAYLIST_EXTRACTOR_RE = re.compile(
+    r'(Tab|Playlist|Channel|User|Album|Sets?|Show|Season|Collection|Podcast|Feed|Videos)$'
+)
+
+# Profundidad máxima al expandir colecciones anidadas (canal -> pestañas)
+MAX_NESTING = 2
+
+
+def looks_like_playlist(url: str) -> bool:
+    """
+    Indica si una URL apunta a una lista de reproducción o canal, sin acceso a red
+
+    Args:
+        url: URL del contenido
+
+    Returns:
+        bool: True si el extractor que la reconoce es de colecciones
+    """
+    key = extractor_key(url)
+    return bool(key and _PLAYLIST_EXTRACTOR_RE.search(key))
+
+
+def iter_playlist_entries(url: str, cancel_event=None) -> Iterator[dict]:
+    """
+    Recorre las entradas de una lista sin resolver cada vídeo
+
+    Usa ``extract_flat`` y ``lazy_playlist`` para que las entradas se generen
+    página a página: la primera llega en cuanto se descarga la primera página.
+
+    Args:
+        url: URL de la lista de reproducción o canal
+        cancel_event: threading.Event para interrumpir la expansión (opcional)
+
+    Yields:
+        dict: {'url', 'id', 'title', 'index'} de cada entrada
+    """
+    from download.ydl_pool import get_ydl_pool
+
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': 'in_playlist',
+        'lazy_playlist': True,
+    }
+
+    with get_ydl_pool().checkout(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=False, process=False)
+        index = 0
+        for entry in _walk_entries(ydl, info, 0):
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info("Playlist expansion cancelled: %s", url)
+                return
+            index += 1
+            entry['index'] = index
+            yield entry
+
+
+def _walk_entries(ydl, info: Optional[dict], depth: int) -> Iterator[dict]:
+    """Genera las entradas planas de un resultado, expandiendo colecciones anidadas"""
+    if not info:
+        return
+
+    if info.get('_type') not in ('playlist', 'multi_video'):
+        entry_url = _entry_url(info)
+        if entry_url:
+            yield {
+                'url': entry_url,
+                'id': info.get('id'),
+                'title': info.get('title'),
+            }
+        return
+
+    for entry in info.get('entries') or []:
+        if not entry:
+            continue
+        entry_url = _entry_url(entry)
+        if depth < MAX_NESTING and entry_url and looks_like_playlist(entry_url):
+            # Canal -> pestañas (vídeos, directos...) u otra colección
+            nested = ydl.extract_info(entry_url, download=False, process=False)
+            yield from _walk_entries(ydl, nested, depth + 1)
+        elif entry.get('_type') == 'playlist':
+            yield from _walk_entries(ydl, entry, depth + 1)
+        elif entry_url:
+            yield {
+                'url': entry_url,
+                'id': entry.get('id'),
+                'title': entry.get('title'),
+            }
+        else:
+            logger.warning("Skipping playlist entry without URL: %s", entry.get('id'))
+
+
+def _entry_url(entry: dict) -> Optional[str]:
+    """URL descargable de una entrada plana"""
+    for key in ('webpage_url', 'url', 'original_url'):
+        value = entry.get(key)
+        if isinstance(value, str) and value.startswith(('http://', 'https://')):
+            return value
+    return None
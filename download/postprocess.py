@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Posprocesado con FFmpeg (extracción de audio y unión de pistas de vídeo) en un
+pool de procesos, fuera de los hilos que descargan
+"""
+
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from config import POSTPROCESS_WORKERS, FFMPEG_THREAD_BUDGET
+from download.progress_hook import DownloadCancelled
+
+logger = logging.getLogger(__name__)
+
+# Cada cuánto se comprueba la cancelación mientras FFmpeg trabaja
+_WAIT_POLL = 0.5
+
+
+class PostProcessError(Exception):
+    """Error de FFmpeg al posprocesar una descarga"""
+
+
+def ffmpeg_threads(workers: int = POSTPROCESS_WORKERS, budget: int = FFMPEG_THREAD_BUDGET) -> int:
+    """
+    Hilos de FFmpeg para cada proceso, de modo que los procesos simultáneos
+    no usen entre todos más hilos que el presupuesto
+
+    Args:
+        workers: Procesos de FFmpeg que pueden ejecutarse a la vez
+        budget: Hilos totales disponibles
+
+    Returns:
+        int: Valor para la opción -threads (al menos 1)
+    """
+    return max(1, int(budget) // max(1, int(workers)))
+
+
+class PostProcessTask:
+    """Trabajo de FFmpeg pendiente tras una descarga"""
+
+    EXTRACT_AUDIO = "extract_audio"
+    MERGE = "merge"
+
+    def __init__(self, kind, sources, target, info=None, audio=None):
+        """
+        Args:
+            kind: EXTRACT_AUDIO, MERGE o None si el archivo ya es el final
+            sources: Archivos descargados
+            target: Archivo final
+            info: Información de yt-dlp del contenido descargado
+            audio: AudioPlan de las tareas EXTRACT_AUDIO (copia o conversión)
+        """
+        self.kind = kind
+        self.sources = list(sources)
+        self.target = target
+        self.info = info or {}
+        self.audio = audio
+
+    @property
+    def needed(self) -> bool:
+        """True si hay que ejecutar FFmpeg"""
+        return self.kind is not None
+
+    @property
+    def title(self) -> str:
+        return self.info.get('title', 'Video')
+
+    def ffmpeg_args(self) -> tuple:
+        """
+        Argumentos de FFmpeg de la tarea
+
+        Returns:
+            tuple: (argumentos de entrada, argumentos de salida)
+        """
+        inputs = []
+        for source in self.sources:
+            inputs += ['-i', source]
+        if self.kind == self.EXTRACT_AUDIO:
+            return inputs, self.audio.ffmpeg_args()
+        if self.kind == self.MERGE:
+            maps = []
+            for index in range(len(self.sources)):
+                maps += ['-map', f'{index}']
+            return inputs, maps + ['-c', 'copy', '-movflags', '+faststart']
+        raise ValueError(f"Unknown post-processing task: {self.kind}")
+
+    def remove_sources(self):
+        """Elimina los archivos descargados (salvo el final)"""
+        for source in self.sources:
+            if os.path.abspath(source) == os.path.abspath(self.target):
+                continue
+            try:
+                os.remove(source)
+            except OSError as e:
+                logger.warning("Could not remove %s: %s", source, e)
+
+
+def run_ffmpeg(inputs: list, outputs: list, target: str, threads: int) -> str:
+    """
+    Ejecuta FFmpeg en un proceso del pool
+
+    Escribe en un temporal junto al destino y lo renombra al terminar, de modo
+    que el archivo final nunca queda a medias.
+
+    Returns:
+        str: Ruta del archivo final
+
+    Raises:
+        PostProcessError: Si FFmpeg termina con error
+    """
+    root, ext = os.path.splitext(target)
+    temp = f"{root}.temp{ext}"
+    command = (['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y']
+               + inputs + ['-threads', str(threads)] + outputs + [temp])
+    try:
+        result = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True)
+    except OSError as e:
+        raise PostProcessError(f"No se pudo ejecutar FFmpeg: {e}")
+    if result.returncode != 0:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        detail = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise PostProcessError(
+            f"FFmpeg termino con codigo {result.returncode}: "
+            f"{detail[-1] if detail else 'sin detalles'}"
+        )
+    os.replace(temp, target)
+    return target
+
+
+class PostProcessPool:
+    """
+    Pool de procesos para FFmpeg.
+
+    Los hilos de descarga entregan aquí su tarea y esperan el resultado sin
+    ocupar un hueco de descarga (la espera se hace en la etapa de procesado).
+    Cada proceso recibe ``threads`` hilos de FFmpeg, así que las
+    conversiones simultáneas no sobrecargan la CPU.
+    """
+
+    def __init__(self, workers: int = POSTPROCESS_WORKERS, thread_budget: int = FFMPEG_THREAD_BUDGET):
+        """
+        Inicializa el pool (los procesos se crean con la primera tarea)
+
+        Args:
+            workers: Procesos simultáneos
+            thread_budget: Hilos de FFmpeg repartidos entre los procesos
+        """
+        self.workers = max(1, int(workers))
+        self.threads = ffmpeg_threads(self.workers, thread_budget)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: los procesos no heredan los hilos ni los sockets de la aplicación
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                logger.info("Post-processing pool started: %d process(es), %d FFmpeg thread(s) each",
+                            self.workers, self.threads)
+            return self._executor
+
+    def submit(self, task: PostProcessTask):
+        """
+        Encola una tarea en el pool
+
+        Returns:
+            Future: Resultado de run_ffmpeg (ruta del archivo final)
+        """
+        inputs, outputs = task.ffmpeg_args()
+        try:
+            return self._get_executor().submit(run_ffmpeg, inputs, outputs, task.target, self.threads)
+        except BrokenProcessPool:
+            # Un proceso murió: el pool queda inservible, se crea otro
+            with self._lock:
+                self._executor = None
+            return self._get_executor().submit(run_ffmpeg, inputs, outputs, task.target, self.threads)
+
+    def run(self, task: PostProcessTask, cancel_event: threading.Event = None) -> str:
+        """
+        Ejecuta una tarea y espera a que termine
+
+        Si se cancela mientras FFmpeg trabaja, el proceso termina su tarea en
+        segundo plano y su resultado se descarta.
+
+        Args:
+            task: Tarea devuelta por YouTubeDownloader.fetch
+            cancel_event: Evento de cancelación del trabajo
+
+        Returns:
+            str: Ruta del archivo final
+
+        Raises:
+            PostProcessError: Si FFmpeg falla o no está instalado
+            DownloadCancelled: Si se cancela el trabajo
+        """
+        if not task.needed:
+            return task.target
+        if not shutil.which('ffmpeg'):
+            raise PostProcessError("FFmpeg no esta instalado (necesario para convertir y unir archivos)")
+
+        future = self.submit(task)
+        while True:
+            try:
+                future.result(timeout=_WAIT_POLL)
+                break
+            except FutureTimeout:
+                if cancel_event is not None and cancel_event.is_set():
+                    future.add_done_callback(lambda _: _discard(task))
+                    future.cancel()
+                    raise DownloadCancelled("Descarga cancelada por el usuario")
+            except BrokenProcessPool as e:
+                with self._lock:
+                    self._executor = None
+                raise PostProcessError(f"El proceso de FFmpeg termino inesperadamente: {e}")
+
+        task.remove_sources()
+        return task.target
+
+    def shutdown(self, wait: bool = True):
+        """Detiene los procesos del pool"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _discard(task: PostProcessTask):
+    """Elimina los archivos de una tarea cancelada"""
+    task.remove_sources()
+    try:
+        if os.path.exists(task.target):
+            os.remove(task.target)
+    except OSError:
+        pass
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def get_postprocess_pool() -> PostProcessPool:
+    """
+    Pool de posprocesado compartido por todos los trabajos del proceso
+
+    Returns:
+        PostProcessPool: Pool con POSTPROCESS_WORKERS procesos
+    """
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = PostProcessPool()
+        return _shared_pool
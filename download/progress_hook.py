@@ -4,23 +4,147 @@
 Hook para capturar el progreso de la descarga
 """
 
-from threading import Event
+import logging
+import time
+from threading import Event, Lock
 
-from PySide6.QtCore import QObject, Signal
+from config import PROGRESS_RATE_HZ
+
+logger = logging.getLogger(__name__)
 
 
 class DownloadCancelled(Exception):
     """Raised when the user cancels the download."""
 
 
-class DownloadProgressHook(QObject):
-    """Hook para capturar el progreso de la descarga"""
-    progress = Signal(int, str)  # porcentaje, mensaje
+class Callbacks:
+    """
+    Lista de callbacks con la misma interfaz que una señal de Qt (connect/emit).
+
+    Se llaman en el hilo que emite: la interfaz debe pasar el valor a su propio
+    hilo (por ejemplo, conectando el ``emit`` de una señal de Qt).
+    """
+
+    def __init__(self):
+        self._callbacks = []
+        self._lock = Lock()
+
+    def connect(self, callback):
+        """Registra un callback"""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def disconnect(self, callback):
+        """Elimina un callback registrado"""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def emit(self, *args):
+        """Llama a todos los callbacks con los argumentos dados"""
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback(*args)
+            except Exception:
+                logger.exception("Progress callback failed")
+
+
+class ProgressAggregator:
+    """
+    Último progreso de cada trabajo, a la espera del siguiente tick de la interfaz.
+
+    Los hilos de los trabajos llaman a ``update`` (sin cruzar de hilo ni
+    repintar nada); la interfaz llama a ``drain`` periódicamente y aplica de
+    una vez los cambios de todos los trabajos. Los progresos intermedios de un
+    mismo trabajo entre dos ticks se funden en el último.
+    """
+
+    def __init__(self):
+        self._pending = {}  # id de trabajo -> (porcentaje, mensaje)
+        self._lock = Lock()
+        self.received = 0
+        self.delivered = 0
+
+    def update(self, job_id: int, percent: int, message: str):
+        """Guarda el progreso de un trabajo (se llama desde cualquier hilo)"""
+        with self._lock:
+            self._pending[job_id] = (percent, message)
+            self.received += 1
+
+    def drain(self) -> dict:
+        """
+        Progresos pendientes desde el último drain
+
+        Returns:
+            dict: id de trabajo -> (porcentaje, mensaje)
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self.delivered += len(pending)
+        return pending
+
+    def discard(self, job_id: int):
+        """Olvida el progreso pendiente de un trabajo (p. ej. al terminar)"""
+        with self._lock:
+            self._pending.pop(job_id, None)
 
-    def __init__(self, cancel_event: Event = None):
-        super().__init__()
+
+class DownloadProgressHook:
+    """Hook para capturar el progreso de la descarga (sin dependencias de Qt)"""
+
+    def __init__(self, cancel_event: Event = None, job_id: int = 0, rate_hz: float = PROGRESS_RATE_HZ):
+        """
+        Args:
+            cancel_event: Evento de cancelación del trabajo
+            job_id: Id del trabajo (para job_progress)
+            rate_hz: Progresos por segundo como máximo en report(throttle=True);
+                0 para emitirlos todos
+        """
+        self.progress = Callbacks()      # porcentaje, mensaje
+        self.job_progress = Callbacks()  # id de trabajo, porcentaje, mensaje
         self._last_percent = 0
         self._cancel_event = cancel_event
+        self.job_id = job_id
+        self.telemetry = None  # JobTelemetry del intento en curso (la asigna el pipeline)
+        self._interval = 1.0 / rate_hz if rate_hz else 0.0
+        self._last_emit = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        """True si se ha pedido cancelar el trabajo"""
+        return bool(self._cancel_event and self._cancel_event.is_set())
+
+    def _due(self) -> bool:
+        """True si ha pasado el intervalo mínimo desde el último progreso emitido"""
+        now = time.monotonic()
+        if now - self._last_emit < self._interval:
+            return False
+        self._last_emit = now
+        return True
+
+    def report(self, percent: int, message: str, throttle: bool = False):
+        """
+        Emite un progreso tanto global como asociado al trabajo
+
+        Args:
+            percent: Porcentaje de progreso (0-100)
+            message: Mensaje de estado
+            throttle: True para los progresos frecuentes (bytes descargados o
+                subidos): se descartan si llegan antes de 1/rate_hz segundos
+                desde el anterior. Los cambios de fase se emiten siempre.
+        """
+        if throttle:
+            if not self._due():
+                return
+        else:
+            self._last_emit = time.monotonic()
+        self._emit(percent, message)
+
+    def _emit(self, percent: int, message: str):
+        self.progress.emit(percent, message)
+        self.job_progress.emit(self.job_id, percent, message)
 
     def hook(self, d):
         """
@@ -34,29 +158,36 @@ class DownloadProgressHook(QObject):
             raise DownloadCancelled("Descarga cancelada por el usuario")
 
         if d['status'] == 'downloading':
+            total = d.get('total_bytes') or d.get('total_bytes_estimate')
+            if self.telemetry is not None:
+                self.telemetry.transfer(d.get('downloaded_bytes', 0), total)
+
+            # yt-dlp llama al hook en cada bloque: solo se informa a rate_hz
+            if not self._due():
+                return
+
             # Calcular porcentaje
-            if 'total_bytes' in d:
-                percent = int((d['downloaded_bytes'] / d['total_bytes']) * 100)
-            elif 'total_bytes_estimate' in d:
-                percent = int((d['downloaded_bytes'] / d['total_bytes_estimate']) * 100)
+            if total:
+                percent = int((d['downloaded_bytes'] / total) * 100)
             else:
                 percent = self._last_percent
 
             self._last_percent = percent
 
-            # Calcular velocidad
-            speed = d.get('speed', 0)
-            if speed:
-                speed_str = f"{speed / 1024 / 1024:.2f} MB/s"
+            # Velocidad suavizada y tiempo restante (o la instantánea de yt-dlp)
+            if self.telemetry is not None:
+                speed_str = self.telemetry.describe()
+            elif d.get('speed'):
+                speed_str = f"{d['speed'] / 1024 / 1024:.2f} MB/s"
             else:
                 speed_str = "Calculando..."
 
             message = f"Descargando... {speed_str}"
-            self.progress.emit(percent, message)
+            self._emit(percent, message)
 
         elif d['status'] == 'finished':
-            self.progress.emit(100, "Procesando archivo...")
+            self.report(100, "Procesando archivo...")
 
         elif d['status'] == 'error':
             error_msg = d.get('error', 'Error desconocido')
-            self.progress.emit(0, f"Error: {error_msg}")
+            self.report(0, f"Error: {error_msg}")
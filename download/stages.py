@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planificador por etapas: cada fase de un trabajo (descarga, procesado con
+FFmpeg, subida, transcripción) tiene su propio número de huecos, de modo que varias fases
+de trabajos distintos avanzan a la vez
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+from config import (
+    MAX_CONCURRENT_DOWNLOADS, POSTPROCESS_WORKERS, STAGE_UPLOAD_WORKERS, STAGE_TRANSCRIBE_WORKERS,
+    STAGE_QUEUE_SIZE, STAGE_UTILIZATION_WINDOW
+)
+from download.progress_hook import DownloadCancelled
+
+logger = logging.getLogger(__name__)
+
+# Etapas del pipeline, en el orden en que las recorre un trabajo
+STAGE_DOWNLOAD = "download"
+STAGE_PROCESS = "process"
+STAGE_UPLOAD = "upload"
+STAGE_TRANSCRIBE = "transcribe"
+
+STAGE_ORDER = (STAGE_DOWNLOAD, STAGE_PROCESS, STAGE_UPLOAD, STAGE_TRANSCRIBE)
+
+# Cada cuánto se comprueba la cancelación de un trabajo en espera
+_WAIT_POLL = 0.5
+
+
+class _Stage:
+    """Huecos, cola de espera y tiempo ocupado de una etapa"""
+
+    __slots__ = ('name', 'workers', 'busy', 'queue', 'busy_seconds', 'started', 'samples')
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = max(1, int(workers))
+        self.busy = 0
+        self.queue = deque()     # job_id de los trabajos en la cola de entrada, por orden de llegada
+        self.busy_seconds = 0.0  # tiempo ocupado acumulado de los trabajos que ya salieron
+        self.started = {}        # job_id -> inicio de su hueco en esta etapa
+        self.samples = deque()   # (instante, tiempo ocupado total) para la utilización
+
+    def busy_total(self, now: float) -> float:
+        """Tiempo ocupado acumulado, incluidos los trabajos en curso"""
+        return self.busy_seconds + sum(now - start for start in self.started.values())
+
+
+class StageScheduler:
+    """
+    Reparte los huecos de cada etapa entre los trabajos en curso.
+
+    Un trabajo entra en una etapa con enter() y la deja al entrar en la
+    siguiente o con leave(). Entre etapas hay una cola acotada
+    (STAGE_QUEUE_SIZE), de la que los trabajos pasan a la etapa por orden de
+    llegada. Si la siguiente etapa ya tiene su cola llena, el trabajo espera
+    conservando su hueco actual, con lo que la etapa anterior deja de aceptar
+    trabajos nuevos (contrapresión) en lugar de acumular archivos descargados
+    sin subir.
+    """
+
+    def __init__(self, workers: dict = None, queue_size: int = STAGE_QUEUE_SIZE):
+        """
+        Inicializa el planificador
+
+        Args:
+            workers: Huecos por etapa ({STAGE_DOWNLOAD: 3, ...}); las que
+                falten usan los valores de config
+            queue_size: Trabajos que pueden esperar a la entrada de cada etapa
+        """
+        sizes = {
+            STAGE_DOWNLOAD: MAX_CONCURRENT_DOWNLOADS,
+            STAGE_PROCESS: POSTPROCESS_WORKERS,
+            STAGE_UPLOAD: STAGE_UPLOAD_WORKERS,
+            STAGE_TRANSCRIBE: STAGE_TRANSCRIBE_WORKERS,
+        }
+        sizes.update(workers or {})
+        self._stages = {name: _Stage(name, sizes[name]) for name in STAGE_ORDER}
+        self._queue_size = max(0, int(queue_size))
+        self._held = {}  # job_id -> etapas ocupadas por el trabajo
+        self._cond = threading.Condition()
+
+    # ------------------------------------------------------------------
+    # Configuración
+    # ------------------------------------------------------------------
+
+    def set_workers(self, stage: str, workers: int):
+        """Cambia los huecos de una etapa; los trabajos en curso no se interrumpen"""
+        with self._cond:
+            self._stages[stage].workers = max(1, int(workers))
+            self._cond.notify_all()
+        logger.info("Stage %s resized to %d worker(s)", stage, workers)
+
+    def get_workers(self, stage: str) -> int:
+        """Huecos de una etapa"""
+        with self._cond:
+            return self._stages[stage].workers
+
+    def capacity(self) -> int:
+        """
+        Trabajos que pueden estar dentro del pipeline a la vez
+
+        Es el número de huecos que debe tener la JobQueue que lo alimenta:
+        todos los huecos de las etapas más sus colas de entrada.
+        """
+        with self._cond:
+            return sum(s.workers + self._queue_size for s in self._stages.values())
+
+    # ------------------------------------------------------------------
+    # Entrada y salida de etapas
+    # ------------------------------------------------------------------
+
+    def enter(self, job, stage: str, keep_current: bool = False, on_wait=None):
+        """
+        Mueve un trabajo a una etapa, esperando hueco si hace falta
+
+        Args:
+            job: DownloadJob en curso
+            stage: Etapa destino
+            keep_current: True para conservar también las etapas que ya ocupa
+                (p. ej. una descarga en streaming usa la bajada y la subida)
+            on_wait: Callback sin argumentos que se llama una vez si hay que esperar
+
+        Raises:
+            DownloadCancelled: Si el trabajo se cancela mientras espera
+        """
+        target = self._stages[stage]
+        with self._cond:
+            held = self._held.setdefault(job.job_id, [])
+            if stage in held:
+                return
+
+            # 1. Sitio en la cola de la etapa (sin soltar la actual: contrapresión);
+            #    con trabajos en la cola no se pasa directamente al hueco aunque lo haya
+            waited = False
+            while ((target.busy >= target.workers or target.queue)
+                   and len(target.queue) >= self._queue_size):
+                waited = self._wait(job, on_wait, waited)
+            target.queue.append(job.job_id)
+
+            try:
+                if not keep_current:
+                    self._release(job.job_id)
+                    held = self._held.setdefault(job.job_id, [])
+
+                # 2. Hueco libre en la etapa, por orden de llegada a la cola
+                while target.busy >= target.workers or target.queue[0] != job.job_id:
+                    waited = self._wait(job, on_wait, waited)
+            finally:
+                target.queue.remove(job.job_id)
+
+            target.busy += 1
+            target.started[job.job_id] = time.monotonic()
+            held.append(stage)
+            job.stage = stage
+            self._cond.notify_all()
+
+    def leave(self, job):
+        """Libera todas las etapas que ocupa un trabajo (al terminar)"""
+        with self._cond:
+            self._release(job.job_id)
+            self._held.pop(job.job_id, None)
+        job.stage = None
+
+    def _wait(self, job, on_wait, waited: bool) -> bool:
+        """Espera un cambio de ocupación comprobando la cancelación (con el lock tomado)"""
+        if job.is_cancelled:
+            self._release(job.job_id)
+            raise DownloadCancelled("Descarga cancelada por el usuario")
+        if not waited and on_wait is not None:
+            on_wait()
+        self._cond.wait(_WAIT_POLL)
+        return True
+
+    def _release(self, job_id: int):
+        """Libera las etapas que ocupa un trabajo (con el lock tomado)"""
+        now = time.monotonic()
+        for name in self._held.get(job_id, ()):
+            stage = self._stages[name]
+            start = stage.started.pop(job_id, None)
+            if start is not None:
+                stage.busy_seconds += now - start
+                stage.busy -= 1
+        if job_id in self._held:
+            self._held[job_id] = []
+        self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # Estadísticas
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        """
+        Ocupación de cada etapa
+
+        Returns:
+            dict: Por etapa, 'workers', 'busy', 'waiting' y 'utilization'
+            (fracción de 0 a 1 del tiempo de sus huecos ocupado en los
+            últimos STAGE_UTILIZATION_WINDOW segundos)
+        """
+        now = time.monotonic()
+        result = {}
+        with self._cond:
+            for name, stage in self._stages.items():
+                busy_total = stage.busy_total(now)
+                stage.samples.append((now, busy_total))
+                while len(stage.samples) > 2 and now - stage.samples[1][0] >= STAGE_UTILIZATION_WINDOW:
+                    stage.samples.popleft()
+                since, busy_then = stage.samples[0]
+                elapsed = now - since
+                if elapsed > 0:
+                    utilization = (busy_total - busy_then) / (elapsed * stage.workers)
+                else:
+                    utilization = stage.busy / stage.workers
+                result[name] = {
+                    'workers': stage.workers,
+                    'busy': stage.busy,
+                    'waiting': len(stage.queue),
+                    'utilization': round(min(1.0, utilization), 3),
+                }
+        return result
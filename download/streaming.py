@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Descarga en streaming directamente a un archivo remoto SFTP (sin temporal local)
+"""
+
+import copy
+import hashlib
+import logging
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import threading
+import time
+
+from yt_dlp.networking import Request
+from yt_dlp.networking.exceptions import RequestError
+from yt_dlp.utils import DownloadError
+
+from config import (
+    HTTP_CHUNK_SIZE,
+    STREAM_BLOCK_SIZE, STREAM_QUEUE_BLOCKS, STREAM_RETRIES, STREAM_STALL_TIMEOUT,
+    UPLOAD_PART_SUFFIX, UPLOAD_VERIFY_HASH, UPLOAD_VERIFY_RETRIES
+)
+from download.downloader import YouTubeDownloader
+from download.formats import PIPE_MUXERS, plan_audio
+from download.postprocess import ffmpeg_threads
+from download.progress_hook import DownloadCancelled
+from download.ydl_pool import get_ydl_pool
+from utils.bandwidth import DOWNLOAD, UPLOAD, ThrottledCallback, get_bandwidth_manager
+from utils.ssh_client import replace_remote
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Solo formatos progresivos: HLS/DASH y las mezclas vídeo+audio necesitan archivo local
+STREAMABLE_PROTOCOLS = ('http', 'https')
+
+# Contenedores de audio que FFmpeg puede leer desde una tubería (sin buscar el índice)
+PIPE_FRIENDLY_AUDIO = ('webm', 'weba', 'opus', 'ogg', 'mp3', 'aac', 'wav', 'flac')
+
+# Segundos de espera a cada hilo auxiliar de FFmpeg al terminar o abortar
+THREAD_JOIN_TIMEOUT = 5
+
+
+class StreamingError(Exception):
+    """Error al transmitir el contenido al servidor remoto"""
+
+
+def _response_total(response, offset: int):
+    """Tamaño total del archivo según Content-Range o Content-Length (None si no se sabe)"""
+    content_range = response.headers.get('Content-Range') or ''
+    if '/' in content_range and not content_range.endswith('/*'):
+        return int(content_range.rsplit('/', 1)[1])
+    length = response.headers.get('Content-Length')
+    if length and response.status == 200:
+        return offset + int(length)
+    return None
+
+
+def _response_socket(response):
+    """Socket de una respuesta de yt-dlp (adaptador -> HTTPResponse -> buffer -> socket), o None"""
+    obj = response
+    for _ in range(6):
+        if isinstance(obj, socket.socket):
+            return obj
+        obj = getattr(obj, 'fp', None) or getattr(obj, 'raw', None) or getattr(obj, '_sock', None)
+    return None
+
+
+class RemoteStreamWriter(threading.Thread):
+    """
+    Escribe en un archivo SFTP los bloques que recibe por una cola acotada.
+
+    La cola limita la memoria usada (STREAM_QUEUE_BLOCKS bloques) y frena a
+    quien descarga si la subida va más lenta, de modo que bajada y subida
+    avanzan a la vez sin pasar por el disco local. Cada bloque escrito pasa
+    por ``digest`` (SHA-256 de lo enviado).
+    """
+
+    def __init__(self, sftp, remote_path: str, flow, max_blocks: int = STREAM_QUEUE_BLOCKS):
+        """
+        Prepara la escritura (el archivo se abre al arrancar el hilo)
+
+        Args:
+            sftp: Cliente SFTP de paramiko
+            remote_path: Ruta remota a escribir
+            flow: Identificador del trabajo en el limitador de ancho de banda
+            max_blocks: Bloques pendientes como máximo
+        """
+        super().__init__(name=f"sftp-stream-{flow}", daemon=True)
+        self._sftp = sftp
+        self._remote_path = remote_path
+        self._queue = queue.Queue(maxsize=max_blocks)
+        self._callback = ThrottledCallback(get_bandwidth_manager(), UPLOAD, flow)
+        self._aborted = threading.Event()
+        self.error = None
+        self.written = 0
+        self.digest = hashlib.sha256()
+
+    def run(self):
+        try:
+            with self._sftp.open(self._remote_path, 'wb') as remote:
+                remote.set_pipelined(True)
+                while not self._aborted.is_set():
+                    block = self._queue.get()
+                    if block is None:
+                        break
+                    remote.write(block)
+                    self.digest.update(block)
+                    self.written += len(block)
+                    self._callback(self.written, 0)
+        except Exception as e:
+            logger.error("SFTP stream to %s failed: %s", self._remote_path, e)
+            self.error = e
+
+    def _put(self, item):
+        """Encola sin bloquearse para siempre si el hilo de escritura ha fallado"""
+        while True:
+            if self.error is not None:
+                raise StreamingError(f"Error SFTP: {self.error}")
+            if not self.is_alive() and self._aborted.is_set():
+                return
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def write(self, block: bytes):
+        """Encola un bloque; espera si la cola está llena"""
+        if block:
+            self._put(block)
+
+    def finish(self) -> int:
+        """
+        Espera a que se escriba todo y cierra el archivo remoto
+
+        Returns:
+            int: Bytes escritos
+        """
+        self._put(None)
+        self.join()
+        if self.error is not None:
+            raise StreamingError(f"Error SFTP: {self.error}")
+        return self.written
+
+    def abort(self):
+        """Detiene la escritura sin vaciar la cola"""
+        self._aborted.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self.join(timeout=30)
+
+
+class StreamingDownload:
+    """
+    Descarga un contenido ya extraído y lo escribe directamente en el servidor.
+
+    Sirve cuando el formato elegido es un único archivo HTTP progresivo. Para
+    audio, los bloques pasan por FFmpeg (stdin -> stdout) antes de subirse,
+    salvo que el perfil de audio acepte el archivo tal cual.
+    En el servidor se escribe ``<archivo>.part`` y se renombra al terminar,
+    después de comprobar su tamaño y su SHA-256 (como upload_file).
+    Uso: prepare() para saber si es posible, run() para transmitir y close().
+    """
+
+    def __init__(self, info: dict, is_audio: bool, quality, progress_hook, flow):
+        """
+        Args:
+            info: Información ya extraída del contenido (get_video_info)
+            is_audio: True si es solo audio (según el perfil, se copia o pasa por FFmpeg)
+            quality: Calidad del vídeo (solo si is_audio=False)
+            progress_hook: DownloadProgressHook del trabajo (progreso y cancelación)
+            flow: Identificador del trabajo en el limitador de ancho de banda
+        """
+        self.info = info
+        self.is_audio = is_audio
+        self.quality = quality
+        self.hook = progress_hook
+        self.flow = flow
+        self.format = None
+        self.audio = None
+        self.filename = None
+        self.reason = ""
+        self.sha256 = None               # hash de lo subido, tras run()
+        self._ydl = None
+        self._response = None            # respuesta HTTP abierta (para cortarla al abortar)
+        self._stop = threading.Event()   # pide a _iter_http que no siga ni reintente
+        self._last_data = time.monotonic()
+        self._http_total = None          # tamaño según el servidor HTTP, si lo dice
+
+    def prepare(self) -> bool:
+        """
+        Elige el formato como lo haría la descarga normal y comprueba si se puede transmitir
+
+        Returns:
+            bool: True si se puede transmitir; si no, ``reason`` explica el motivo
+        """
+        if self.info.get('_type', 'video') != 'video':
+            self.reason = "no es un único contenido"
+            return False
+        ydl_opts = YouTubeDownloader.get_download_options('', self.is_audio, self.quality)
+        ydl_opts.pop('postprocessors', None)
+        ydl_opts.update({'quiet': True, 'no_warnings': True})
+        self._ydl = get_ydl_pool().acquire(ydl_opts)
+        selected = self._ydl.process_ie_result(copy.deepcopy(self.info), download=False)
+
+        if len(selected.get('requested_formats') or ()) > 1:
+            self.reason = "el formato elegido combina vídeo y audio"
+            return False
+        if selected.get('protocol') not in STREAMABLE_PROTOCOLS or not selected.get('url'):
+            self.reason = f"protocolo {selected.get('protocol')} no progresivo"
+            return False
+        if self.is_audio:
+            audio = plan_audio(selected, YouTubeDownloader.audio_profile)
+            if audio.needs_ffmpeg:
+                if not shutil.which('ffmpeg'):
+                    self.reason = "FFmpeg no está disponible"
+                    return False
+                if not (selected.get('ext') in PIPE_FRIENDLY_AUDIO
+                        or str(selected.get('container', '')).endswith('_dash')):
+                    self.reason = f"el contenedor {selected.get('ext')} no se puede leer por tubería"
+                    return False
+                if audio.ext not in PIPE_MUXERS:
+                    self.reason = f"el contenedor {audio.ext} no se puede escribir por tubería"
+                    return False
+            self.audio = audio
+
+        self.format = selected
+        filename = os.path.basename(self._ydl.prepare_filename(selected))
+        if self.is_audio:
+            filename = f"{os.path.splitext(filename)[0]}.{self.audio.ext}"
+        self.filename = filename
+        return True
+
+    @property
+    def expected_size(self):
+        """Bytes que se subirán, si se saben antes de transmitir (sin FFmpeg y con tamaño en los metadatos)"""
+        if self.format is None or (self.is_audio and self.audio.needs_ffmpeg):
+            return None
+        return self.format.get('filesize') or None
+
+    def run(self, ssh_client, remote_path: str, verify: bool = UPLOAD_VERIFY_HASH) -> int:
+        """
+        Transmite el contenido a ``remote_path``
+
+        Antes de renombrar el ``.part`` comprueba que el servidor tiene todos
+        los bytes enviados (y, sin FFmpeg, los que anunció el servidor HTTP)
+        y, con ``verify``, que su SHA-256 coincide con el de lo enviado; si
+        no, se vuelve a transmitir (UPLOAD_VERIFY_RETRIES veces como máximo).
+
+        Args:
+            ssh_client: SSHClient conectado
+            remote_path: Ruta remota final
+            verify: Comprobar el hash del archivo remoto (si el servidor no
+                puede calcularlo, solo se comprueba el tamaño)
+
+        Returns:
+            int: Bytes escritos en el servidor
+
+        Raises:
+            StreamingError: Si la transmisión falla o el archivo remoto no
+                coincide con lo enviado en ningún intento
+        """
+        sftp = ssh_client.sftp
+        part_path = remote_path + UPLOAD_PART_SUFFIX
+        for attempt in range(UPLOAD_VERIFY_RETRIES + 1):
+            # A failed or aborted attempt leaves _stop set; the retry needs its own source
+            self._stop.clear()
+            writer = RemoteStreamWriter(sftp, part_path, self.flow)
+            writer.start()
+            try:
+                if self.is_audio and self.audio.needs_ffmpeg:
+                    self._transcode(writer)
+                else:
+                    for block in self._iter_http():
+                        writer.write(block)
+                written = writer.finish()
+            except BaseException:
+                writer.abort()
+                self._remove_remote(sftp, part_path)
+                raise
+
+            if written == 0:
+                self._remove_remote(sftp, part_path)
+                raise StreamingError("No se ha recibido ningún dato")
+            problem = self._check_remote(ssh_client, part_path, written,
+                                         writer.digest.hexdigest(), verify)
+            if problem is None:
+                break
+            logger.warning("Streamed file %s failed its check (attempt %d of %d): %s",
+                           part_path, attempt + 1, UPLOAD_VERIFY_RETRIES + 1, problem)
+        else:
+            # A .part that does not match what was sent must not be kept
+            self._remove_remote(sftp, part_path)
+            raise StreamingError(f"El archivo remoto no coincide con lo enviado: {problem}")
+
+        replace_remote(sftp, part_path, remote_path)
+        self.sha256 = writer.digest.hexdigest()
+        return written
+
+    def _check_remote(self, ssh_client, part_path: str, written: int, sha256: str,
+                      verify: bool):
+        """
+        Compara el ``.part`` remoto con lo enviado
+
+        Returns:
+            str: Descripción del problema, o None si coincide
+        """
+        transcoded = self.is_audio and self.audio.needs_ffmpeg
+        if not transcoded and self._http_total is not None and written != self._http_total:
+            return f"se enviaron {written} bytes de {self._http_total}"
+        with span("stream.verify", "ssh", path=part_path):
+            remote_size = ssh_client.get_file_size(part_path)
+        if remote_size != written:
+            return f"el servidor tiene {remote_size} bytes de {written}"
+        if not verify:
+            return None
+        with span("stream.checksum", "ssh", path=part_path) as s:
+            remote_hash = ssh_client.get_remote_sha256(part_path)
+            s.set(available=remote_hash is not None, match=remote_hash == sha256)
+        if remote_hash is None:
+            logger.info("Server cannot hash %s, stream checked by size only", part_path)
+            return None
+        if remote_hash != sha256:
+            return "el hash SHA-256 no coincide"
+        return None
+
+    def close(self):
+        """Devuelve el cliente de yt-dlp al pool"""
+        if self._ydl is not None:
+            get_ydl_pool().release(self._ydl)
+            self._ydl = None
+
+    # ------------------------------------------------------------------
+    # Descarga HTTP
+    # ------------------------------------------------------------------
+
+    def _open(self, offset: int, end=None):
+        """Abre la URL del formato desde ``offset`` (cabeceras y cookies de yt-dlp)"""
+        headers = dict(self.format.get('http_headers') or {})
+        if offset or end is not None:
+            headers['Range'] = f"bytes={offset}-{'' if end is None else end}"
+        response = self._ydl.urlopen(Request(self.format['url'], headers=headers))
+        if offset and response.status != 206:
+            response.close()
+            raise StreamingError("El servidor no admite reanudar por rangos")
+        return response
+
+    def _iter_http(self):
+        """
+        Genera los bloques del archivo remoto informando del progreso
+
+        Con tamaño conocido pide rangos de HTTP_CHUNK_SIZE (como yt-dlp, para
+        evitar la limitación de algunas plataformas); si la conexión se corta,
+        reintenta desde el último byte recibido.
+        """
+        total = self.format.get('filesize') or None
+        self._http_total = None
+        bandwidth = get_bandwidth_manager()
+        downloaded = 0
+        retries = 0
+        started = time.monotonic()
+
+        while not self._stop.is_set():
+            end = downloaded + HTTP_CHUNK_SIZE - 1 if total else None
+            received = 0
+            try:
+                with self._open(downloaded, end) as response:
+                    self._response = response
+                    self._http_total = _response_total(response, downloaded) or self._http_total
+                    total = self._http_total or total
+                    while True:
+                        block = response.read(STREAM_BLOCK_SIZE)
+                        if not block or self._stop.is_set():
+                            break
+                        self._last_data = time.monotonic()
+                        received += len(block)
+                        downloaded += len(block)
+                        bandwidth.throttle(DOWNLOAD, self.flow, len(block))
+                        self._report(downloaded, total, started)
+                        yield block
+            except (OSError, DownloadError, RequestError) as e:
+                retries += 1
+                if self._stop.is_set():
+                    return
+                if retries > STREAM_RETRIES:
+                    raise StreamingError(f"Error de descarga: {e}") from e
+                logger.warning("Stream read failed at byte %d (%s), retry %d/%d",
+                               downloaded, e, retries, STREAM_RETRIES)
+                self._stop.wait(min(2 ** retries, 30))
+                continue
+            finally:
+                self._response = None
+
+            retries = 0
+            if total is None or downloaded >= total:
+                return
+            if not received:
+                raise StreamingError(
+                    f"El servidor dejó de enviar datos en el byte {downloaded} de {total}"
+                )
+
+    def _report(self, downloaded: int, total, started: float):
+        """Progreso con el formato de yt-dlp (el hook también comprueba la cancelación)"""
+        elapsed = time.monotonic() - started
+        status = {
+            'status': 'downloading',
+            'downloaded_bytes': downloaded,
+            'speed': downloaded / elapsed if elapsed > 0 else None,
+        }
+        if total:
+            status['total_bytes'] = total
+        self.hook.hook(status)
+
+    # ------------------------------------------------------------------
+    # Conversión de audio
+    # ------------------------------------------------------------------
+
+    def _transcode(self, writer: RemoteStreamWriter):
+        """
+        Pasa la descarga por FFmpeg (conversión o cambio de contenedor) y sube su salida según se produce
+
+        La bajada (hacia stdin) y la subida (desde stdout) van en sus propios
+        hilos; este solo vigila la cancelación y que sigan llegando datos, y
+        si hay que abortar cierra la respuesta HTTP y mata FFmpeg para que
+        ningún hilo quede bloqueado.
+        """
+        process = subprocess.Popen(
+            ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-i', 'pipe:0',
+             '-threads', str(ffmpeg_threads())]
+            + self.audio.ffmpeg_args()
+            + ['-f', PIPE_MUXERS[self.audio.ext], 'pipe:1'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        feed_error = []
+        pump_error = []
+        stderr = []
+
+        def feed():
+            try:
+                for block in self._iter_http():
+                    process.stdin.write(block)
+            except (BrokenPipeError, ValueError):
+                pass  # FFmpeg terminó antes o se cerró la tubería al abortar
+            except BaseException as e:
+                feed_error.append(e)
+            finally:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+
+        def pump():
+            try:
+                while True:
+                    block = process.stdout.read(STREAM_BLOCK_SIZE)
+                    if not block:
+                        break
+                    writer.write(block)
+            except BaseException as e:
+                pump_error.append(e)
+                process.kill()
+
+        threads = [
+            threading.Thread(target=feed, name=f"ffmpeg-feed-{self.flow}", daemon=True),
+            threading.Thread(target=pump, name=f"ffmpeg-pump-{self.flow}", daemon=True),
+            threading.Thread(target=lambda: stderr.append(process.stderr.read()),
+                             name=f"ffmpeg-stderr-{self.flow}", daemon=True),
+        ]
+        feeder, pumper = threads[0], threads[1]
+        self._last_data = time.monotonic()
+        for thread in threads:
+            thread.start()
+        aborted = True
+        try:
+            while pumper.is_alive():
+                pumper.join(timeout=0.5)
+                if self.hook.cancelled:
+                    raise DownloadCancelled("Descarga cancelada por el usuario")
+                if feeder.is_alive() and time.monotonic() - self._last_data > STREAM_STALL_TIMEOUT:
+                    raise StreamingError(
+                        f"No se han recibido datos en {STREAM_STALL_TIMEOUT} s"
+                    )
+            aborted = bool(feed_error or pump_error)
+        finally:
+            if aborted:
+                self._abort_source()
+                process.kill()
+            process.wait()
+            for thread in threads:
+                thread.join(timeout=THREAD_JOIN_TIMEOUT)
+
+        if feed_error:
+            raise feed_error[0]
+        if pump_error:
+            raise pump_error[0]
+        if process.returncode != 0:
+            message = (stderr[0] if stderr else b'').decode(errors='replace').strip()
+            raise StreamingError(f"FFmpeg terminó con código {process.returncode}: {message}")
+
+    def _abort_source(self):
+        """Detiene la bajada HTTP en curso: sin reintentos y con la conexión cortada"""
+        self._stop.set()
+        response = self._response
+        if response is None:
+            return
+        # close() would wait for the blocked read (buffer lock); a shutdown wakes it up.
+        # Handlers whose socket cannot be reached stop at their socket timeout instead.
+        sock = _response_socket(response)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError as e:
+                logger.debug("Error shutting down stream socket: %s", e)
+
+    # ------------------------------------------------------------------
+    # Archivo remoto
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _remove_remote(sftp, remote_path: str):
+        try:
+            sftp.remove(remote_path)
+        except IOError:
+            pass
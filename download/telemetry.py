@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Telemetría de los trabajos: velocidad suavizada, tiempo restante y tiempo y
+bytes por fase, para saber en qué se va el tiempo de cada descarga
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import SPEED_EWMA_TAU, TELEMETRY_LOG_MAX_BYTES
+# Descarga, subida y transcripción son las mismas fases que las del diario
+from download.job_journal import PHASE_DOWNLOAD, PHASE_UPLOAD, PHASE_TRANSCRIBE
+
+logger = logging.getLogger(__name__)
+
+# Fases de un trabajo (además de las del diario)
+PHASE_WAIT = "wait"            # esperando hueco en una etapa del pipeline
+PHASE_EXTRACT = "extract"      # información del contenido (yt-dlp)
+PHASE_PROCESS = "process"      # FFmpeg
+PHASE_CONNECT = "connect"      # conexión SSH y comprobación de la carpeta remota
+PHASE_STREAM = "stream"        # descarga y subida a la vez (sin temporal local)
+
+PHASE_LABELS = {
+    PHASE_WAIT: "espera",
+    PHASE_EXTRACT: "informacion",
+    PHASE_DOWNLOAD: "descarga",
+    PHASE_PROCESS: "FFmpeg",
+    PHASE_CONNECT: "conexion",
+    PHASE_UPLOAD: "subida",
+    PHASE_STREAM: "transmision",
+    PHASE_TRANSCRIBE: "transcripcion",
+}
+
+# Intervalo mínimo entre muestras de la media de velocidad
+_SAMPLE_INTERVAL = 0.25
+
+
+def format_speed(bytes_per_second: float) -> str:
+    """Velocidad legible ('2.31 MB/s')"""
+    if bytes_per_second >= 1024 * 1024:
+        return f"{bytes_per_second / 1024 / 1024:.2f} MB/s"
+    return f"{bytes_per_second / 1024:.0f} KB/s"
+
+
+def format_eta(seconds: float) -> str:
+    """Tiempo restante legible ('4:07' o '1:02:45')"""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class JobTelemetry:
+    """
+    Telemetría de un intento de un trabajo.
+
+    El pipeline marca el inicio de cada fase con ``start_phase``; los
+    progresos de descarga y subida llaman a ``transfer`` con los bytes
+    transferidos, que se suman a la fase en curso y alimentan una media
+    exponencial de la velocidad (constante de tiempo ``tau``) y el tiempo
+    restante. Se puede leer desde otros hilos mientras el trabajo avanza.
+    """
+
+    def __init__(self, tau: float = SPEED_EWMA_TAU):
+        """
+        Args:
+            tau: Constante de tiempo de la media de velocidad en segundos
+                (más alta, más estable pero más lenta en reaccionar)
+        """
+        self.tau = tau
+        self.phases = {}      # fase -> [segundos, bytes]
+        self.phase = None
+        self.speed = None     # bytes/s (media exponencial)
+        self.eta = None       # segundos
+        self._lock = threading.Lock()
+        self._phase_started = None
+        self._last_bytes = 0
+        self._sample_time = None
+        self._sample_bytes = 0
+
+    def start_phase(self, phase: str):
+        """Cierra la fase en curso y empieza otra"""
+        with self._lock:
+            self._close_phase(time.monotonic())
+            self.phase = phase
+            self._phase_started = time.monotonic()
+            self.phases.setdefault(phase, [0.0, 0])
+            self.speed = None
+            self.eta = None
+            self._last_bytes = 0
+            self._sample_time = None
+            self._sample_bytes = 0
+
+    def finish(self):
+        """Cierra la fase en curso (al terminar el trabajo)"""
+        with self._lock:
+            self._close_phase(time.monotonic())
+            self.phase = None
+            self.speed = None
+            self.eta = None
+
+    def _close_phase(self, now: float):
+        if self.phase is not None:
+            self.phases[self.phase][0] += now - self._phase_started
+
+    def start_transfer(self, done: int = 0):
+        """
+        Empieza una transferencia que ya tiene ``done`` bytes (p. ej. una
+        subida reanudada): esos bytes no cuentan en la fase ni en la velocidad
+        """
+        with self._lock:
+            self._last_bytes = done
+            self._sample_time = None
+            self._sample_bytes = 0
+
+    def transfer(self, done: int, total: Optional[int] = None):
+        """
+        Registra el progreso de una transferencia de la fase en curso
+
+        Args:
+            done: Bytes transferidos hasta ahora en esta transferencia. Si
+                baja respecto a la llamada anterior, empieza otra (por ejemplo
+                la pista de audio tras la de vídeo) y se cuenta desde cero.
+            total: Tamaño total, si se conoce (para el tiempo restante)
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.phase is None:
+                return
+            delta = done - self._last_bytes if done >= self._last_bytes else done
+            self._last_bytes = done
+            self.phases[self.phase][1] += delta
+            if self._sample_time is None:
+                # La primera muestra empieza con los primeros bytes, no con la
+                # fase: el tiempo de conexión no cuenta como velocidad baja
+                self._sample_time = now
+                return
+            self._sample_bytes += delta
+
+            elapsed = now - self._sample_time
+            if elapsed < _SAMPLE_INTERVAL:
+                return
+            rate = self._sample_bytes / elapsed
+            if self.speed is None:
+                self.speed = rate
+            else:
+                # Peso según el tiempo transcurrido: muestras irregulares no sesgan la media
+                alpha = 1.0 - math.exp(-elapsed / self.tau)
+                self.speed += alpha * (rate - self.speed)
+            self._sample_time = now
+            self._sample_bytes = 0
+
+            if total and self.speed > 0:
+                self.eta = max(0.0, (total - done) / self.speed)
+            else:
+                self.eta = None
+
+    def describe(self) -> str:
+        """Velocidad y tiempo restante para el mensaje de progreso"""
+        with self._lock:
+            speed, eta = self.speed, self.eta
+        if not speed:
+            return "Calculando..."
+        if eta is None:
+            return format_speed(speed)
+        return f"{format_speed(speed)}, quedan {format_eta(eta)}"
+
+    def to_dict(self) -> dict:
+        """
+        Representación serializable
+
+        Returns:
+            dict: 'phases' (fase -> seconds, bytes, throughput en bytes/s),
+            'total_seconds', y la fase, velocidad y ETA actuales
+        """
+        with self._lock:
+            now = time.monotonic()
+            phases = {}
+            for phase, (seconds, nbytes) in self.phases.items():
+                if phase == self.phase:
+                    seconds += now - self._phase_started
+                phases[phase] = {
+                    'seconds': round(seconds, 3),
+                    'bytes': nbytes,
+                    'throughput': round(nbytes / seconds) if nbytes and seconds > 0 else None,
+                }
+            return {
+                'phase': self.phase,
+                'speed': round(self.speed) if self.speed else None,
+                'eta': round(self.eta, 1) if self.eta is not None else None,
+                'total_seconds': round(sum(p['seconds'] for p in phases.values()), 3),
+                'phases': phases,
+            }
+
+    def summary(self) -> str:
+        """
+        Resumen legible, una fase por línea
+
+        Returns:
+            str: p. ej. 'descarga: 12.3 s, 45.2 MB, 3.67 MB/s'
+        """
+        lines = []
+        for phase, data in self.to_dict()['phases'].items():
+            line = f"{PHASE_LABELS.get(phase, phase)}: {data['seconds']:.1f} s"
+            if data['bytes']:
+                line += f", {data['bytes'] / 1024 / 1024:.1f} MB"
+            if data['throughput']:
+                line += f", {format_speed(data['throughput'])}"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+class TelemetryLog:
+    """
+    Registro append-only en JSON Lines del resultado y la telemetría de cada
+    trabajo terminado.
+
+    Al superar TELEMETRY_LOG_MAX_BYTES el archivo se renombra a ``.1`` (se
+    conserva una generación anterior).
+    """
+
+    def __init__(self, log_file: Optional[str] = None, max_bytes: int = TELEMETRY_LOG_MAX_BYTES):
+        """
+        Inicializa el registro
+
+        Args:
+            log_file: Ruta al archivo. Si es None, usa el predeterminado.
+            max_bytes: Tamaño a partir del cual se rota el archivo
+        """
+        if log_file is None:
+            config_dir = Path.home() / ".youtube_downloader"
+            config_dir.mkdir(exist_ok=True)
+            self.log_file = config_dir / "job_results.jsonl"
+        else:
+            self.log_file = Path(log_file)
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def record(self, job):
+        """
+        Añade el resultado de un trabajo terminado
+
+        Args:
+            job: DownloadJob terminado
+        """
+        record = {
+            'job_id': job.job_id,
+            'url': job.url,
+            'title': job.title,
+            'state': job.state,
+            'attempts': job.attempts,
+            'use_ssh': job.use_ssh,
+            'is_audio': job.is_audio,
+            'stream_upload': job.stream_upload,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at,
+            'telemetry': job.telemetry.to_dict() if job.telemetry else None,
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        try:
+            with self._lock:
+                if self.log_file.exists() and self.log_file.stat().st_size >= self.max_bytes:
+                    os.replace(self.log_file, self.log_file.with_name(self.log_file.name + ".1"))
+                with open(self.log_file, 'a', encoding='utf-8') as f:
+                    f.write(line)
+        except OSError as e:
+            logger.error("Failed to write telemetry log: %s", e)
+
+    def on_job_update(self, job):
+        """Listener para JobQueue: registra los trabajos al terminar"""
+        if job.is_finished:
+            self.record(job)
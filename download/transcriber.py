@@ -10,6 +10,8 @@ import subprocess
 import tempfile
 from pathlib import Path
 
+from utils.tracing import span
+
 logger = logging.getLogger(__name__)
 
 
@@ -51,14 +53,18 @@ class AudioTranscriber:
                 return False, f"El archivo de audio no existe: {audio_path}", None
 
             # Cargar modelo
-            model = whisper.load_model(model_name)
+            with span("whisper.load_model", "transcribe", model=model_name):
+                model = whisper.load_model(model_name)
 
             # Transcribir
-            result = model.transcribe(
-                audio_path,
-                language=language,
-                verbose=False
-            )
+            with span("whisper.transcribe", "transcribe", model=model_name,
+                      language=language, bytes=os.path.getsize(audio_path)) as s:
+                result = model.transcribe(
+                    audio_path,
+                    language=language,
+                    verbose=False
+                )
+                s.set(segments=len(result.get("segments") or ()))
 
             transcription_text = result["text"].strip()
 
@@ -79,8 +85,9 @@ Idioma: {language}
 Generado con Media Downloader - Whisper AI
 ================================================================================
 """
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                with span("transcription.write", "transcribe", chars=len(content)):
+                    with open(output_path, 'w', encoding='utf-8') as f:
+                        f.write(content)
 
                 return True, f"Transcripción guardada en: {output_path}", transcription_text
             else:
@@ -113,14 +120,18 @@ Generado con Media Downloader - Whisper AI
                 return False, f"El archivo de audio no existe: {audio_path}", None
 
             # Cargar modelo
-            model = whisper.load_model(model_name)
+            with span("whisper.load_model", "transcribe", model=model_name):
+                model = whisper.load_model(model_name)
 
             # Transcribir
-            result = model.transcribe(
-                audio_path,
-                language=language,
-                verbose=False
-            )
+            with span("whisper.transcribe", "transcribe", model=model_name,
+                      language=language, bytes=os.path.getsize(audio_path)) as s:
+                result = model.transcribe(
+                    audio_path,
+                    language=language,
+                    verbose=False
+                )
+                s.set(segments=len(result.get("segments") or ()))
 
             # Formatear con timestamps
             lines = []
@@ -153,8 +164,9 @@ Idioma: {language}
 Generado con Media Downloader - Whisper AI
 ================================================================================
 """
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                with span("transcription.write", "transcribe", chars=len(content)):
+                    with open(output_path, 'w', encoding='utf-8') as f:
+                        f.write(content)
 
                 return True, f"Transcripción guardada en: {output_path}", transcription_text
             else:
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool de instancias de YoutubeDL reutilizables, agrupadas por perfil de opciones.
+
+Crear un YoutubeDL inicializa los extractores, el tarro de cookies y los
+manejadores HTTP; reutilizarlo ahorra ese coste en cada consulta de metadatos
+y en cada descarga. Una instancia solo la usa un trabajo a la vez: se presta
+con las opciones propias del trabajo (plantilla de salida, hooks, logger) y,
+al devolverla, se restauran las del perfil.
+"""
+
+import json
+import logging
+import threading
+from contextlib import contextmanager
+
+import yt_dlp
+
+from config import YDL_POOL_MAX_IDLE, YDL_POOL_MAX_USES
+
+logger = logging.getLogger(__name__)
+
+# Opciones propias de cada uso: no forman parte del perfil
+JOB_PARAMS = ('outtmpl', 'progress_hooks', 'logger', 'concurrent_fragment_downloads')
+
+
+class _Lease:
+    """Estado de una instancia prestada, para restaurarla al devolverla"""
+
+    __slots__ = ('key', 'uses', 'params', 'hooks', 'format_selector')
+
+    def __init__(self, key: str):
+        self.key = key
+        self.uses = 0
+        self.params = None
+        self.hooks = None
+        self.format_selector = None
+
+
+class YdlPool:
+    """
+    Instancias de YoutubeDL libres por perfil de opciones.
+
+    El perfil son las opciones que YoutubeDL fija al crearse (formato,
+    posprocesadores, quiet...); las de JOB_PARAMS se aplican en cada préstamo.
+    """
+
+    def __init__(self, max_idle: int = YDL_POOL_MAX_IDLE, max_uses: int = YDL_POOL_MAX_USES):
+        """
+        Args:
+            max_idle: Instancias libres que se guardan por perfil
+            max_uses: Préstamos tras los que una instancia se cierra y se
+                crea otra (limita el crecimiento de cookies y cachés)
+        """
+        self.max_idle = max_idle
+        self.max_uses = max_uses
+        self._idle = {}    # perfil -> [YoutubeDL]
+        self._leases = {}  # id(YoutubeDL) -> _Lease
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    @staticmethod
+    def profile_key(params: dict) -> str:
+        """Clave del perfil: las opciones que no cambian entre usos"""
+        profile = {k: v for k, v in params.items() if k not in JOB_PARAMS}
+        return json.dumps(profile, sort_keys=True, default=repr)
+
+    def acquire(self, params: dict):
+        """
+        Presta una instancia con las opciones dadas
+
+        Hay que devolverla con release(); mejor usar checkout().
+
+        Args:
+            params: Opciones de yt-dlp, incluidas las propias del uso
+
+        Returns:
+            YoutubeDL: Instancia para uso exclusivo del llamante
+        """
+        key = self.profile_key(params)
+        ydl = None
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                ydl = idle.pop()
+                self.reused += 1
+        if ydl is None:
+            ydl = yt_dlp.YoutubeDL({k: v for k, v in params.items() if k not in JOB_PARAMS})
+            with self._lock:
+                self._leases[id(ydl)] = _Lease(key)
+                self.created += 1
+
+        with self._lock:
+            lease = self._leases[id(ydl)]
+        lease.uses += 1
+        lease.params = dict(ydl.params)
+        lease.hooks = list(ydl._progress_hooks)
+        lease.format_selector = ydl.format_selector
+
+        for name in JOB_PARAMS:
+            if name not in params:
+                continue
+            if name == 'progress_hooks':
+                for hook in params[name]:
+                    ydl.add_progress_hook(hook)
+            elif name == 'outtmpl':
+                self.retarget(ydl, outtmpl=params[name])
+            else:
+                ydl.params[name] = params[name]
+        return ydl
+
+    def release(self, ydl, reusable: bool = True):
+        """
+        Devuelve una instancia prestada
+
+        Args:
+            ydl: Instancia obtenida con acquire()
+            reusable: False para cerrarla (p. ej. si el uso terminó con error)
+        """
+        with self._lock:
+            lease = self._leases.get(id(ydl))
+        if lease is None:
+            ydl.close()
+            return
+
+        # Quitar los hooks y opciones del trabajo
+        ydl.params.clear()
+        ydl.params.update(lease.params)
+        ydl._progress_hooks[:] = lease.hooks
+        ydl.format_selector = lease.format_selector
+
+        with self._lock:
+            idle = self._idle.setdefault(lease.key, [])
+            keep = reusable and lease.uses < self.max_uses and len(idle) < self.max_idle
+            if keep:
+                idle.append(ydl)
+            else:
+                del self._leases[id(ydl)]
+        if not keep:
+            ydl.close()
+
+    @contextmanager
+    def checkout(self, params: dict):
+        """
+        Presta una instancia durante un bloque ``with``
+
+        Si el bloque termina con una excepción la instancia se cierra en vez
+        de volver al pool.
+        """
+        ydl = self.acquire(params)
+        reusable = False
+        try:
+            yield ydl
+            reusable = True
+        finally:
+            self.release(ydl, reusable)
+
+    @staticmethod
+    def retarget(ydl, outtmpl=None, format_spec: str = None):
+        """
+        Cambia la plantilla de salida o el formato de una instancia prestada
+        (se restauran al devolverla)
+        """
+        if outtmpl is not None:
+            templates = ydl.params.get('outtmpl')
+            templates = dict(templates) if isinstance(templates, dict) else {}
+            if isinstance(outtmpl, dict):
+                templates.update(outtmpl)
+            else:
+                templates['default'] = outtmpl
+            ydl.params['outtmpl'] = templates
+        if format_spec is not None:
+            ydl.params['format'] = format_spec
+            ydl.format_selector = ydl.build_format_selector(format_spec)
+
+    def close(self):
+        """Cierra las instancias libres"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+            for instances in idle.values():
+                for ydl in instances:
+                    self._leases.pop(id(ydl), None)
+        for instances in idle.values():
+            for ydl in instances:
+                ydl.close()
+
+    def stats(self) -> dict:
+        """
+        Estadísticas del pool
+
+        Returns:
+            dict: created, reused, idle (instancias libres) y profiles
+        """
+        with self._lock:
+            return {
+                'created': self.created,
+                'reused': self.reused,
+                'idle': sum(len(v) for v in self._idle.values()),
+                'profiles': len(self._idle),
+            }
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def get_ydl_pool() -> YdlPool:
+    """
+    Pool de YoutubeDL compartido por todo el proceso
+
+    Returns:
+        YdlPool: Pool con los límites de config
+    """
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = YdlPool()
+        return _shared_pool
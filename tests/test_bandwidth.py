@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Limitador de ancho de banda: reparto por pesos y cambios en caliente (user-008)
+
+Uso (desde la raíz del proyecto):
+    python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import bandwidth  # noqa: E402
+from utils.bandwidth import (  # noqa: E402
+    ACTIVE_WINDOW, DOWNLOAD, MAX_SLEEP, UPLOAD, BandwidthManager, ThrottledCallback
+)
+
+LIMIT = 100_000
+BLOCK = 1000
+
+
+class FakeClock:
+    """Sustituye al módulo time del limitador: sleep() avanza el reloj sin esperar"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+        self.on_sleep = None
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # Como un sleep real, siempre pasa algo de tiempo (los redondeos dejan esperas mínimas)
+        seconds = max(seconds, 1e-6)
+        self.now += seconds
+        self.slept += seconds
+        if self.on_sleep is not None:
+            self.on_sleep()
+
+
+class BandwidthTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patch = mock.patch.object(bandwidth, 'time', self.clock)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.manager = BandwidthManager(upload_limit=LIMIT)
+
+    def share(self, flows, seconds, direction=UPLOAD):
+        """
+        Simula varios trabajos transfiriendo bloques a la vez
+
+        Cada trabajo envía su siguiente bloque en cuanto termina la espera que
+        le impone el limitador.
+
+        Returns:
+            dict: Bytes transferidos por cada trabajo
+        """
+        start = self.clock.now
+        ready = {flow: start for flow in flows}
+        sent = {flow: 0 for flow in flows}
+        while True:
+            flow = min(ready, key=ready.get)
+            if ready[flow] >= start + seconds:
+                return sent
+            self.clock.now = ready[flow]
+            wait = self.manager._consume(direction, flow, BLOCK)
+            sent[flow] += BLOCK
+            ready[flow] = self.clock.now + wait
+
+
+class SharingTest(BandwidthTestCase):
+
+    def test_single_flow_gets_the_whole_limit(self):
+        for _ in range(50):
+            self.manager.throttle(UPLOAD, 'a', BLOCK * 10)
+
+        self.assertAlmostEqual(self.clock.slept, 50 * BLOCK * 10 / LIMIT, delta=0.3)
+
+    def test_flows_share_by_weight(self):
+        self.manager.set_weight('high', 3.0)
+
+        sent = self.share(['high', 'normal'], seconds=10)
+
+        self.assertAlmostEqual(sent['high'] + sent['normal'], 10 * LIMIT, delta=0.05 * LIMIT * 10)
+        self.assertAlmostEqual(sent['high'] / sent['normal'], 3.0, delta=0.15)
+
+    def test_idle_flow_leaves_its_share(self):
+        self.share(['a', 'b'], seconds=2)
+        self.clock.now += ACTIVE_WINDOW
+
+        sent = self.share(['a'], seconds=5)
+
+        self.assertAlmostEqual(sent['a'], 5 * LIMIT, delta=0.05 * 5 * LIMIT)
+        self.assertEqual(self.manager.stats()[UPLOAD]['active'], 1)
+
+    def test_directions_are_independent(self):
+        self.manager.set_limit(DOWNLOAD, LIMIT)
+        self.share(['a'], seconds=1, direction=DOWNLOAD)
+
+        sent = self.share(['a'], seconds=5)
+
+        self.assertAlmostEqual(sent['a'], 5 * LIMIT, delta=0.05 * 5 * LIMIT)
+
+    def test_release_forgets_the_flow(self):
+        self.manager.set_weight('a', 2.0)
+        self.share(['a', 'b'], seconds=1)
+
+        self.manager.release('a')
+
+        self.assertEqual(self.manager.get_weight('a'), 1.0)
+        self.assertEqual(self.manager.stats()[UPLOAD]['active'], 1)
+
+
+class LiveLimitTest(BandwidthTestCase):
+
+    def test_raised_limit_wakes_a_waiting_transfer(self):
+        self.clock.on_sleep = lambda: self.manager.set_limit(UPLOAD, LIMIT * 100)
+
+        # A 100 KB/s serían 10 s de espera
+        self.manager.throttle(UPLOAD, 'a', LIMIT * 10)
+
+        self.assertLessEqual(self.clock.slept, MAX_SLEEP + 0.1)
+
+    def test_removed_limit_stops_waiting(self):
+        self.clock.on_sleep = lambda: self.manager.set_limit(UPLOAD, 0)
+
+        self.manager.throttle(UPLOAD, 'a', LIMIT * 10)
+
+        self.assertAlmostEqual(self.clock.slept, MAX_SLEEP)
+        self.assertEqual(self.manager.get_limit(UPLOAD), 0)
+        # Sin límite no se espera nunca
+        self.manager.throttle(UPLOAD, 'a', LIMIT * 10)
+        self.assertAlmostEqual(self.clock.slept, MAX_SLEEP)
+
+    def test_lowered_limit_applies_to_the_next_block(self):
+        self.share(['a'], seconds=2)
+        self.manager.set_limit(UPLOAD, LIMIT // 4)
+
+        sent = self.share(['a'], seconds=8)
+
+        self.assertAlmostEqual(sent['a'], 8 * LIMIT // 4, delta=0.05 * 8 * LIMIT // 4)
+
+    def test_weight_change_applies_to_running_flows(self):
+        self.share(['a', 'b'], seconds=2)
+        self.manager.set_weight('b', 4.0)
+
+        sent = self.share(['a', 'b'], seconds=10)
+
+        self.assertAlmostEqual(sent['b'] / sent['a'], 4.0, delta=0.2)
+
+
+class ThrottledCallbackTest(BandwidthTestCase):
+
+    def test_out_of_order_reports(self):
+        reports = []
+        callback = ThrottledCallback(self.manager, UPLOAD, 'a', lambda done, total: reports.append(done),
+                                     start=BLOCK)
+
+        for transferred in (BLOCK, 4 * BLOCK, 3 * BLOCK, 5 * BLOCK):
+            callback(transferred, 5 * BLOCK)
+
+        # Lo ya subido (start) no se descuenta y el progreso no retrocede
+        self.assertEqual(reports, [BLOCK, 4 * BLOCK, 5 * BLOCK])
+        self.assertAlmostEqual(self.clock.slept, 4 * BLOCK / LIMIT, delta=0.001)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Un trabajo del pipeline extrae los metadatos una sola vez (user-002)
+
+Uso (desde la raíz del proyecto):
+    python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import contextmanager
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from download import downloader  # noqa: E402
+from download.downloader import YouTubeDownloader  # noqa: E402
+from download.fragment_tuner import FragmentTuner  # noqa: E402
+from download.job_queue import DownloadJob, JobState  # noqa: E402
+from download.metadata_cache import MetadataCache  # noqa: E402
+from download.pipeline import DownloadPipeline  # noqa: E402
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+class FakeYoutubeDL:
+    """YoutubeDL sin red: un único formato progresivo que se "descarga" a un archivo"""
+
+    def __init__(self, params):
+        self.params = params
+
+    def extract_info(self, url, download=True):
+        return {'id': 'dQw4w9WgXcQ', 'title': 'Video', 'extractor_key': 'Youtube',
+                'webpage_url': url, 'ext': 'mp4', 'formats': []}
+
+    def prepare_filename(self, info):
+        return os.path.join(self.params['outtmpl'].rsplit(os.sep, 1)[0], f"{info['title']}.mp4")
+
+    def process_ie_result(self, info, download=True):
+        if download:
+            path = self.prepare_filename(info)
+            with open(path, 'wb') as f:
+                f.write(b'video')
+            info['requested_downloads'] = [{'filepath': path}]
+        return info
+
+
+class FakePool:
+    """Pool de yt-dlp que presta FakeYoutubeDL"""
+
+    @contextmanager
+    def checkout(self, ydl_opts):
+        yield FakeYoutubeDL(dict(ydl_opts))
+
+
+class ExtractionCountTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        # Caché y ajustador propios, para no usar los del usuario
+        patches = [
+            mock.patch.object(downloader, 'get_ydl_pool', FakePool),
+            mock.patch.object(YouTubeDownloader, '_metadata_cache',
+                              MetadataCache(os.path.join(self.tmp.name, 'cache.sqlite3'))),
+            mock.patch.object(YouTubeDownloader, '_fragment_tuner',
+                              FragmentTuner(os.path.join(self.tmp.name, 'fragments.json'))),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        YouTubeDownloader.reset_extraction_count()
+
+    def test_one_extraction_per_job(self):
+        job = DownloadJob(URL, self.tmp.name, is_audio=False, quality="720p", use_archive=False)
+        DownloadPipeline().run(job)
+
+        self.assertEqual(job.state, JobState.COMPLETED, job.message)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'Video.mp4')))
+        self.assertEqual(YouTubeDownloader.get_extraction_count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diario de trabajos: lectura tras un cierre inesperado y compactación (user-006)
+
+Uso (desde la raíz del proyecto):
+    python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from download.job_journal import PHASE_DOWNLOAD, PHASE_UPLOAD, JobJournal  # noqa: E402
+from download.job_queue import DownloadJob, JobState  # noqa: E402
+
+
+def make_job(url="https://example.com/video", **kwargs):
+    return DownloadJob(url, "/tmp", is_audio=False, **kwargs)
+
+
+class JobJournalTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'journal.jsonl')
+
+    def journal(self, **kwargs):
+        kwargs.setdefault('compact_finished', 0)
+        kwargs.setdefault('compact_bytes', 0)
+        return JobJournal(self.path, **kwargs)
+
+    def lines(self):
+        with open(self.path, encoding='utf-8') as f:
+            return f.read().splitlines()
+
+    def finish(self, journal, job):
+        job.finish(JobState.COMPLETED)
+        journal.record_finish(job)
+
+
+class ReplayTest(JobJournalTestCase):
+
+    def test_truncated_last_line_is_ignored(self):
+        journal = self.journal()
+        first, second = make_job(), make_job()
+        journal.record_submit(first)
+        journal.record_phase(first, PHASE_DOWNLOAD, temp_dir=self.tmp.name)
+        journal.record_submit(second)
+        # Cierre inesperado a mitad del registro de fin del segundo
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{"op": "finish", "key": "%s", "st' % second.journal_key)
+
+        reopened = self.journal()
+        entries = {entry['key']: entry for entry in reopened.unfinished()}
+
+        self.assertEqual(set(entries), {first.journal_key, second.journal_key})
+        self.assertEqual(entries[first.journal_key]['phase'], PHASE_DOWNLOAD)
+        self.assertEqual(entries[first.journal_key]['paths'], {'temp_dir': self.tmp.name})
+
+        # Lo que se escribe después no se pierde con la línea truncada
+        self.finish(reopened, second)
+        self.assertEqual([entry['key'] for entry in reopened.unfinished()], [first.journal_key])
+
+    def test_phases_accumulate_paths(self):
+        journal = self.journal()
+        job = make_job()
+        journal.record_submit(job)
+        journal.record_phase(job, PHASE_DOWNLOAD, temp_dir=self.tmp.name)
+        job.title = "Video"
+        journal.record_phase(job, PHASE_UPLOAD, local_file=os.path.join(self.tmp.name, 'v.mp4'))
+
+        entry, = journal.unfinished()
+
+        self.assertEqual(entry['phase'], PHASE_UPLOAD)
+        self.assertEqual(entry['title'], "Video")
+        self.assertEqual(set(entry['paths']), {'temp_dir', 'local_file'})
+
+    def test_claimed_paths_of_unfinished_jobs(self):
+        journal = self.journal()
+        running, done = make_job(), make_job()
+        temp_dir = os.path.join(self.tmp.name, 'job')
+        for job in (running, done):
+            journal.record_submit(job)
+        journal.record_phase(running, PHASE_DOWNLOAD, temp_dir=temp_dir + os.sep,
+                             local_file=os.path.join(temp_dir, 'v.mp4'),
+                             remote_file='relative/v.mp4')
+        journal.record_phase(done, PHASE_DOWNLOAD, temp_dir=os.path.join(self.tmp.name, 'done'))
+        self.finish(journal, done)
+
+        self.assertEqual(journal.claimed_paths(),
+                         {temp_dir, os.path.join(temp_dir, 'v.mp4')})
+
+    def test_password_is_not_written(self):
+        journal = self.journal()
+        ssh_config = {'host': 'example.com', 'port': 22, 'username': 'user',
+                      'password': 'secreto', 'remote_folder': '/srv/videos'}
+        job = make_job(use_ssh=True, ssh_config=ssh_config, max_retries=2)
+        journal.record_submit(job)
+
+        self.assertNotIn('secreto', "\n".join(self.lines()))
+        restored = JobJournal.restore_job(journal.unfinished()[0], ssh_password='otra')
+        self.assertEqual(restored.journal_key, job.journal_key)
+        self.assertEqual(restored.ssh_config, dict(ssh_config, password='otra'))
+        self.assertEqual(restored.max_retries, 2)
+        self.assertTrue(restored.journaled)
+
+
+class CompactionTest(JobJournalTestCase):
+
+    def test_compacts_after_finished_jobs(self):
+        journal = self.journal(compact_finished=3)
+        jobs = [make_job() for _ in range(5)]
+        for job in jobs:
+            journal.record_submit(job)
+        journal.record_phase(jobs[4], PHASE_DOWNLOAD, temp_dir=self.tmp.name)
+        for job in jobs[:2]:
+            self.finish(journal, job)
+        self.assertEqual(len(self.lines()), 8)
+
+        self.finish(journal, jobs[2])
+
+        # Solo quedan los dos sin terminar (alta y fase)
+        self.assertEqual(len(self.lines()), 3)
+        self.assertEqual({entry['key'] for entry in journal.unfinished()},
+                         {jobs[3].journal_key, jobs[4].journal_key})
+
+    def test_compacts_past_the_size_limit(self):
+        journal = self.journal(compact_bytes=4096)
+        for _ in range(100):
+            job = make_job()
+            journal.record_submit(job)
+            self.finish(journal, job)
+
+        self.assertLess(os.path.getsize(self.path), 4096)
+        self.assertEqual(journal.unfinished(), [])
+
+    def test_unfinished_jobs_do_not_compact_on_every_record(self):
+        journal = self.journal(compact_bytes=1024)
+        with mock.patch.object(journal, 'compact', wraps=journal.compact) as compact:
+            jobs = [make_job(f"https://example.com/{i}") for i in range(64)]
+            for job in jobs:
+                journal.record_submit(job)
+
+        # El diario crece por encima del límite: solo se compacta cada vez que dobla su tamaño
+        self.assertGreater(os.path.getsize(self.path), 1024 * 4)
+        self.assertGreaterEqual(compact.call_count, 1)
+        self.assertLessEqual(compact.call_count, 6)
+        self.assertEqual(len(journal.unfinished()), len(jobs))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cola de trabajos: huecos, reintentos, cancelación y pausa (user-001)
+
+Uso (desde la raíz del proyecto):
+    python -m pytest tests
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from download.job_queue import DownloadJob, JobQueue, JobState  # noqa: E402
+
+TIMEOUT = 5
+
+
+def make_job(max_retries=0):
+    return DownloadJob("https://example.com/video", "/tmp", is_audio=False,
+                       max_retries=max_retries)
+
+
+class BlockingRunner:
+    """Runner que no termina hasta que se suelta (o se cancela el trabajo)"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+        self.calls = []
+
+    def __call__(self, job):
+        self.calls.append(job.job_id)
+        self.started.release()
+        while not self.release.is_set() and not job.is_cancelled:
+            self.release.wait(0.01)
+
+    def wait_started(self, count=1):
+        for _ in range(count):
+            if not self.started.acquire(timeout=TIMEOUT):
+                raise AssertionError("el trabajo no llegó a empezar")
+
+
+class JobQueueTest(unittest.TestCase):
+
+    def test_runs_at_most_max_workers(self):
+        runner = BlockingRunner()
+        queue = JobQueue(runner, max_workers=2)
+        jobs = [queue.submit(make_job()) for _ in range(3)]
+        runner.wait_started(2)
+
+        self.assertEqual(queue.active_count(), 2)
+        self.assertEqual(queue.pending_count(), 1)
+        self.assertEqual(jobs[2].state, JobState.PENDING)
+
+        runner.release.set()
+        self.assertTrue(queue.wait_idle(TIMEOUT))
+        self.assertEqual([job.state for job in jobs], [JobState.COMPLETED] * 3)
+
+    def test_failed_job_is_retried(self):
+        def runner(job):
+            if job.attempts == 1:
+                raise RuntimeError("fallo pasajero")
+            job.finish(JobState.COMPLETED, "hecho")
+
+        queue = JobQueue(runner)
+        retried = queue.submit(make_job(max_retries=1))
+        failed = queue.submit(make_job(max_retries=0))
+
+        self.assertTrue(queue.wait_idle(TIMEOUT))
+        self.assertEqual(retried.state, JobState.COMPLETED)
+        self.assertEqual(retried.attempts, 2)
+        self.assertEqual(failed.state, JobState.FAILED)
+        self.assertEqual(failed.result_message, "fallo pasajero")
+        self.assertEqual(failed.attempts, 1)
+
+    def test_cancel_pending_job(self):
+        runner = BlockingRunner()
+        queue = JobQueue(runner, max_workers=1)
+        running = queue.submit(make_job())
+        pending = queue.submit(make_job())
+        runner.wait_started()
+
+        self.assertTrue(queue.cancel(pending.job_id))
+
+        self.assertEqual(pending.state, JobState.CANCELLED)
+        self.assertEqual(queue.pending_count(), 0)
+        runner.release.set()
+        self.assertTrue(queue.wait_idle(TIMEOUT))
+        self.assertEqual(runner.calls, [running.job_id])
+        self.assertFalse(queue.cancel(pending.job_id))
+
+    def test_cancelled_job_is_not_retried(self):
+        runner = BlockingRunner()
+        queue = JobQueue(runner)
+        job = queue.submit(make_job(max_retries=3))
+        runner.wait_started()
+
+        self.assertTrue(queue.cancel(job.job_id))
+
+        self.assertTrue(queue.wait_idle(TIMEOUT))
+        self.assertEqual(job.state, JobState.CANCELLED)
+        self.assertEqual(job.attempts, 1)
+
+    def test_pause_drains_running_jobs(self):
+        runner = BlockingRunner()
+        queue = JobQueue(runner, max_workers=1)
+        first = queue.submit(make_job())
+        runner.wait_started()
+        queue.pause()
+        second = queue.submit(make_job())
+
+        self.assertFalse(queue.wait_running(0.05))
+        runner.release.set()
+        self.assertTrue(queue.wait_running(TIMEOUT))
+        self.assertEqual(first.state, JobState.COMPLETED)
+        self.assertEqual(second.state, JobState.PENDING)
+        self.assertFalse(queue.is_idle())
+
+        queue.resume()
+        self.assertTrue(queue.wait_idle(TIMEOUT))
+        self.assertEqual(second.state, JobState.COMPLETED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Canales de sesión del pool SSH contra el servidor SFTP de prueba (user-021, user-022)
+
+Uso (desde la raíz del proyecto):
+    python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import paramiko
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sftp_server import SFTPStandInServer  # noqa: E402
+from utils import ssh_client  # noqa: E402
+from utils.ssh_pool import SSHPool  # noqa: E402
+from utils.upload_index import UploadIndex  # noqa: E402
+
+
+class SSHPoolTestCase(unittest.TestCase):
+    """Servidor de prueba limitado a MAX_SESSIONS canales y un pool propio"""
+
+    MAX_SESSIONS = 4
+    MAX_CHANNELS = 8
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.server = SFTPStandInServer(max_sessions=self.MAX_SESSIONS)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.config = self.server.config(self.tmp.name)
+        self.pool = SSHPool(max_channels=self.MAX_CHANNELS, keepalive=0)
+        self.addCleanup(self.pool.close)
+
+    def acquire(self):
+        client, message = self.pool.acquire(self.config)
+        self.assertIsNotNone(client, message)
+        self.addCleanup(client.disconnect)
+        return client
+
+
+class RefusedChannelTest(SSHPoolTestCase):
+
+    def test_refused_channel_keeps_the_connection(self):
+        first = self.acquire()
+        # Canales que el pool no ve: el servidor queda lleno
+        extra = [first.client.open_sftp() for _ in range(self.MAX_SESSIONS - 1)]
+        transport = first.client.get_transport()
+
+        second = self.acquire()
+
+        self.assertGreaterEqual(self.server.refused_sessions, 1)
+        self.assertTrue(transport.is_active())
+        self.assertIsNot(second.client, first.client)
+        self.assertEqual(self.pool.stats()['connections'], 2)
+
+        for sftp in extra:
+            sftp.close()
+        # El préstamo que ya tenía su canal sigue funcionando, comandos incluidos
+        self.assertEqual(first.run_command('true')[0], 0)
+        self.assertTrue(first.create_directory(self.tmp.name + '/dir')[0])
+
+
+class ChannelAccountingTest(SSHPoolTestCase):
+
+    MAX_CHANNELS = 4
+
+    def setUp(self):
+        super().setUp()
+        # Índice de subidas propio, para no usar el del usuario
+        index = UploadIndex(os.path.join(self.tmp.name, 'index.sqlite3'))
+        patch = mock.patch.object(ssh_client, 'get_upload_index', lambda: index)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_parallel_upload_and_commands_share_the_channels(self):
+        client = self.acquire()
+        local_path = os.path.join(self.tmp.name, 'local.bin')
+        with open(local_path, 'wb') as f:
+            f.write(os.urandom(6 * 1024 * 1024))
+
+        done = threading.Event()
+        statuses = []
+        peak = [0]
+
+        def commands():
+            while not done.is_set():
+                statuses.append(client.run_command('true')[0])
+                peak[0] = max(peak[0], self.pool.stats()['channels'])
+
+        thread = threading.Thread(target=commands)
+        thread.start()
+        try:
+            ok, message = client.upload_file(
+                local_path, os.path.join(self.tmp.name, 'remote.bin'),
+                streams=4, chunk_size=256 * 1024, dedup=False
+            )
+        finally:
+            done.set()
+            thread.join()
+
+        self.assertTrue(ok, message)
+        self.assertTrue(statuses)
+        self.assertEqual(set(statuses), {0})
+        self.assertEqual(self.server.refused_sessions, 0)
+        self.assertLessEqual(peak[0], self.MAX_CHANNELS)
+        # Solo queda abierto el canal SFTP del préstamo
+        self.assertEqual(self.pool.stats()['channels'], 1)
+
+        client.disconnect()
+        stats = self.pool.stats()
+        self.assertEqual(stats['leased'], 0)
+        self.assertEqual(stats['channels'], stats['idle_channels'])
+
+    def test_extra_channels_leave_one_for_commands(self):
+        client = self.acquire()
+        extra = []
+        while True:
+            sftp = self.pool.open_channel(client)
+            if sftp is None:
+                break
+            extra.append(sftp)
+        self.assertEqual(len(extra), self.MAX_CHANNELS - 2)
+
+        with self.pool.channel_slot(client):
+            with self.assertRaises(paramiko.SSHException):
+                with self.pool.channel_slot(client, timeout=0.1):
+                    pass
+        self.assertEqual(client.run_command('true')[0], 0)
+
+        for sftp in extra:
+            self.pool.close_channel(client, sftp)
+        self.assertEqual(self.pool.stats()['channels'], 1)
+        self.assertEqual(self.server.refused_sessions, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Subidas por SFTP contra el servidor de prueba: reanudación (user-023),
+comprobación del hash (user-024) y deduplicación (user-025)
+
+Uso (desde la raíz del proyecto):
+    python -m pytest tests
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import sftp_server  # noqa: E402
+from benchmarks.sftp_server import SFTPStandInServer  # noqa: E402
+from config import UPLOAD_PART_SUFFIX, UPLOAD_VERIFY_RETRIES  # noqa: E402
+from download.job_journal import PHASE_UPLOAD  # noqa: E402
+from download.telemetry import JobTelemetry  # noqa: E402
+from utils import ssh_client  # noqa: E402
+from utils.ssh_client import SSHClient  # noqa: E402
+from utils.upload_index import UploadIndex  # noqa: E402
+
+CHUNK_SIZE = 256 * 1024
+
+
+class UploadTestCase(unittest.TestCase):
+    """Archivo local aleatorio, servidor de prueba y una conexión directa"""
+
+    SIZE = 3 * 1024 * 1024 + 777
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        # Índice de subidas propio, para no usar el del usuario
+        self.index = UploadIndex(os.path.join(self.tmp.name, 'index.sqlite3'))
+        patch = mock.patch.object(ssh_client, 'get_upload_index', lambda: self.index)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        self.server = SFTPStandInServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        config = self.server.config(self.tmp.name)
+        self.client = SSHClient()
+        ok, message = self.client.connect(config['host'], config['port'],
+                                          config['username'], config['password'])
+        self.assertTrue(ok, message)
+        self.addCleanup(self.client.disconnect)
+
+        self.data = os.urandom(self.SIZE)
+        self.local_path = os.path.join(self.tmp.name, 'local.bin')
+        with open(self.local_path, 'wb') as f:
+            f.write(self.data)
+        self.remote_path = os.path.join(self.tmp.name, 'remote', 'video.mp4')
+        self.part_path = self.remote_path + UPLOAD_PART_SUFFIX
+
+    def upload(self, remote_path=None, **kwargs):
+        """
+        Sube el archivo local con la telemetría del pipeline: la transferencia
+        empieza en el primer informe de progreso
+
+        Returns:
+            tuple: (ok, mensaje, informes de progreso, bytes contados en la subida)
+        """
+        telemetry = JobTelemetry()
+        telemetry.start_phase(PHASE_UPLOAD)
+        reports = []
+
+        def progress(transferred, total):
+            if reports:
+                telemetry.transfer(transferred, total)
+            else:
+                telemetry.start_transfer(transferred)
+            reports.append(transferred)
+
+        ok, message = self.client.upload_file(
+            self.local_path, remote_path or self.remote_path,
+            progress_callback=progress, chunk_size=CHUNK_SIZE, **kwargs
+        )
+        return ok, message, reports, telemetry.phases[PHASE_UPLOAD][1]
+
+    def write_part(self, data):
+        os.makedirs(os.path.dirname(self.part_path), exist_ok=True)
+        with open(self.part_path, 'wb') as f:
+            f.write(data)
+
+    def read_remote(self, path=None):
+        with open(path or self.remote_path, 'rb') as f:
+            return f.read()
+
+
+class ResumeTest(UploadTestCase):
+
+    PREFIX = 1024 * 1024
+
+    def test_resume_continues_a_valid_prefix(self):
+        for streams in (1, 4):
+            with self.subTest(streams=streams):
+                self.write_part(self.data[:self.PREFIX])
+
+                ok, message, reports, sent = self.upload(resume=True, streams=streams, dedup=False)
+
+                self.assertTrue(ok, message)
+                self.assertIn("reanudado", message)
+                self.assertEqual(reports[0], self.PREFIX)
+                self.assertEqual(sent, self.SIZE - self.PREFIX)
+                self.assertEqual(self.read_remote(), self.data)
+                self.assertFalse(os.path.exists(self.part_path))
+
+    def test_resume_restarts_after_a_corrupted_prefix(self):
+        for streams in (1, 4):
+            with self.subTest(streams=streams):
+                # Lo último escrito es lo que se comprueba siempre
+                self.write_part(self.data[:self.PREFIX - 5] + b'XXXXX')
+
+                ok, message, reports, sent = self.upload(resume=True, streams=streams, dedup=False)
+
+                self.assertTrue(ok, message)
+                self.assertNotIn("reanudado", message)
+                self.assertEqual(reports[0], 0)
+                self.assertEqual(sent, self.SIZE)
+                self.assertEqual(self.read_remote(), self.data)
+                self.assertFalse(os.path.exists(self.part_path))
+
+
+
+class ChecksumTest(UploadTestCase):
+
+    def corrupt_writes(self, attempts):
+        """El servidor estropea el primer byte de los ``attempts`` primeros envíos"""
+        write = sftp_server._Handle.write
+        corrupted = []
+
+        def corrupt(handle, offset, data):
+            if offset == 0 and len(corrupted) < attempts:
+                corrupted.append(offset)
+                data = bytes([data[0] ^ 0xFF]) + data[1:]
+            return write(handle, offset, data)
+
+        patch = mock.patch.object(sftp_server._Handle, 'write', corrupt)
+        patch.start()
+        self.addCleanup(patch.stop)
+        return corrupted
+
+    def test_mismatch_is_uploaded_again(self):
+        corrupted = self.corrupt_writes(1)
+
+        ok, message, reports, sent = self.upload(streams=4)
+
+        self.assertTrue(ok, message)
+        self.assertEqual(len(corrupted), 1)
+        self.assertEqual(sent, 2 * self.SIZE)
+        self.assertEqual(self.read_remote(), self.data)
+        self.assertFalse(os.path.exists(self.part_path))
+
+    def test_persistent_mismatch_keeps_the_part(self):
+        for streams in (1, 4):
+            with self.subTest(streams=streams):
+                self.corrupt_writes(UPLOAD_VERIFY_RETRIES + 1)
+
+                ok, message, reports, sent = self.upload(streams=streams)
+
+                self.assertFalse(ok)
+                self.assertIn("hash", message)
+                self.assertFalse(os.path.exists(self.remote_path))
+                self.assertEqual(os.path.getsize(self.part_path), self.SIZE)
+                self.assertIsNone(self.index.get(self.client._server_key(), self.remote_path))
+
+
+
+class LinkedUploadTest(UploadTestCase):
+
+    def test_identical_upload_is_linked(self):
+        ok, message, _, _ = self.upload()
+        self.assertTrue(ok, message)
+        copy_path = os.path.join(self.tmp.name, 'other', 'copy.mp4')
+
+        ok, message, reports, sent = self.upload(copy_path)
+
+        self.assertTrue(ok, message)
+        self.assertIn("enlazado", message)
+        self.assertEqual(reports, [self.SIZE])
+        self.assertTrue(any(command.startswith('ln ') for command in self.server.commands))
+        self.assertEqual(self.read_remote(copy_path), self.data)
+        self.assertEqual(self.index.get(self.client._server_key(), copy_path)[1],
+                         hashlib.sha256(self.data).hexdigest())
+
+
+class ParallelUploadTest(UploadTestCase):
+
+    def test_error_keeps_the_contiguous_prefix(self):
+        class LinkLost(Exception):
+            pass
+
+        def progress(transferred, total):
+            if transferred > total // 2:
+                raise LinkLost("conexión perdida")
+
+        ok, message = self.client.upload_file(
+            self.local_path, self.remote_path, progress_callback=progress,
+            streams=4, chunk_size=CHUNK_SIZE, dedup=False
+        )
+
+        self.assertFalse(ok)
+        self.assertIn("conexión perdida", message)
+        part = self.read_remote(self.part_path)
+        self.assertEqual(len(part) % CHUNK_SIZE, 0)
+        self.assertEqual(part, self.data[:len(part)])
+
+        ok, message, reports, sent = self.upload(resume=True, streams=4, dedup=False)
+
+        self.assertTrue(ok, message)
+        self.assertEqual(reports[0], len(part))
+        self.assertEqual(self.read_remote(), self.data)
+
+    def test_digest_of_out_of_order_chunks(self):
+        expected = hashlib.sha256(self.data).hexdigest()
+        # El segundo caso sigue un prefijo que no acaba en un límite de trozo
+        for prefix in (0, CHUNK_SIZE + 1000):
+            with self.subTest(prefix=prefix):
+                self.write_part(self.data[:prefix])
+
+                ok, message, reports, _ = self.upload(resume=True, streams=4)
+
+                self.assertTrue(ok, message)
+                self.assertEqual(reports[0], prefix)
+                self.assertEqual(self.index.get(self.client._server_key(), self.remote_path),
+                                 (self.SIZE, expected))
+                os.remove(self.remote_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planificador por etapas: huecos, contrapresión y cancelación en espera (user-012)
+
+Uso (desde la raíz del proyecto):
+    python -m pytest tests
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from download import stages  # noqa: E402
+from download.job_queue import DownloadJob  # noqa: E402
+from download.progress_hook import DownloadCancelled  # noqa: E402
+from download.stages import (  # noqa: E402
+    STAGE_DOWNLOAD, STAGE_PROCESS, STAGE_TRANSCRIBE, STAGE_UPLOAD, StageScheduler
+)
+
+TIMEOUT = 5
+
+
+def make_job():
+    return DownloadJob("https://example.com/video", "/tmp", is_audio=False)
+
+
+class StageSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        # Cancelaciones detectadas sin esperar medio segundo
+        patch = mock.patch.object(stages, '_WAIT_POLL', 0.01)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def scheduler(self, upload=1, queue_size=1):
+        return StageScheduler({STAGE_DOWNLOAD: 3, STAGE_PROCESS: 1, STAGE_UPLOAD: upload,
+                               STAGE_TRANSCRIBE: 1}, queue_size=queue_size)
+
+    def enter_in_background(self, scheduler, job, stage):
+        """
+        Llama a enter() en otro hilo y espera a que se quede esperando
+
+        Returns:
+            tuple: (hilo, lista donde se guarda la excepción de enter() si la hay)
+        """
+        waiting = threading.Event()
+        errors = []
+
+        def run():
+            try:
+                scheduler.enter(job, stage, on_wait=waiting.set)
+            except DownloadCancelled as e:
+                errors.append(e)
+            waiting.set()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self.assertTrue(waiting.wait(TIMEOUT))
+        self.addCleanup(thread.join, TIMEOUT)
+        return thread, errors
+
+    def wait_until(self, predicate):
+        deadline = time.monotonic() + TIMEOUT
+        while not predicate():
+            if time.monotonic() > deadline:
+                self.fail("el planificador no llegó al estado esperado")
+            time.sleep(0.01)
+
+    def busy(self, scheduler):
+        return {name: (stage['busy'], stage['waiting']) for name, stage in scheduler.stats().items()}
+
+    def test_capacity_counts_slots_and_queues(self):
+        scheduler = self.scheduler(upload=2, queue_size=1)
+        self.assertEqual(scheduler.capacity(), (3 + 1 + 2 + 1) + 4)
+
+        scheduler.set_workers(STAGE_UPLOAD, 4)
+        self.assertEqual(scheduler.get_workers(STAGE_UPLOAD), 4)
+        self.assertEqual(scheduler.capacity(), (3 + 1 + 4 + 1) + 4)
+
+    def test_full_queue_holds_the_previous_stage(self):
+        scheduler = self.scheduler(upload=1, queue_size=1)
+        uploading, queued, blocked = make_job(), make_job(), make_job()
+        for job in (uploading, queued, blocked):
+            scheduler.enter(job, STAGE_DOWNLOAD)
+        scheduler.enter(uploading, STAGE_UPLOAD)
+
+        # El primero en esperar suelta la descarga; con la cola llena, el siguiente no
+        queued_thread, _ = self.enter_in_background(scheduler, queued, STAGE_UPLOAD)
+        blocked_thread, _ = self.enter_in_background(scheduler, blocked, STAGE_UPLOAD)
+
+        self.assertEqual(self.busy(scheduler)[STAGE_DOWNLOAD], (1, 0))
+        self.assertEqual(self.busy(scheduler)[STAGE_UPLOAD], (1, 1))
+        self.assertEqual(blocked.stage, STAGE_DOWNLOAD)
+
+        scheduler.leave(uploading)
+        queued_thread.join(TIMEOUT)
+        self.assertEqual(queued.stage, STAGE_UPLOAD)
+        # Ahora cabe en la cola y suelta la descarga
+        self.wait_until(lambda: self.busy(scheduler)[STAGE_DOWNLOAD] == (0, 0))
+        self.assertEqual(self.busy(scheduler)[STAGE_UPLOAD], (1, 1))
+
+        scheduler.leave(queued)
+        blocked_thread.join(TIMEOUT)
+        self.assertEqual(blocked.stage, STAGE_UPLOAD)
+        scheduler.leave(blocked)
+        self.assertEqual(set(self.busy(scheduler).values()), {(0, 0)})
+
+    def test_cancel_while_waiting_for_the_queue(self):
+        scheduler = self.scheduler(upload=1, queue_size=0)
+        uploading, waiting = make_job(), make_job()
+        scheduler.enter(uploading, STAGE_UPLOAD)
+        scheduler.enter(waiting, STAGE_DOWNLOAD)
+        thread, errors = self.enter_in_background(scheduler, waiting, STAGE_UPLOAD)
+
+        waiting.cancel()
+        thread.join(TIMEOUT)
+
+        self.assertEqual(len(errors), 1)
+        # Suelta también la etapa que conservaba
+        self.assertEqual(self.busy(scheduler)[STAGE_DOWNLOAD], (0, 0))
+        self.assertEqual(self.busy(scheduler)[STAGE_UPLOAD], (1, 0))
+        self.assertEqual(uploading.stage, STAGE_UPLOAD)
+
+    def test_cancel_while_waiting_for_a_slot(self):
+        scheduler = self.scheduler(upload=1, queue_size=1)
+        uploading, waiting = make_job(), make_job()
+        scheduler.enter(uploading, STAGE_UPLOAD)
+        scheduler.enter(waiting, STAGE_DOWNLOAD)
+        thread, errors = self.enter_in_background(scheduler, waiting, STAGE_UPLOAD)
+        self.assertEqual(self.busy(scheduler)[STAGE_UPLOAD], (1, 1))
+
+        waiting.cancel()
+        thread.join(TIMEOUT)
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(self.busy(scheduler)[STAGE_UPLOAD], (1, 0))
+        scheduler.leave(waiting)
+        scheduler.leave(uploading)
+        self.assertEqual(set(self.busy(scheduler).values()), {(0, 0)})
+
+    def test_keep_current_holds_both_stages(self):
+        scheduler = self.scheduler()
+        job = make_job()
+        scheduler.enter(job, STAGE_DOWNLOAD)
+        scheduler.enter(job, STAGE_UPLOAD, keep_current=True)
+
+        self.assertEqual(self.busy(scheduler)[STAGE_DOWNLOAD], (1, 0))
+        self.assertEqual(self.busy(scheduler)[STAGE_UPLOAD], (1, 0))
+
+        scheduler.leave(job)
+        self.assertIsNone(job.stage)
+        self.assertEqual(set(self.busy(scheduler).values()), {(0, 0)})
+
+
+if __name__ == '__main__':
+    unittest.main()
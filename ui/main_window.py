@@ -2,34 +2,34 @@
 # -*- coding: utf-8 -*-
 """
 Ventana principal de la aplicacion.
-Orquesta los widgets de ui/widgets/ y gestiona la descarga en hilo.
+Orquesta los widgets de ui/widgets/ y gestiona la cola de descargas.
 """
 
 import logging
-import os
-import tempfile
-import time
-import glob
 import threading
-from threading import Thread
+import time
 
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QTabWidget, QScrollArea, QMessageBox, QSizePolicy
 )
-from PySide6.QtCore import Qt, QObject, Signal
+from PySide6.QtCore import Qt, QObject, Signal, QTimer
 from PySide6.QtGui import QFont, QShortcut, QKeySequence
 
 from config import (
-    APP_NAME, APP_VERSION,
+    APP_NAME, APP_VERSION, PLAYLIST_ENTRY_RETRIES, JOB_WEIGHT_BULK, JOB_WEIGHT_PRIORITY,
+    PROGRESS_RATE_HZ,
     WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_X, WINDOW_Y,
     MATRIX_COLORS
 )
-from download.progress_hook import DownloadProgressHook, DownloadCancelled
-from download.downloader import YouTubeDownloader
-from download.transcriber import AudioTranscriber
+from download.progress_hook import DownloadProgressHook, ProgressAggregator
+from download.job_queue import DownloadJob, JobQueue, JobState
+from download.playlist import looks_like_playlist, iter_playlist_entries
+from download.job_journal import JobJournal
+from download.telemetry import TelemetryLog
+from download.stages import StageScheduler, STAGE_DOWNLOAD
 from utils.validators import InputValidator
-from utils.ssh_client import SSHClient
+from utils.bandwidth import DOWNLOAD, UPLOAD, get_bandwidth_manager
 from utils.config_manager import SSHConfigManager
 from utils.app_settings import AppSettings
 
@@ -39,6 +39,7 @@ from ui.widgets.options_widget import OptionsWidget
 from ui.widgets.local_tab import LocalTab
 from ui.widgets.ssh_tab import SSHTab
 from ui.widgets.progress_widget import ProgressWidget
+from ui.widgets.jobs_widget import JobsWidget
 
 logger = logging.getLogger(__name__)
 
@@ -52,7 +53,8 @@ class DownloadSignals(QObject):
     message = Signal(str, str)              # mensaje, tipo
     progress_update = Signal(int, str)      # porcentaje, mensaje
     show_dialog = Signal(str, str, str)     # titulo, mensaje, tipo (info/error/warning)
-    download_finished = Signal(bool, str, str)  # exito, mensaje, titulo
+    job_updated = Signal(int)               # id de trabajo
+    submit_job = Signal(object)             # DownloadJob
 
 
 # ---------------------------------------------------------------------------
@@ -64,31 +66,68 @@ class YouTubeDownloaderApp(QMainWindow):
 
     def __init__(self):
         super().__init__()
-        self.download_thread = None
-        self.progress_hook = None
-        self._cancel_event = threading.Event()
 
         # Managers
         self.config_manager = SSHConfigManager()
         self.app_settings = AppSettings()
 
+        # Crash-safe journal of every job (resumed on next start)
+        self.journal = JobJournal()
+        # Result and per-phase timings of every finished job
+        self.telemetry_log = TelemetryLog()
+
+        # UI-agnostic pipeline run by the queue: one thread per job, with
+        # separate slots per stage so downloads, uploads and transcriptions overlap.
+        # The pipeline pulls in yt-dlp and paramiko, so it is built after the
+        # window is shown (see _start_warmup) or by the first job, whichever comes first
+        self.stages = StageScheduler(
+            {STAGE_DOWNLOAD: self.app_settings.get_max_concurrent_jobs()}
+        )
+        self.pipeline = None
+        self._pipeline_lock = threading.Lock()
+        self.job_queue = JobQueue(self._run_job, max_workers=self.stages.capacity())
+        self._batch_results = []
+        self._expansion_cancel = threading.Event()
+        self._expansions = []
+        self._reported_jobs = set()
+
         # Thread-safe signals
         self.download_signals = DownloadSignals()
         self.download_signals.message.connect(self._on_signal_message)
         self.download_signals.progress_update.connect(self._on_signal_progress)
         self.download_signals.show_dialog.connect(self.show_dialog_safe)
-        self.download_signals.download_finished.connect(self.on_download_finished)
+        self.download_signals.job_updated.connect(self._on_job_updated)
+        self.download_signals.submit_job.connect(self._submit_job)
+        self.job_queue.add_listener(
+            lambda job: self.download_signals.job_updated.emit(job.job_id)
+        )
+
+        # Shared bandwidth budget: per-job weights, limits applied live
+        self.bandwidth = get_bandwidth_manager()
+        download_kbps, upload_kbps = self.app_settings.get_bandwidth_limits()
+        self.bandwidth.set_limit(DOWNLOAD, download_kbps * 1024)
+        self.bandwidth.set_limit(UPLOAD, upload_kbps * 1024)
+        self.job_queue.add_listener(
+            lambda job: job.is_finished and self.bandwidth.release(job.job_id)
+        )
+
+        self.job_queue.add_listener(self.journal.on_job_update)
+        self.job_queue.add_listener(self.telemetry_log.on_job_update)
+
+        # Job progress is collected from the worker threads and applied to
+        # the widgets in one batch per tick (see _flush_progress)
+        self.progress_aggregator = ProgressAggregator()
 
         # Build UI
         self.init_ui()
         self.setStyleSheet(app_stylesheet())
         self.setWindowTitle(f"{APP_NAME} v{APP_VERSION}")
 
-        # Load saved SSH configs
-        self.ssh_tab.load_saved_configs()
-
-        # Cleanup leftover temp files from previous sessions
-        self._cleanup_temp_files()
+        # Deferred until the event loop runs, i.e. after the first frame:
+        # saved SSH configs, then the offer to resume unfinished jobs, which
+        # starts the warm-up thread (heavy imports + temp cleanup)
+        QTimer.singleShot(0, self.ssh_tab.load_saved_configs)
+        QTimer.singleShot(0, self._restore_journal)
 
     # ------------------------------------------------------------------
     # UI construction
@@ -151,6 +190,22 @@ class YouTubeDownloaderApp(QMainWindow):
         self.destination_tabs.addTab(self.ssh_tab, "SSH")
         main_layout.addWidget(self.destination_tabs)
 
+        # -- Job queue widget (one row per job) --
+        self.jobs = JobsWidget(
+            self.stages.get_workers(STAGE_DOWNLOAD), self.app_settings.get_bandwidth_limits()
+        )
+        main_layout.addWidget(self.jobs)
+
+        # Progress of every job, applied together PROGRESS_RATE_HZ times per second
+        self.progress_timer = QTimer(self)
+        self.progress_timer.timeout.connect(self._flush_progress)
+        self.progress_timer.start(int(1000 / PROGRESS_RATE_HZ))
+
+        # Per-stage utilization, sampled once per second
+        self.stage_timer = QTimer(self)
+        self.stage_timer.timeout.connect(self._refresh_stage_stats)
+        self.stage_timer.start(1000)
+
         # -- Progress widget (bar + status + log) --
         self.progress = ProgressWidget()
         main_layout.addWidget(self.progress)
@@ -162,7 +217,7 @@ class YouTubeDownloaderApp(QMainWindow):
         self.download_button.setStyleSheet(download_button_style())
         self.download_button.clicked.connect(self.start_download)
 
-        self.cancel_button = QPushButton("CANCELAR")
+        self.cancel_button = QPushButton("CANCELAR TODO")
         self.cancel_button.setStyleSheet(cancel_button_style())
         self.cancel_button.clicked.connect(self.cancel_download)
         self.cancel_button.setVisible(False)
@@ -178,9 +233,13 @@ class YouTubeDownloaderApp(QMainWindow):
         self.source.url_changed.connect(self._on_url_changed)
         self.ssh_tab.message.connect(self.progress.add_message)
         self.destination_tabs.currentChanged.connect(self._on_tab_changed)
+        self.jobs.max_workers_changed.connect(self._on_max_workers_changed)
+        self.jobs.cancel_requested.connect(self.cancel_job)
+        self.jobs.priority_requested.connect(self.prioritize_job)
+        self.jobs.bandwidth_changed.connect(self._on_bandwidth_changed)
+        self.jobs.clear_finished_requested.connect(self._clear_finished_jobs)
 
         # Initial tab state — delay so widgets have valid sizeHints
-        from PySide6.QtCore import QTimer
         QTimer.singleShot(0, lambda: self._on_tab_changed(0))
 
         # -- Keyboard shortcuts --
@@ -199,6 +258,85 @@ class YouTubeDownloaderApp(QMainWindow):
         """Route download-thread progress to progress widget"""
         self.progress.update_progress(percent, message)
 
+    def _flush_progress(self):
+        """Apply the progress gathered since the last tick to the rows and the overall bar"""
+        updates = self.progress_aggregator.drain()
+        if not updates:
+            return
+        for job_id, (percent, message) in updates.items():
+            job = self.job_queue.get_job(job_id)
+            # A late update must not overwrite the final state of the row
+            if job is None or job.is_finished:
+                continue
+            job.progress = percent
+            job.message = message
+            self.jobs.update_job_progress(job_id, percent, message)
+        self._refresh_overall_progress()
+
+    def _on_job_updated(self, job_id: int):
+        """Refresh a job's row after a state change"""
+        job = self.job_queue.get_job(job_id)
+        if job is None:
+            return
+        self.jobs.update_job(job)
+        self._refresh_overall_progress()
+        if job.is_finished and job.job_id not in self._reported_jobs:
+            self._reported_jobs.add(job.job_id)
+            if job.state == JobState.COMPLETED:
+                self._remember_folder(job)
+            self.on_download_finished(job)
+
+    def _remember_folder(self, job: DownloadJob):
+        """Remember the destination of a completed job for next time"""
+        if job.use_ssh:
+            if job.ssh_config.get('remote_folder'):
+                self.app_settings.set_last_remote_folder(job.ssh_config['remote_folder'])
+        elif job.output_folder:
+            self.app_settings.set_last_local_folder(job.output_folder)
+
+    def _on_max_workers_changed(self, count: int):
+        """Resize the download stage (and the queue feeding it) and remember the preference"""
+        self.stages.set_workers(STAGE_DOWNLOAD, count)
+        self.job_queue.set_max_workers(self.stages.capacity())
+        self.app_settings.set_max_concurrent_jobs(count)
+
+    def _refresh_stage_stats(self):
+        """Show how busy each pipeline stage is, and how often SSH connections are reused"""
+        ssh_stats = None
+        if self.pipeline is not None:
+            # Loaded with the pipeline, so this never pulls paramiko in early
+            from utils.ssh_pool import get_ssh_pool
+            ssh_stats = get_ssh_pool().stats()
+        self.jobs.set_stage_stats(self.stages.stats(), ssh_stats)
+
+    def _on_bandwidth_changed(self, download_kbps: int, upload_kbps: int):
+        """Apply new bandwidth limits to running transfers and remember them"""
+        self.bandwidth.set_limit(DOWNLOAD, download_kbps * 1024)
+        self.bandwidth.set_limit(UPLOAD, upload_kbps * 1024)
+        self.app_settings.set_bandwidth_limits(download_kbps, upload_kbps)
+
+    def _clear_finished_jobs(self):
+        """Forget finished jobs and drop their rows"""
+        finished = [job.job_id for job in self.job_queue.jobs() if job.is_finished]
+        self.job_queue.remove_finished()
+        self.jobs.remove_jobs(finished)
+
+    def _refresh_overall_progress(self):
+        """Show the average progress of running jobs in the main progress bar"""
+        running = self.job_queue.active_count()
+        pending = self.job_queue.pending_count()
+        self.jobs.set_summary(running, pending)
+        active = [j for j in self.job_queue.jobs() if j.state == JobState.RUNNING]
+        if not active:
+            return
+        if len(active) == 1:
+            self.progress.update_progress(active[0].progress, active[0].message)
+            return
+        percent = sum(j.progress for j in active) // len(active)
+        self.progress.update_progress(
+            percent, f"{running} DESCARGAS EN CURSO, {pending} EN COLA"
+        )
+
     def _on_url_changed(self, text: str):
         """Validate URL visually as the user types"""
         url = text.strip()
@@ -230,16 +368,52 @@ class YouTubeDownloaderApp(QMainWindow):
             + self.destination_tabs.tabBar().sizeHint().height() + 10
         )
 
+    # ------------------------------------------------------------------
+    # Pipeline (lazy) and warm-up
+    # ------------------------------------------------------------------
+
+    def _get_pipeline(self):
+        """
+        Build the download pipeline on first use.
+
+        Importing it loads yt-dlp and paramiko, and leftover temp files are
+        removed before any job can create new ones. Thread-safe: a job that
+        starts during the warm-up waits here for it to finish.
+        """
+        with self._pipeline_lock:
+            if self.pipeline is None:
+                started = time.perf_counter()
+                from download.pipeline import DownloadPipeline, cleanup_temp_files
+
+                cleanup_temp_files(self.journal.claimed_paths())
+                self.pipeline = DownloadPipeline(
+                    journal=self.journal, on_message=self._job_message, stages=self.stages
+                )
+                logger.info("Download pipeline ready in %.0f ms",
+                            (time.perf_counter() - started) * 1000)
+            return self.pipeline
+
+    def _run_job(self, job: DownloadJob):
+        """Queue runner: hand the job to the pipeline (runs on a worker thread)"""
+        self._get_pipeline().run(job)
+
+    def _start_warmup(self):
+        """Load the pipeline in the background so the first download starts at once"""
+        threading.Thread(target=self._warmup, name="startup-warmup", daemon=True).start()
+
+    def _warmup(self):
+        try:
+            self._get_pipeline()
+        except Exception:
+            # The first job will retry and report the error
+            logger.exception("Background warm-up failed")
+
     # ------------------------------------------------------------------
     # Download lifecycle
     # ------------------------------------------------------------------
 
     def start_download(self):
-        """Validates inputs and starts the download in a background thread"""
-        # Prevent double-start
-        if self.download_thread and self.download_thread.is_alive():
-            return
-
+        """Validates inputs and enqueues a download job"""
         # -- Validate URL --
         url = self.source.get_url()
         platform = self.source.get_platform()
@@ -288,328 +462,138 @@ class YouTubeDownloaderApp(QMainWindow):
         quality = self.options.get_quality() if not is_audio else None
         transcribe = self.options.should_transcribe()
         whisper_model = self.options.get_whisper_model()
-
-        # -- UI feedback --
-        self.download_button.setEnabled(False)
-        self.cancel_button.setVisible(True)
-        self.progress.update_progress(0, "DESCARGANDO...")
-
-        # -- Progress hook --
-        self.progress_hook = DownloadProgressHook(cancel_event=self._cancel_event)
-        self.progress_hook.progress.connect(self.progress.update_progress)
-
-        # Reset cancel event
-        self._cancel_event.clear()
+        use_archive = self.options.should_skip_archived()
 
         # -- Save format preference --
         fmt = 'audio' if is_audio else 'video'
         self.app_settings.set_default_format(fmt)
 
-        # -- Launch thread --
-        self.download_thread = Thread(
-            target=self.download_video,
-            args=(url, output_folder, is_audio, quality,
-                  use_ssh, ssh_config, transcribe, whisper_model),
-            daemon=True
+        job_options = dict(
+            output_folder=output_folder, is_audio=is_audio, quality=quality,
+            use_ssh=use_ssh, ssh_config=ssh_config,
+            transcribe=transcribe, whisper_model=whisper_model,
+            use_archive=use_archive
         )
-        self.download_thread.start()
 
-    def cancel_download(self):
-        """Signals the download thread to stop"""
-        if not self._cancel_event.is_set():
-            self._cancel_event.set()
-            self.download_signals.message.emit("Cancelando descarga...", "warning")
-            self.progress.update_progress(0, "CANCELADO")
-            self.download_button.setEnabled(True)
-            self.cancel_button.setVisible(False)
+        # -- Playlists: expand into one job per entry --
+        if self.options.should_expand_playlists() and looks_like_playlist(url):
+            self._expansion_cancel.clear()
+            self.cancel_button.setVisible(True)
+            self.progress.add_message(f"Expandiendo lista: {url}", "info")
+            expansion = threading.Thread(
+                target=self._expand_playlist, args=(url, job_options),
+                name="playlist-expansion", daemon=True
+            )
+            self._expansions = [t for t in self._expansions if t.is_alive()]
+            self._expansions.append(expansion)
+            expansion.start()
+            self.source.url_input.clear()
+            return
 
-    # ------------------------------------------------------------------
-    # Download logic (runs in background thread)
-    # ------------------------------------------------------------------
+        # -- Enqueue job --
+        self._submit_job(DownloadJob(url, **job_options))
+        self.source.url_input.clear()
 
-    def download_video(self, url, output_folder, is_audio, quality,
-                       use_ssh=False, ssh_config=None,
-                       transcribe=False, whisper_model="base"):
+    def _expand_playlist(self, url: str, job_options: dict):
         """
-        Core download logic executed in a daemon thread.
+        Lists playlist entries lazily and enqueues one job per entry.
 
-        Handles: local download, SSH upload, and optional transcription.
-        Checks self._cancel_event before every major phase.
+        Runs in a background thread; jobs are handed to the GUI thread as
+        soon as each entry is known, so the first download starts after the
+        first page of the playlist instead of after the whole listing.
         """
-        temp_output_dir = None
-        actual_file = None
-
+        count = 0
         try:
-            # ── Phase 0: get video info ─────────────────────────────
-            if self._cancel_event.is_set():
-                return
-
-            info = YouTubeDownloader.get_video_info(url)
-            video_title = info.get('title', 'Video')
-
-            self.progress_hook.progress.emit(0, f"Iniciando descarga: {video_title}")
+            for entry in iter_playlist_entries(url, self._expansion_cancel):
+                job = DownloadJob(
+                    entry['url'], max_retries=PLAYLIST_ENTRY_RETRIES,
+                    weight=JOB_WEIGHT_BULK, **job_options
+                )
+                job.title = entry.get('title')
+                self.download_signals.submit_job.emit(job)
+                count += 1
+        except Exception as e:
+            logger.exception("Playlist expansion failed: %s", url)
             self.download_signals.message.emit(
-                f"Iniciando descarga: {video_title}", "info"
+                f"Error al expandir la lista: {e}", "error"
             )
+            return
+        self.download_signals.message.emit(
+            f"Lista expandida: {count} entradas en cola", "success"
+        )
 
-            # ── Phase 1: download ──────────────────────────────────
-            if self._cancel_event.is_set():
-                return
-
-            if use_ssh:
-                # Download to a temp directory first
-                temp_output_dir = os.path.join(
-                    tempfile.gettempdir(), "youtube_download"
-                )
-                os.makedirs(temp_output_dir, exist_ok=True)
-
-                files_before = set(os.listdir(temp_output_dir)) if os.path.exists(temp_output_dir) else set()
-
-                if is_audio:
-                    temp_output = os.path.join(temp_output_dir, "%(title)s.%(ext)s")
-                else:
-                    temp_output = os.path.join(temp_output_dir, f"{video_title}.mp4")
-
-                self.download_signals.message.emit(
-                    "Descargando a carpeta temporal...", "info"
-                )
-                success, message, title = YouTubeDownloader.download(
-                    url, temp_output, is_audio, quality, self.progress_hook
-                )
-
-                if not success:
-                    raise Exception(message)
-
-                time.sleep(1)
-
-                # Locate the downloaded file
-                actual_file = self._find_downloaded_file(
-                    temp_output_dir, files_before, is_audio, video_title
-                )
-                if not actual_file or not os.path.exists(actual_file):
-                    debug_files = os.listdir(temp_output_dir) if os.path.exists(temp_output_dir) else []
-                    raise Exception(
-                        f"No se pudo encontrar el archivo descargado. "
-                        f"Archivos en directorio: {debug_files}"
-                    )
-
-                file_size = os.path.getsize(actual_file)
-                if file_size == 0:
-                    raise Exception(f"El archivo descargado esta vacio: {actual_file}")
-
-                self.download_signals.message.emit(
-                    f"Archivo descargado: {os.path.basename(actual_file)} "
-                    f"({file_size / 1024 / 1024:.2f} MB)",
-                    "info"
-                )
-
-                # ── Phase 2: SSH connect ───────────────────────────
-                if self._cancel_event.is_set():
-                    self._remove_temp(actual_file, temp_output_dir)
-                    return
-
-                self.download_signals.message.emit(
-                    "Conectando al servidor SSH...", "info"
-                )
-                self.progress_hook.progress.emit(60, "Conectando al servidor...")
-
-                ssh_client = SSHClient()
-                conn_ok, conn_msg = ssh_client.connect(
-                    ssh_config['host'],
-                    ssh_config['port'],
-                    ssh_config['username'],
-                    ssh_config.get('password'),
-                    ssh_config.get('key_file')
-                )
-                if not conn_ok:
-                    raise Exception(f"Error de conexion SSH: {conn_msg}")
-
-                self.download_signals.message.emit(
-                    "Conexion SSH establecida", "success"
-                )
-
-                # Verify remote folder
-                self.download_signals.message.emit(
-                    "Verificando carpeta remota...", "info"
-                )
-                stdin, stdout, stderr = ssh_client.client.exec_command(
-                    f'test -d "{ssh_config["remote_folder"]}" '
-                    f'&& test -w "{ssh_config["remote_folder"]}" '
-                    f'&& echo "OK" || echo "ERROR"'
-                )
-                folder_check = stdout.read().decode().strip()
-                if folder_check != "OK":
-                    create_ok, create_msg = ssh_client.create_directory(
-                        ssh_config['remote_folder']
-                    )
-                    if not create_ok:
-                        raise Exception(
-                            f"No se puede acceder a la carpeta remota: {create_msg}"
-                        )
-
-                # ── Phase 3: SSH upload ────────────────────────────
-                if self._cancel_event.is_set():
-                    ssh_client.disconnect()
-                    self._remove_temp(actual_file, temp_output_dir)
-                    return
-
-                remote_filename = os.path.basename(actual_file)
-                remote_path = os.path.join(
-                    ssh_config['remote_folder'], remote_filename
-                )
-                file_size_mb = file_size / 1024 / 1024
-
-                self.download_signals.message.emit(
-                    f"Subiendo {remote_filename} ({file_size_mb:.2f} MB) "
-                    f"a {ssh_config['remote_folder']}...",
-                    "info"
-                )
-                self.progress_hook.progress.emit(70, "Subiendo archivo...")
-
-                def _upload_progress(transferred, total):
-                    if total > 0:
-                        pct = int(70 + (transferred / total) * 28)
-                        self.download_signals.progress_update.emit(
-                            pct, f"Subiendo... {transferred / 1024 / 1024:.1f} / {total / 1024 / 1024:.1f} MB"
-                        )
-
-                upload_ok, upload_msg = ssh_client.upload_file(
-                    actual_file, remote_path, progress_callback=_upload_progress
-                )
-
-                ssh_client.disconnect()
-
-                if upload_ok:
-                    self.download_signals.message.emit(upload_msg, "success")
-                    if ssh_config.get('remote_folder'):
-                        self.app_settings.set_last_remote_folder(
-                            ssh_config['remote_folder']
-                        )
-                    self._remove_temp(actual_file, temp_output_dir)
-                    self.progress_hook.progress.emit(
-                        100, "Descarga y subida completadas!"
-                    )
-                    self.download_signals.message.emit(
-                        f"Archivo subido exitosamente a: {remote_path}!",
-                        "success"
-                    )
-                    self.download_signals.download_finished.emit(
-                        True,
-                        f"Descarga y subida completadas!\n\n{title}"
-                        f"\n\nGuardado en servidor: {remote_path}",
-                        title
-                    )
-                else:
-                    raise Exception(f"Error al subir archivo: {upload_msg}")
-
-            else:
-                # ── Local download ─────────────────────────────────
-                success, message, title = YouTubeDownloader.download(
-                    url, output_folder, is_audio, quality, self.progress_hook
-                )
-
-                if not success:
-                    raise Exception(message)
-
-                if output_folder:
-                    self.app_settings.set_last_local_folder(output_folder)
-
-                transcription_result = ""
-
-                # ── Phase 4: transcription (local only) ────────────
-                if is_audio and transcribe:
-                    if self._cancel_event.is_set():
-                        return
-
-                    self.progress_hook.progress.emit(
-                        95, "Transcribiendo audio..."
-                    )
-                    self.download_signals.message.emit(
-                        "Iniciando transcripcion con Whisper AI...", "info"
-                    )
-
-                    time.sleep(1)  # Wait for file write to finish
+    def _submit_job(self, job: DownloadJob):
+        """Attach a per-job progress hook and hand the job to the queue"""
+        job.progress_hook = DownloadProgressHook(
+            cancel_event=job.cancel_event, job_id=job.job_id
+        )
+        # The hook fires on the worker thread: the aggregator keeps the latest
+        # value and the GUI thread picks it up on the next tick
+        job.progress_hook.job_progress.connect(self.progress_aggregator.update)
+        self.bandwidth.set_weight(job.job_id, job.weight)
 
-                    mp3_files = glob.glob(
-                        os.path.join(output_folder, "*.mp3")
-                    )
-                    if mp3_files:
-                        audio_file = max(mp3_files, key=os.path.getmtime)
-                        txt_filename = (
-                            os.path.splitext(audio_file)[0]
-                            + "_transcripcion.txt"
-                        )
-                        trans_ok, trans_msg, _ = AudioTranscriber.transcribe(
-                            audio_file, txt_filename,
-                            model_name=whisper_model, language="es"
-                        )
-                        if trans_ok:
-                            self.download_signals.message.emit(
-                                f"Transcripcion guardada: "
-                                f"{os.path.basename(txt_filename)}",
-                                "success"
-                            )
-                            transcription_result = (
-                                f"\nTranscripcion: {txt_filename}"
-                            )
-                        else:
-                            self.download_signals.message.emit(
-                                f"Error en transcripcion: {trans_msg}",
-                                "warning"
-                            )
-                            transcription_result = (
-                                f"\nTranscripcion fallida: {trans_msg}"
-                            )
-                    else:
-                        self.download_signals.message.emit(
-                            "No se encontro archivo de audio para transcribir",
-                            "warning"
-                        )
-
-                self.progress_hook.progress.emit(100, "Descarga completada!")
-                self.download_signals.message.emit(
-                    f"Descarga completada! Archivo guardado en: {output_folder}",
-                    "success"
-                )
-                self.download_signals.download_finished.emit(
-                    True,
-                    f"Descarga completada!\n\n{title}"
-                    f"\n\nGuardado en: {output_folder}{transcription_result}",
-                    title
-                )
+        self.cancel_button.setVisible(True)
+        self.job_queue.submit(job)
+        self.progress.add_message(f"[#{job.job_id}] En cola: {job.url}", "info")
+
+    def cancel_job(self, job_id: int):
+        """Signals a single job to stop"""
+        if self.job_queue.cancel(job_id):
+            self.progress.add_message(f"[#{job_id}] Cancelando descarga...", "warning")
+
+    def prioritize_job(self, job_id: int):
+        """Gives a job a larger share of the bandwidth"""
+        job = self.job_queue.get_job(job_id)
+        if job is None or job.is_finished:
+            return
+        job.weight = JOB_WEIGHT_PRIORITY
+        self.bandwidth.set_weight(job_id, job.weight)
+        self.progress.add_message(f"[#{job_id}] Priorizado", "info")
 
-        except DownloadCancelled:
-            logger.info("Download cancelled by user")
-            self.download_signals.message.emit("Descarga cancelada", "warning")
-            self.download_signals.download_finished.emit(
-                False, "Descarga cancelada por el usuario", ""
-            )
-        except Exception as e:
-            error_msg = str(e)
-            logger.exception("Error during download")
-            self.download_signals.message.emit(
-                f"Error en la descarga: {error_msg}", "error"
-            )
-            self.download_signals.download_finished.emit(
-                False,
-                f"Error al descargar el video:\n\n{error_msg}",
-                ""
-            )
+    def cancel_download(self):
+        """Signals every pending and running job to stop"""
+        self._expansion_cancel.set()
+        if self.job_queue.is_idle():
+            return
+        self.job_queue.cancel_all()
+        self.download_signals.message.emit("Cancelando descargas...", "warning")
+        self.progress.update_progress(0, "CANCELADO")
 
     # ------------------------------------------------------------------
     # Post-download
     # ------------------------------------------------------------------
 
-    def on_download_finished(self, success: bool, message: str, title: str):
-        """Re-enables UI and shows result dialog"""
-        self.download_button.setEnabled(True)
+    def _job_message(self, job: DownloadJob, message: str, msg_type: str):
+        """Send a log line tagged with the job id (thread-safe)"""
+        self.download_signals.message.emit(f"[#{job.job_id}] {message}", msg_type)
+
+    def on_download_finished(self, job: DownloadJob):
+        """Collects job results and shows a dialog once the queue drains"""
+        self._batch_results.append(
+            (job.state in (JobState.COMPLETED, JobState.SKIPPED), job.result_message)
+        )
+        if not self.job_queue.is_idle():
+            return
+        if any(t.is_alive() for t in self._expansions):
+            return
+
+        results, self._batch_results = self._batch_results, []
         self.cancel_button.setVisible(False)
         self.progress.set_status(">> SISTEMA LISTO")
 
-        if success:
-            self.show_dialog_safe("Exito", message, "info")
-        else:
-            self.show_dialog_safe("Error", message, "error")
+        if len(results) == 1:
+            ok, msg = results[0]
+            if ok:
+                self.show_dialog_safe("Exito", msg, "info")
+            else:
+                self.show_dialog_safe("Error", msg, "error")
+            return
+
+        completed = sum(1 for ok, _ in results if ok)
+        failed = len(results) - completed
+        summary = f"Cola terminada: {completed} completadas, {failed} fallidas o canceladas"
+        self.show_dialog_safe("Exito" if not failed else "Aviso", summary,
+                              "info" if not failed else "warning")
 
     def show_dialog_safe(self, title: str, message: str, dialog_type: str):
         """Shows a dialog safely (callable from any thread via signal)"""
@@ -624,78 +608,48 @@ class YouTubeDownloaderApp(QMainWindow):
     # Helpers
     # ------------------------------------------------------------------
 
-    @staticmethod
-    def _find_downloaded_file(temp_dir, files_before, is_audio, video_title):
-        """Locate the most recently created file matching the expected extension."""
-        if not os.path.exists(temp_dir):
-            return None
-
-        files_after = set(os.listdir(temp_dir))
-        new_files = files_after - files_before
-        expected_ext = '.mp3' if is_audio else '.mp4'
-
-        # 1. Among new files, prefer matching extension
-        if new_files:
-            matching = [f for f in new_files if f.endswith(expected_ext)]
-            if matching:
-                return max(
-                    [os.path.join(temp_dir, f) for f in matching],
-                    key=os.path.getmtime
+    def _restore_journal(self):
+        """Offer to resume jobs left unfinished by a previous session."""
+        entries = self.journal.unfinished()
+        resume = False
+        if entries:
+            answer = QMessageBox.question(
+                self, "Descargas pendientes",
+                f"Hay {len(entries)} descarga(s) sin terminar de la sesion anterior.\n\n"
+                f"¿Quieres reanudarlas?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
+            )
+            resume = answer == QMessageBox.Yes
+            if not resume:
+                for entry in entries:
+                    self.journal.discard(entry['key'])
+
+        self.journal.compact()
+        # Temp files not claimed by the journal are cleaned by the warm-up
+        self._start_warmup()
+
+        if resume:
+            for entry in entries:
+                job = JobJournal.restore_job(
+                    entry, ssh_password=self._saved_ssh_password(
+                        entry['options'].get('ssh_config')
+                    )
                 )
-            # 2. Any new file
-            return max(
-                [os.path.join(temp_dir, f) for f in new_files],
-                key=os.path.getmtime
+                self._submit_job(job)
+            self.progress.add_message(
+                f"Reanudando {len(entries)} descarga(s) pendiente(s)", "info"
             )
 
-        # 3. Fallback: newest file with matching extension anywhere
-        all_matching = [
-            os.path.join(temp_dir, f)
-            for f in os.listdir(temp_dir)
-            if os.path.isfile(os.path.join(temp_dir, f)) and f.endswith(expected_ext)
-        ]
-        if all_matching:
-            return max(all_matching, key=os.path.getmtime)
-
-        # 4. Last resort: newest file of any type
-        all_files = [
-            os.path.join(temp_dir, f)
-            for f in os.listdir(temp_dir)
-            if os.path.isfile(os.path.join(temp_dir, f))
-        ]
-        if all_files:
-            return max(all_files, key=os.path.getmtime)
-
+    def _saved_ssh_password(self, ssh_config):
+        """Look up the password of a journaled SSH job in the saved configs."""
+        if not ssh_config:
+            return None
+        for config in self.config_manager.load_configs():
+            if (config.get('host') == ssh_config.get('host')
+                    and config.get('username') == ssh_config.get('username')
+                    and int(config.get('port', 22)) == int(ssh_config.get('port', 22))):
+                return config.get('password') or None
+        current = self.ssh_tab.get_config_dict()
+        if current and current.get('host') == ssh_config.get('host'):
+            return current.get('password')
         return None
-
-    @staticmethod
-    def _remove_temp(file_path, temp_dir):
-        """Remove a temp file and its directory if empty."""
-        try:
-            if file_path and os.path.exists(file_path):
-                os.remove(file_path)
-        except OSError as exc:
-            logger.warning("Could not remove temp file %s: %s", file_path, exc)
-        try:
-            if temp_dir and os.path.isdir(temp_dir) and not os.listdir(temp_dir):
-                os.rmdir(temp_dir)
-        except OSError:
-            pass
-
-    def _cleanup_temp_files(self):
-        """Remove leftover temp files from previous sessions."""
-        temp_dir = os.path.join(tempfile.gettempdir(), "youtube_download")
-        if not os.path.isdir(temp_dir):
-            return
-        try:
-            for f in os.listdir(temp_dir):
-                fp = os.path.join(temp_dir, f)
-                if os.path.isfile(fp):
-                    try:
-                        os.remove(fp)
-                    except OSError:
-                        pass
-            if not os.listdir(temp_dir):
-                os.rmdir(temp_dir)
-        except OSError:
-            pass
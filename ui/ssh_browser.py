@@ -10,7 +10,7 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt
 import paramiko
-from utils.ssh_client import SSHClient
+from utils.ssh_pool import get_ssh_pool
 from ui.widgets.styles import select_button_style, cancel_button_style, action_button_style
 
 
@@ -107,22 +107,16 @@ class SSHBrowserDialog(QDialog):
             return
         
         try:
-            self.ssh_client = SSHClient()
-            success, message = self.ssh_client.connect(
-                self.ssh_config['host'],
-                self.ssh_config['port'],
-                self.ssh_config['username'],
-                self.ssh_config.get('password'),
-                self.ssh_config.get('key_file')
-            )
+            # Conexión del pool: la de "Probar conexión" o la de una subida reciente
+            self.ssh_client, message = get_ssh_pool().acquire(self.ssh_config)
             
-            if not success:
+            if not self.ssh_client:
                 QMessageBox.critical(self, "Error de Conexión", message)
                 return
             
             # Obtener el directorio home del usuario
-            stdin, stdout, stderr = self.ssh_client.client.exec_command('echo $HOME')
-            home_dir = stdout.read().decode().strip()
+            _, home_dir, _ = self.ssh_client.run_command('echo $HOME')
+            home_dir = home_dir.strip()
             if home_dir:
                 self.current_path = home_dir
                 self.path_input.setText(self.current_path)
@@ -207,8 +201,8 @@ class SSHBrowserDialog(QDialog):
         """Va al directorio home del usuario"""
         if self.ssh_client:
             try:
-                stdin, stdout, stderr = self.ssh_client.client.exec_command('echo $HOME')
-                home_dir = stdout.read().decode().strip()
+                _, home_dir, _ = self.ssh_client.run_command('echo $HOME')
+                home_dir = home_dir.strip()
                 if home_dir:
                     self.load_directory(home_dir)
             except (paramiko.SSHException, OSError):
@@ -233,8 +227,18 @@ class SSHBrowserDialog(QDialog):
         """Retorna la ruta seleccionada"""
         return self.selected_path
     
+    def done(self, result):
+        """Devuelve la conexión al pool al aceptar o cancelar el diálogo"""
+        self._release_connection()
+        super().done(result)
+    
     def closeEvent(self, event):
-        """Cierra la conexión SSH al cerrar el diálogo"""
+        """Devuelve la conexión al pool al cerrar el diálogo"""
+        self._release_connection()
+        event.accept()
+    
+    def _release_connection(self):
+        """Devuelve la conexión al pool (una sola vez)"""
         if self.ssh_client:
             self.ssh_client.disconnect()
-        event.accept()
+            self.ssh_client = None
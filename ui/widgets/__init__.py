@@ -7,3 +7,4 @@ from ui.widgets.options_widget import OptionsWidget
 from ui.widgets.local_tab import LocalTab
 from ui.widgets.ssh_tab import SSHTab
 from ui.widgets.progress_widget import ProgressWidget
+from ui.widgets.jobs_widget import JobsWidget
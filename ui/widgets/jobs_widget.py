@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Widget de cola de descargas: tabla con el estado de cada trabajo,
+selector de descargas simultaneas, limites de ancho de banda,
+prioridad y cancelacion por trabajo.
+"""
+
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSpinBox, QPushButton,
+    QGroupBox, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+)
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtGui import QColor
+
+from config import MATRIX_COLORS, MAX_CONCURRENT_DOWNLOADS_LIMIT, BANDWIDTH_LIMIT_MAX_KBPS
+from download.job_queue import JobState
+from download.stages import (
+    STAGE_ORDER, STAGE_DOWNLOAD, STAGE_PROCESS, STAGE_UPLOAD, STAGE_TRANSCRIBE
+)
+from ui.widgets.styles import cancel_button_style, action_button_style
+
+STATE_LABELS = {
+    JobState.PENDING: "EN COLA",
+    JobState.RUNNING: "EN CURSO",
+    JobState.COMPLETED: "COMPLETADO",
+    JobState.FAILED: "ERROR",
+    JobState.CANCELLED: "CANCELADO",
+    JobState.SKIPPED: "OMITIDO",
+}
+
+STATE_COLORS = {
+    JobState.PENDING: MATRIX_COLORS["text_dim"],
+    JobState.RUNNING: MATRIX_COLORS["info"],
+    JobState.COMPLETED: MATRIX_COLORS["success"],
+    JobState.FAILED: MATRIX_COLORS["error"],
+    JobState.CANCELLED: MATRIX_COLORS["warning"],
+    JobState.SKIPPED: MATRIX_COLORS["text_dim"],
+}
+
+STAGE_NAMES = {
+    STAGE_DOWNLOAD: "Bajada",
+    STAGE_PROCESS: "FFmpeg",
+    STAGE_UPLOAD: "Subida",
+    STAGE_TRANSCRIBE: "Transcripcion",
+}
+
+COL_ID, COL_NAME, COL_STATE, COL_PROGRESS, COL_MESSAGE = range(5)
+
+
+class JobsWidget(QWidget):
+    """Widget con la lista de trabajos de la cola de descargas"""
+
+    max_workers_changed = Signal(int)
+    cancel_requested = Signal(int)      # id de trabajo
+    priority_requested = Signal(int)    # id de trabajo
+    clear_finished_requested = Signal()
+    bandwidth_changed = Signal(int, int)  # bajada, subida en KB/s (0 = sin limite)
+
+    def __init__(self, max_workers: int, bandwidth_limits=(0, 0), parent=None):
+        """
+        Inicializa el widget de cola.
+
+        Args:
+            max_workers: Numero inicial de descargas simultaneas
+            bandwidth_limits: Limites iniciales (bajada, subida) en KB/s
+            parent: Widget padre
+        """
+        super().__init__(parent)
+        self._rows = {}  # job_id -> fila
+        self._init_ui(max_workers, bandwidth_limits)
+
+    def _init_ui(self, max_workers: int, bandwidth_limits):
+        """Inicializa la interfaz del widget"""
+        group = QGroupBox(">> COLA DE DESCARGAS")
+        group_layout = QVBoxLayout()
+        group_layout.setSpacing(8)
+
+        # Descargas simultaneas
+        workers_layout = QHBoxLayout()
+        workers_label = QLabel("Simultaneas:")
+        workers_label.setMinimumWidth(90)
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, MAX_CONCURRENT_DOWNLOADS_LIMIT)
+        self.workers_spin.setValue(max_workers)
+        self.workers_spin.setToolTip(
+            "Numero de descargas que se ejecutan a la vez (las subidas y "
+            "transcripciones tienen sus propios huecos)"
+        )
+        self.workers_spin.valueChanged.connect(self.max_workers_changed.emit)
+        workers_layout.addWidget(workers_label)
+        workers_layout.addWidget(self.workers_spin)
+
+        self.summary_label = QLabel("")
+        self.summary_label.setStyleSheet(
+            f"color: {MATRIX_COLORS['text_dim']}; font-size: 9pt;"
+        )
+        workers_layout.addWidget(self.summary_label, 1)
+        group_layout.addLayout(workers_layout)
+
+        # Ocupacion de cada etapa del pipeline
+        self.stages_label = QLabel("")
+        self.stages_label.setStyleSheet(
+            f"color: {MATRIX_COLORS['text_dim']}; font-size: 9pt;"
+        )
+        self.stages_label.setToolTip(
+            "Huecos ocupados / totales de cada etapa, trabajos en espera y "
+            "porcentaje de tiempo ocupado en los ultimos segundos; conexiones "
+            "SSH abiertas y porcentaje de subidas que reutilizan una"
+        )
+        group_layout.addWidget(self.stages_label)
+
+        # Limites de ancho de banda (se aplican en caliente)
+        bandwidth_layout = QHBoxLayout()
+        bandwidth_label = QLabel("Ancho banda:")
+        bandwidth_label.setMinimumWidth(90)
+        bandwidth_layout.addWidget(bandwidth_label)
+        self.download_limit_spin = self._bandwidth_spin(
+            bandwidth_limits[0], "Limite de bajada compartido por todas las descargas"
+        )
+        self.upload_limit_spin = self._bandwidth_spin(
+            bandwidth_limits[1], "Limite de subida compartido por todas las subidas SSH"
+        )
+        bandwidth_layout.addWidget(QLabel("Bajada"))
+        bandwidth_layout.addWidget(self.download_limit_spin)
+        bandwidth_layout.addWidget(QLabel("Subida"))
+        bandwidth_layout.addWidget(self.upload_limit_spin)
+        bandwidth_layout.addStretch()
+        group_layout.addLayout(bandwidth_layout)
+
+        # Tabla de trabajos
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["#", "CONTENIDO", "ESTADO", "%", "MENSAJE"])
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setMaximumHeight(160)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(COL_ID, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(COL_NAME, QHeaderView.Stretch)
+        header.setSectionResizeMode(COL_STATE, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(COL_PROGRESS, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(COL_MESSAGE, QHeaderView.Stretch)
+        group_layout.addWidget(self.table)
+
+        # Botones
+        buttons_layout = QHBoxLayout()
+
+        cancel_button = QPushButton("Cancelar Seleccionados")
+        cancel_button.setStyleSheet(cancel_button_style())
+        cancel_button.clicked.connect(self._cancel_selected)
+        buttons_layout.addWidget(cancel_button)
+
+        priority_button = QPushButton("Priorizar Seleccionados")
+        priority_button.setStyleSheet(action_button_style('info'))
+        priority_button.setToolTip("Da mas ancho de banda a los trabajos seleccionados")
+        priority_button.clicked.connect(self._prioritize_selected)
+        buttons_layout.addWidget(priority_button)
+
+        clear_button = QPushButton("Limpiar Terminados")
+        clear_button.setStyleSheet(action_button_style('info'))
+        clear_button.clicked.connect(self.clear_finished_requested.emit)
+        buttons_layout.addWidget(clear_button)
+
+        buttons_layout.addStretch()
+        group_layout.addLayout(buttons_layout)
+
+        group.setLayout(group_layout)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(group)
+        self.setLayout(layout)
+
+    def _bandwidth_spin(self, value: int, tooltip: str) -> QSpinBox:
+        """Crea un selector de limite en KB/s (0 = sin limite)"""
+        spin = QSpinBox()
+        spin.setRange(0, BANDWIDTH_LIMIT_MAX_KBPS)
+        spin.setSingleStep(256)
+        spin.setSuffix(" KB/s")
+        spin.setSpecialValueText("Sin limite")
+        spin.setValue(value)
+        spin.setToolTip(tooltip)
+        spin.valueChanged.connect(self._on_bandwidth_changed)
+        return spin
+
+    def _on_bandwidth_changed(self, _value: int):
+        """Notifica los limites de ancho de banda actuales"""
+        self.bandwidth_changed.emit(
+            self.download_limit_spin.value(), self.upload_limit_spin.value()
+        )
+
+    def get_max_workers(self) -> int:
+        """Retorna el numero de descargas simultaneas seleccionado"""
+        return self.workers_spin.value()
+
+    def update_job(self, job):
+        """
+        Anade o actualiza la fila de un trabajo.
+
+        Args:
+            job: DownloadJob con el estado actual
+        """
+        row = self._rows.get(job.job_id)
+        if row is None:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            self._rows[job.job_id] = row
+            id_item = QTableWidgetItem(str(job.job_id))
+            id_item.setData(Qt.UserRole, job.job_id)
+            self.table.setItem(row, COL_ID, id_item)
+            for col in (COL_NAME, COL_STATE, COL_PROGRESS, COL_MESSAGE):
+                self.table.setItem(row, col, QTableWidgetItem(""))
+
+        self.table.item(row, COL_NAME).setText(job.title or job.url)
+        self.table.item(row, COL_NAME).setToolTip(job.url)
+
+        state_item = self.table.item(row, COL_STATE)
+        state_item.setText(STATE_LABELS.get(job.state, job.state))
+        state_item.setForeground(QColor(STATE_COLORS.get(job.state, MATRIX_COLORS["text"])))
+        # Time per phase once the job is over
+        state_item.setToolTip(job.telemetry.summary() if job.is_finished and job.telemetry else "")
+
+        self.table.item(row, COL_PROGRESS).setText(f"{job.progress}%")
+        message = job.result_message if job.is_finished else job.message
+        self.table.item(row, COL_MESSAGE).setText(message.splitlines()[0] if message else "")
+        self.table.item(row, COL_MESSAGE).setToolTip(message)
+
+    def update_job_progress(self, job_id: int, percent: int, message: str):
+        """
+        Actualiza solo el progreso y el mensaje de un trabajo.
+
+        Args:
+            job_id: Id del trabajo
+            percent: Porcentaje de progreso (0-100)
+            message: Mensaje de estado
+        """
+        row = self._rows.get(job_id)
+        if row is None:
+            return
+        self.table.item(row, COL_PROGRESS).setText(f"{percent}%")
+        self.table.item(row, COL_MESSAGE).setText(message)
+
+    def set_summary(self, running: int, pending: int):
+        """
+        Muestra el resumen de la cola.
+
+        Args:
+            running: Trabajos en curso
+            pending: Trabajos en espera
+        """
+        if running or pending:
+            self.summary_label.setText(f"{running} en curso, {pending} en cola")
+        else:
+            self.summary_label.setText("")
+
+    def set_stage_stats(self, stats: dict, ssh_stats: dict = None):
+        """
+        Muestra la ocupacion de las etapas del pipeline.
+
+        Args:
+            stats: Resultado de StageScheduler.stats()
+            ssh_stats: Resultado de SSHPool.stats() (opcional)
+        """
+        parts = []
+        for stage in STAGE_ORDER:
+            info = stats.get(stage)
+            if not info:
+                continue
+            text = (f"{STAGE_NAMES[stage]} {info['busy']}/{info['workers']} "
+                    f"{info['utilization'] * 100:.0f}%")
+            if info['waiting']:
+                text += f" (+{info['waiting']} en espera)"
+            parts.append(text)
+        if ssh_stats and ssh_stats['hit_rate'] is not None:
+            parts.append(f"SSH {ssh_stats['connections']} conexiones, "
+                         f"{ssh_stats['hit_rate'] * 100:.0f}% reutilizadas")
+        self.stages_label.setText("  |  ".join(parts))
+
+    def remove_jobs(self, job_ids):
+        """
+        Elimina de la tabla las filas de los trabajos indicados.
+
+        Args:
+            job_ids: Ids de los trabajos a eliminar
+        """
+        for row in sorted((self._rows[j] for j in job_ids if j in self._rows), reverse=True):
+            self.table.removeRow(row)
+        self._rows = {
+            self.table.item(row, COL_ID).data(Qt.UserRole): row
+            for row in range(self.table.rowCount())
+        }
+
+    def _cancel_selected(self):
+        """Solicita la cancelacion de los trabajos seleccionados"""
+        rows = {index.row() for index in self.table.selectionModel().selectedRows()}
+        for row in sorted(rows):
+            self.cancel_requested.emit(self.table.item(row, COL_ID).data(Qt.UserRole))
+
+    def _prioritize_selected(self):
+        """Solicita priorizar los trabajos seleccionados"""
+        rows = {index.row() for index in self.table.selectionModel().selectedRows()}
+        for row in sorted(rows):
+            self.priority_requested.emit(self.table.item(row, COL_ID).data(Qt.UserRole))
@@ -42,7 +42,11 @@ class OptionsWidget(QWidget):
         format_label = QLabel("Formato:")
         format_label.setMinimumWidth(90)
         self.format_video = QRadioButton("Video (MP4)")
-        self.format_audio = QRadioButton("Audio (MP3)")
+        self.format_audio = QRadioButton("Audio")
+        self.format_audio.setToolTip(
+            "M4A/Opus se guardan sin recodificar; el resto se convierte a MP3 "
+            "(perfil de audio en config.py)"
+        )
 
         # Formato por defecto
         if self._default_format == 'audio':
@@ -67,6 +71,26 @@ class OptionsWidget(QWidget):
         quality_layout.addStretch(2)
         group_layout.addLayout(quality_layout)
 
+        # Expansion de listas de reproduccion
+        playlist_layout = QHBoxLayout()
+        playlist_label = QLabel("Listas:")
+        playlist_label.setMinimumWidth(90)
+        self.expand_playlist_checkbox = QCheckBox("Descargar cada entrada como un trabajo")
+        self.expand_playlist_checkbox.setToolTip(
+            "Las listas y canales se expanden y sus videos se descargan en paralelo"
+        )
+        self.expand_playlist_checkbox.setChecked(True)
+        playlist_layout.addWidget(playlist_label)
+        playlist_layout.addWidget(self.expand_playlist_checkbox)
+        self.skip_archived_checkbox = QCheckBox("Omitir ya descargados")
+        self.skip_archived_checkbox.setToolTip(
+            "No vuelve a descargar contenidos ya guardados con el mismo formato y destino"
+        )
+        self.skip_archived_checkbox.setChecked(True)
+        playlist_layout.addWidget(self.skip_archived_checkbox)
+        playlist_layout.addStretch()
+        group_layout.addLayout(playlist_layout)
+
         # Opcion de transcripcion (solo para audio)
         transcription_layout = QHBoxLayout()
         transcription_label = QLabel("Extra:")
@@ -168,6 +192,14 @@ class OptionsWidget(QWidget):
         """Retorna True si la transcripcion esta habilitada"""
         return self.transcription_checkbox.isChecked() and self.format_audio.isChecked()
 
+    def should_expand_playlists(self) -> bool:
+        """Retorna True si las listas deben expandirse en trabajos individuales"""
+        return self.expand_playlist_checkbox.isChecked()
+
+    def should_skip_archived(self) -> bool:
+        """Retorna True si deben omitirse los contenidos ya descargados"""
+        return self.skip_archived_checkbox.isChecked()
+
     def get_whisper_model(self) -> str:
         """Retorna el nombre del modelo Whisper seleccionado"""
         return self.whisper_model_combo.currentData()
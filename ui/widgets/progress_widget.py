@@ -104,13 +104,14 @@ class ProgressWidget(QWidget):
 
         Args:
             message: Mensaje a mostrar
-            message_type: Tipo de mensaje (info, success, error, warning)
+            message_type: Tipo de mensaje (info, success, error, warning, skipped)
         """
         colors = {
             "info": MATRIX_COLORS["info"],
             "success": MATRIX_COLORS["success"],
             "error": MATRIX_COLORS["error"],
-            "warning": MATRIX_COLORS["warning"]
+            "warning": MATRIX_COLORS["warning"],
+            "skipped": MATRIX_COLORS["text_dim"]
         }
         color = colors.get(message_type, MATRIX_COLORS["text"])
         timestamp = datetime.now().strftime("%H:%M:%S")
@@ -16,10 +16,8 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Signal
 
 from config import MATRIX_COLORS
-from utils.ssh_client import SSHClient
 from utils.config_manager import SSHConfigManager
 from utils.app_settings import AppSettings
-from ui.ssh_browser import SSHBrowserDialog
 from ui.widgets.styles import action_button_style, save_button_style
 
 logger = logging.getLogger(__name__)
@@ -295,19 +293,21 @@ class SSHTab(QWidget):
 
         self.message.emit("Probando conexion SSH...", "info")
 
+        # paramiko se carga al usarlo, no al abrir la ventana
+        from utils.ssh_pool import get_ssh_pool
+
         try:
-            ssh_client = SSHClient()
             host = self.ssh_host_input.text().strip()
             port = int(self.ssh_port_input.text().strip() or "22")
             username = self.ssh_user_input.text().strip()
-            password = self.ssh_password_input.text().strip() or None
-            key_file = self.ssh_key_input.text().strip() or None
 
-            success, msg = ssh_client.connect(host, port, username, password, key_file)
+            # La conexion queda en el pool para las subidas y el explorador
+            ssh_client, msg = get_ssh_pool().acquire(self.get_config_dict())
+            success = ssh_client is not None
 
             if success:
                 test_success, test_msg = ssh_client.test_connection()
-                ssh_client.disconnect()
+                ssh_client.disconnect(reusable=test_success)
 
                 if test_success:
                     logger.info("Conexion SSH exitosa a %s@%s:%d", username, host, port)
@@ -418,6 +418,8 @@ class SSHTab(QWidget):
             )
             return
 
+        from ui.ssh_browser import SSHBrowserDialog
+
         browser = SSHBrowserDialog(self, ssh_config)
 
         if browser.exec() == QDialog.Accepted:
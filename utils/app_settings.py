@@ -7,7 +7,9 @@ Gestor de configuraciones de la aplicación
 import json
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
+
+from config import MAX_CONCURRENT_DOWNLOADS
 
 logger = logging.getLogger(__name__)
 
@@ -98,3 +100,27 @@ class AppSettings:
         settings = self.load_settings()
         settings['default_format'] = format_type
         return self.save_settings(settings)
+
+    def get_max_concurrent_jobs(self) -> int:
+        """Obtiene el número de descargas simultáneas"""
+        settings = self.load_settings()
+        return settings.get('max_concurrent_jobs', MAX_CONCURRENT_DOWNLOADS)
+
+    def set_max_concurrent_jobs(self, count: int) -> bool:
+        """Guarda el número de descargas simultáneas"""
+        settings = self.load_settings()
+        settings['max_concurrent_jobs'] = count
+        return self.save_settings(settings)
+
+    def get_bandwidth_limits(self) -> Tuple[int, int]:
+        """Obtiene los límites de bajada y subida en KB/s (0 = sin límite)"""
+        settings = self.load_settings()
+        return (settings.get('download_limit_kbps', 0),
+                settings.get('upload_limit_kbps', 0))
+
+    def set_bandwidth_limits(self, download_kbps: int, upload_kbps: int) -> bool:
+        """Guarda los límites de bajada y subida en KB/s"""
+        settings = self.load_settings()
+        settings['download_limit_kbps'] = download_kbps
+        settings['upload_limit_kbps'] = upload_kbps
+        return self.save_settings(settings)
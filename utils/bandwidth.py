@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reparto del ancho de banda entre descargas y subidas simultáneas
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Sentidos con presupuesto independiente
+DOWNLOAD = "download"
+UPLOAD = "upload"
+
+# Un flujo cuenta para el reparto si ha transferido en este intervalo
+ACTIVE_WINDOW = 1.0  # segundos
+
+# Ráfaga máxima acumulable por flujo, en segundos de su cuota
+BURST_SECONDS = 0.25
+
+# Espera máxima de una sola vez (los cambios de límite se notan antes)
+MAX_SLEEP = 0.5
+
+
+class _Flow:
+    """Cubo de fichas de un trabajo en un sentido"""
+
+    __slots__ = ('tokens', 'updated', 'last_seen')
+
+    def __init__(self, now: float):
+        self.tokens = 0.0
+        self.updated = now
+        self.last_seen = now
+
+
+class BandwidthManager:
+    """
+    Limitador de ancho de banda con cubos de fichas por trabajo.
+
+    Cada sentido (DOWNLOAD, UPLOAD) tiene su propio límite en bytes/s. El límite
+    se reparte entre los trabajos que están transfiriendo en proporción a su
+    peso, y la cuota de un trabajo inactivo pasa a los demás. Los límites y los
+    pesos se pueden cambiar en cualquier momento; los trabajos en curso los
+    aplican en su siguiente bloque. Un límite 0 desactiva la limitación.
+    """
+
+    def __init__(self, download_limit: int = 0, upload_limit: int = 0):
+        """
+        Inicializa el limitador
+
+        Args:
+            download_limit: Bytes/s de bajada (0 = sin límite)
+            upload_limit: Bytes/s de subida (0 = sin límite)
+        """
+        self._lock = threading.Lock()
+        self._limits = {DOWNLOAD: download_limit, UPLOAD: upload_limit}
+        self._flows: Dict[str, Dict[Hashable, _Flow]] = {DOWNLOAD: {}, UPLOAD: {}}
+        self._weights: Dict[Hashable, float] = {}
+
+    def set_limit(self, direction: str, bytes_per_second: int):
+        """
+        Cambia el límite de un sentido
+
+        Args:
+            direction: DOWNLOAD o UPLOAD
+            bytes_per_second: Nuevo límite (0 = sin límite)
+        """
+        with self._lock:
+            self._limits[direction] = max(0, int(bytes_per_second or 0))
+        logger.info("Bandwidth limit for %s set to %d B/s", direction, bytes_per_second or 0)
+
+    def get_limit(self, direction: str) -> int:
+        """Límite actual de un sentido en bytes/s (0 = sin límite)"""
+        with self._lock:
+            return self._limits[direction]
+
+    def set_weight(self, flow: Hashable, weight: float):
+        """
+        Asigna el peso de un trabajo en el reparto
+
+        Args:
+            flow: Identificador del trabajo
+            weight: Peso relativo (1.0 = normal)
+        """
+        with self._lock:
+            self._weights[flow] = max(0.01, float(weight))
+
+    def get_weight(self, flow: Hashable) -> float:
+        """Peso de un trabajo (1.0 si no se ha asignado)"""
+        with self._lock:
+            return self._weights.get(flow, 1.0)
+
+    def release(self, flow: Hashable):
+        """Olvida un trabajo terminado"""
+        with self._lock:
+            self._weights.pop(flow, None)
+            for flows in self._flows.values():
+                flows.pop(flow, None)
+
+    def throttle(self, direction: str, flow: Hashable, nbytes: int):
+        """
+        Descuenta ``nbytes`` del cubo del trabajo y espera si se ha agotado
+
+        Se llama después de transferir cada bloque, desde el hilo que transfiere.
+
+        Args:
+            direction: DOWNLOAD o UPLOAD
+            flow: Identificador del trabajo
+            nbytes: Bytes transferidos desde la última llamada
+        """
+        if nbytes <= 0:
+            return
+        wait = self._consume(direction, flow, nbytes)
+        while wait > 0:
+            time.sleep(min(wait, MAX_SLEEP))
+            # Volver a calcular por si han cambiado el límite o el reparto
+            wait = self._consume(direction, flow, 0)
+
+    def _consume(self, direction: str, flow: Hashable, nbytes: int) -> float:
+        """Actualiza el cubo del trabajo y devuelve los segundos que debe esperar"""
+        with self._lock:
+            limit = self._limits[direction]
+            flows = self._flows[direction]
+            now = time.monotonic()
+            state = flows.get(flow)
+            if state is None:
+                state = flows[flow] = _Flow(now)
+            if not limit:
+                state.tokens = 0.0
+                state.updated = state.last_seen = now
+                return 0.0
+
+            active_weight = sum(
+                self._weights.get(key, 1.0) for key, other in flows.items()
+                if key == flow or now - other.last_seen < ACTIVE_WINDOW
+            )
+            rate = limit * self._weights.get(flow, 1.0) / active_weight
+
+            state.tokens = min(
+                state.tokens + (now - state.updated) * rate, rate * BURST_SECONDS
+            )
+            state.tokens -= nbytes
+            state.updated = state.last_seen = now
+            return -state.tokens / rate if state.tokens < 0 else 0.0
+
+    def stats(self) -> dict:
+        """
+        Estado del limitador
+
+        Returns:
+            dict: Límites y número de trabajos activos por sentido
+        """
+        with self._lock:
+            now = time.monotonic()
+            return {
+                direction: {
+                    'limit': self._limits[direction],
+                    'active': sum(1 for f in flows.values()
+                                  if now - f.last_seen < ACTIVE_WINDOW),
+                }
+                for direction, flows in self._flows.items()
+            }
+
+
+class ThrottledCallback:
+    """
+    Envuelve un callback de progreso (transferidos, total) para que cada bloque
+    descuente del limitador antes de informar.
+
+    Admite llamadas desde varios hilos a la vez (los canales de una subida en
+    paralelo): cada uno espera en el limitador por su cuenta, y los informes
+    que llegan desordenados no hacen retroceder el progreso.
+    """
+
+    def __init__(self, manager: BandwidthManager, direction: str, flow: Hashable,
+                 callback=None, start: int = 0):
+        self._manager = manager
+        self._direction = direction
+        self._flow = flow
+        self._callback = callback
+        self._lock = threading.Lock()
+        self._last = start       # bytes ya descontados del limitador
+        self._reported = start   # último valor pasado al callback
+
+    def __call__(self, transferred: int, total: int):
+        with self._lock:
+            delta = transferred - self._last
+            self._last = max(self._last, transferred)
+        self._manager.throttle(self._direction, self._flow, delta)
+        if self._callback:
+            with self._lock:
+                if transferred < self._reported:
+                    return
+                self._reported = transferred
+                self._callback(transferred, total)
+
+
+class ThrottleHook:
+    """Hook de progreso de yt-dlp que descuenta cada bloque del limitador de bajada"""
+
+    def __init__(self, manager: BandwidthManager, flow: Hashable):
+        self._manager = manager
+        self._flow = flow
+        self._downloaded = {}  # archivo -> bytes ya descontados
+
+    def __call__(self, d: dict):
+        if d.get('status') != 'downloading':
+            return
+        filename = d.get('filename') or d.get('tmpfilename')
+        downloaded = d.get('downloaded_bytes') or 0
+        # El primer bloque de cada archivo puede incluir lo ya descargado al reanudar
+        previous = self._downloaded.get(filename, downloaded)
+        self._downloaded[filename] = downloaded
+        self._manager.throttle(DOWNLOAD, self._flow, downloaded - previous)
+
+
+_shared_manager: Optional[BandwidthManager] = None
+_shared_lock = threading.Lock()
+
+
+def get_bandwidth_manager() -> BandwidthManager:
+    """
+    Limitador compartido por todas las descargas y subidas del proceso
+
+    Returns:
+        BandwidthManager: Limitador (sin límites hasta que se configuren)
+    """
+    global _shared_manager
+    with _shared_lock:
+        if _shared_manager is None:
+            _shared_manager = BandwidthManager()
+        return _shared_manager
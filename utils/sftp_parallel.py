@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Subida SFTP en paralelo: varios canales SFTP sobre la misma conexión escriben
+trozos disjuntos del mismo archivo remoto, cada uno en su desplazamiento.
+
+Un solo canal queda limitado por su ventana y por la latencia de cada petición;
+con varios canales a la vez el enlace se aprovecha aunque la latencia sea alta.
+
+Opcionalmente calcula el hash del archivo con los mismos datos que se envían:
+los bloques llegan desordenados, así que los adelantados esperan en memoria
+hasta que les toca, y un canal no empieza un trozo demasiado lejos del hash.
+"""
+
+import logging
+import threading
+
+import paramiko
+
+from config import SFTP_PARALLEL_CHUNK_SIZE, SFTP_PARALLEL_STREAMS
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de cada escritura dentro de un trozo (granularidad del progreso)
+WRITE_BLOCK_SIZE = 256 * 1024
+
+
+class ParallelUpload:
+    """
+    Subida de un archivo por varios canales SFTP.
+
+    Los trozos se reparten bajo demanda: cada canal toma el siguiente libre
+    al terminar el suyo, así que un canal lento no retrasa al resto. Si no se
+    pueden abrir todos los canales (p. ej. por el límite de sesiones del
+    servidor) la subida sigue con los que haya.
+    """
+
+    def __init__(self, client, sftp: paramiko.SFTPClient,
+                 local_path: str, remote_path: str, file_size: int,
+                 streams: int = SFTP_PARALLEL_STREAMS, chunk_size: int = SFTP_PARALLEL_CHUNK_SIZE,
+                 progress_callback=None, digest=None):
+        """
+        Args:
+            client: SSHClient de la conexión; los canales adicionales se piden
+                con open_extra_sftp(), que respeta el límite de canales del pool
+            sftp: Canal SFTP ya abierto (lo usa el primer hilo)
+            local_path: Archivo local
+            remote_path: Archivo remoto
+            file_size: Tamaño del archivo local
+            streams: Canales SFTP simultáneos
+            chunk_size: Bytes de cada trozo
+            progress_callback: Función (bytes_transferred, total_bytes); se llama
+                desde los hilos de la subida, varios a la vez y fuera del lock
+                (un ThrottledCallback espera en el limitador sin frenar al resto)
+            digest: Objeto de hashlib que recibe el archivo en orden a medida que
+                se sube; ya debe contener los bytes anteriores a ``start``.
+                Limita la ventana a ``streams`` trozos por delante del hash
+        """
+        self.client = client
+        self.sftp = sftp
+        self.local_path = local_path
+        self.remote_path = remote_path
+        self.file_size = file_size
+        self.streams = max(1, streams)
+        self.chunk_size = max(WRITE_BLOCK_SIZE, chunk_size)
+        self.progress_callback = progress_callback
+        self._lock = threading.Lock()
+        self._chunks = []
+        self._next = 0
+        self._done = set()
+        self._transferred = 0
+        self._error = None
+        self._stop = threading.Event()
+        self.digest = digest
+        self._hashed = 0       # bytes ya pasados por el hash
+        self._pending = {}     # desplazamiento -> bloque subido por delante del hash
+        self._hash_moved = threading.Condition(self._lock)
+        self.channels_used = 0
+
+    def run(self, start: int = 0) -> int:
+        """
+        Sube el archivo desde ``start`` hasta el final
+
+        Args:
+            start: Byte desde el que subir; el archivo remoto ya contiene los
+                anteriores (0 para crearlo o vaciarlo)
+
+        Returns:
+            int: Canales que llegaron a subir datos
+
+        Raises:
+            Exception: El primer error de cualquiera de los canales (los demás
+                se detienen). El archivo remoto se recorta a la parte
+                contigua ya subida, para que una reanudación por tamaño sea válida.
+        """
+        self._chunks = [(pos, min(self.chunk_size, self.file_size - pos))
+                        for pos in range(start, self.file_size, self.chunk_size)]
+        self._transferred = start
+        self._hashed = start
+        self._pending = {}
+        if start == 0:
+            self.sftp.open(self.remote_path, 'wb').close()
+
+        workers = [threading.Thread(target=self._worker, args=(i,), daemon=True,
+                                    name=f"sftp-upload-{i}")
+                   for i in range(min(self.streams, len(self._chunks)))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        if self._error is not None:
+            self._truncate_to_prefix(start)
+            raise self._error
+        return self.channels_used
+
+    def _worker(self, index: int):
+        own_channel = index > 0
+        sftp = None if own_channel else self.sftp
+        try:
+            if own_channel:
+                # The first thread always has a channel, so the upload goes on with fewer
+                try:
+                    sftp = self.client.open_extra_sftp()
+                except (paramiko.SSHException, OSError) as e:
+                    logger.info("Could not open SFTP channel %d, uploading with fewer: %s", index, e)
+                    return
+                if sftp is None:
+                    logger.debug("No free SFTP channel for stream %d, uploading with fewer", index)
+                    return
+            chunk = self._take()
+            if chunk is None:
+                return
+            with self._lock:
+                self.channels_used += 1
+            uploaded = []
+            with open(self.local_path, 'rb') as src, sftp.open(self.remote_path, 'r+b') as dst:
+                dst.set_pipelined(True)
+                try:
+                    while chunk is not None:
+                        if self._upload_chunk(src, dst, *chunk):
+                            uploaded.append(chunk[0])
+                        chunk = self._take()
+                except BaseException as e:
+                    self._fail(e)
+            # Closing waits for the pipelined writes: only now are the chunks on the server
+            with self._lock:
+                self._done.update(uploaded)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            if own_channel and sftp is not None:
+                self.client.close_extra_sftp(sftp)
+
+    def _fail(self, error: BaseException):
+        """Guarda el primer error y detiene el resto de canales"""
+        with self._lock:
+            if self._error is None:
+                self._error = error
+            self._stop.set()
+            self._hash_moved.notify_all()
+
+    def _take(self):
+        """Siguiente trozo libre, o None si no quedan (o hay que parar)"""
+        with self._lock:
+            if self.digest is not None:
+                # The lowest unhashed chunk is always being uploaded, so this wait ends
+                window = self.streams * self.chunk_size
+                while (not self._stop.is_set() and self._next < len(self._chunks)
+                       and self._chunks[self._next][0] - self._hashed >= window):
+                    self._hash_moved.wait()
+            if self._stop.is_set() or self._next >= len(self._chunks):
+                return None
+            chunk = self._chunks[self._next]
+            self._next += 1
+            return chunk
+
+    def _upload_chunk(self, src, dst, position: int, length: int) -> bool:
+        """Escribe un trozo; False si se interrumpe porque otro canal ha fallado"""
+        src.seek(position)
+        dst.seek(position)
+        remaining = length
+        while remaining > 0:
+            if self._stop.is_set():
+                return False
+            data = src.read(min(WRITE_BLOCK_SIZE, remaining))
+            if not data:
+                raise IOError(f"El archivo local se ha acortado: {self.local_path}")
+            dst.write(data)
+            block_start = position + length - remaining
+            remaining -= len(data)
+            with self._lock:
+                if self.digest is not None:
+                    self._hash_block(block_start, data)
+                self._transferred += len(data)
+                transferred = self._transferred
+            # Outside the lock: a throttled callback sleeps here
+            if self.progress_callback:
+                self.progress_callback(transferred, self.file_size)
+        return True
+
+    def _hash_block(self, position: int, data: bytes):
+        """Pasa un bloque subido por el hash, o lo guarda si aún no le toca (con el lock tomado)"""
+        if position != self._hashed:
+            self._pending[position] = data
+            return
+        while data is not None:
+            self.digest.update(data)
+            self._hashed += len(data)
+            data = self._pending.pop(self._hashed, None)
+        self._hash_moved.notify_all()
+
+    def _truncate_to_prefix(self, start: int):
+        """Recorta el archivo remoto a la parte contigua subida (tras un error)"""
+        prefix = start
+        for position, length in self._chunks:
+            if position not in self._done:
+                break
+            prefix = position + length
+        try:
+            self.sftp.truncate(self.remote_path, prefix)
+        except (paramiko.SSHException, OSError) as e:
+            logger.warning("Could not truncate %s after a failed parallel upload: %s",
+                           self.remote_path, e)
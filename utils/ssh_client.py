@@ -4,14 +4,75 @@
 Cliente SSH para transferencia de archivos a servidor remoto
 """
 
+import hashlib
 import logging
 import os
 import paramiko
+import posixpath
+import shlex
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Hashable, Optional, Tuple
+
+from config import (
+    SFTP_PARALLEL_CHUNK_SIZE, SFTP_PARALLEL_MIN_SIZE, SFTP_PARALLEL_STREAMS,
+    UPLOAD_PART_SUFFIX, RESUME_VERIFY, RESUME_SAMPLES, RESUME_SAMPLE_SIZE, RESUME_TAIL_SIZE,
+    UPLOAD_VERIFY_HASH, UPLOAD_VERIFY_RETRIES, UPLOAD_DEDUP, UPLOAD_DEDUP_VERIFY
+)
+from utils.bandwidth import UPLOAD, ThrottledCallback, get_bandwidth_manager
+from utils.sftp_parallel import ParallelUpload
+from utils.tracing import span
+from utils.upload_index import get_upload_index
 
 logger = logging.getLogger(__name__)
 
+# Tamaño de bloque para subidas que continúan desde un desplazamiento
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# Tamaño de cada lectura al comparar el prefijo de una subida parcial
+VERIFY_BLOCK_SIZE = 1024 * 1024
+
+
+def prefix_ranges(size: int, mode: str = RESUME_VERIFY) -> list:
+    """
+    Rangos de bytes que se comparan para dar por bueno el prefijo de una subida parcial
+
+    Args:
+        size: Bytes del prefijo
+        mode: "full" (el prefijo entero) o "sampled" (el principio, ventanas
+            repartidas y el final, que es lo último que se escribió)
+
+    Returns:
+        list: [(desplazamiento, longitud)] ordenados y sin solapes
+    """
+    tail_start = max(0, size - RESUME_TAIL_SIZE)
+    if mode == "full" or tail_start <= RESUME_SAMPLES * RESUME_SAMPLE_SIZE:
+        points = [(0, size)]
+    else:
+        step = tail_start // RESUME_SAMPLES
+        points = [(i * step, RESUME_SAMPLE_SIZE) for i in range(RESUME_SAMPLES)]
+        points.append((tail_start, size - tail_start))
+    # Lecturas de VERIFY_BLOCK_SIZE como máximo
+    ranges = []
+    for start, length in points:
+        end = min(start + length, size)
+        for position in range(start, end, VERIFY_BLOCK_SIZE):
+            ranges.append((position, min(VERIFY_BLOCK_SIZE, end - position)))
+    return ranges
+
+
+def replace_remote(sftp, source: str, target: str):
+    """Renombra un archivo remoto sustituyendo el destino si existe"""
+    try:
+        sftp.posix_rename(source, target)
+    except IOError:
+        # Servidores sin la extensión posix-rename
+        try:
+            sftp.remove(target)
+        except IOError:
+            pass
+        sftp.rename(source, target)
+
 
 class SSHClient:
     """Cliente SSH para conexión y transferencia de archivos"""
@@ -20,6 +81,7 @@ class SSHClient:
         self.client = None
         self.sftp = None
         self.ssh_config = None
+        self.pool = None  # SSHPool del que se ha prestado la conexión, si lo hay
     
     def connect(self, host: str, port: int, username: str, 
                 password: Optional[str] = None, 
@@ -47,55 +109,58 @@ class SSHClient:
                 'key_file': key_file
             }
             
-            self.client = paramiko.SSHClient()
-            self.client.set_missing_host_key_policy(paramiko.WarningPolicy())
-            # Load known hosts if available
-            known_hosts = Path.home() / ".ssh" / "known_hosts"
-            if known_hosts.exists():
-                self.client.load_host_keys(str(known_hosts))
+            auth = "key" if key_file else "password" if password else "default"
+            with span("ssh.connect", "ssh", host=host, port=port, auth=auth):
+                self.client = paramiko.SSHClient()
+                self.client.set_missing_host_key_policy(paramiko.WarningPolicy())
+                # Load known hosts if available
+                known_hosts = Path.home() / ".ssh" / "known_hosts"
+                if known_hosts.exists():
+                    self.client.load_host_keys(str(known_hosts))
             
-            # Intentar con clave privada primero
-            if key_file and os.path.exists(key_file):
-                try:
-                    self.client.connect(
-                        hostname=host,
-                        port=port,
-                        username=username,
-                        key_filename=key_file,
-                        timeout=10
-                    )
-                except Exception as e:
-                    # Si falla con clave, intentar con contraseña
-                    if password:
+                # Intentar con clave privada primero
+                if key_file and os.path.exists(key_file):
+                    try:
                         self.client.connect(
                             hostname=host,
                             port=port,
                             username=username,
-                            password=password,
+                            key_filename=key_file,
                             timeout=10
                         )
-                    else:
-                        raise e
-            elif password:
-                # Conectar con contraseña
-                self.client.connect(
-                    hostname=host,
-                    port=port,
-                    username=username,
-                    password=password,
-                    timeout=10
-                )
-            else:
-                # Intentar con clave por defecto
-                self.client.connect(
-                    hostname=host,
-                    port=port,
-                    username=username,
-                    timeout=10
-                )
+                    except Exception as e:
+                        # Si falla con clave, intentar con contraseña
+                        if password:
+                            self.client.connect(
+                                hostname=host,
+                                port=port,
+                                username=username,
+                                password=password,
+                                timeout=10
+                            )
+                        else:
+                            raise e
+                elif password:
+                    # Conectar con contraseña
+                    self.client.connect(
+                        hostname=host,
+                        port=port,
+                        username=username,
+                        password=password,
+                        timeout=10
+                    )
+                else:
+                    # Intentar con clave por defecto
+                    self.client.connect(
+                        hostname=host,
+                        port=port,
+                        username=username,
+                        timeout=10
+                    )
             
             # Crear cliente SFTP
-            self.sftp = self.client.open_sftp()
+            with span("sftp.open", "ssh"):
+                self.sftp = self.client.open_sftp()
             
             return True, "Conexión exitosa"
         
@@ -106,8 +171,17 @@ class SSHClient:
         except Exception as e:
             return False, f"Error de conexión: {str(e)}"
     
-    def disconnect(self):
-        """Cierra la conexión SSH"""
+    def disconnect(self, reusable: bool = True):
+        """
+        Cierra la conexión SSH (o la devuelve a su pool)
+
+        Args:
+            reusable: Solo para conexiones del pool: False cierra el canal
+                SFTP en vez de guardarlo (p. ej. tras un error de transferencia)
+        """
+        if self.pool is not None:
+            self.pool.release(self, reusable)
+            return
         try:
             if self.sftp:
                 self.sftp.close()
@@ -130,12 +204,66 @@ class SSHClient:
             return False, "No hay conexión establecida"
         
         try:
-            stdin, stdout, stderr = self.client.exec_command('echo "test"')
-            stdout.channel.recv_exit_status()
+            self.run_command('echo "test"')
             return True, "Conexión activa"
         except Exception as e:
             return False, f"Error al probar conexión: {str(e)}"
     
+    def run_command(self, command: str) -> Tuple[int, str, str]:
+        """
+        Ejecuta un comando en el servidor y espera a que termine
+
+        En una conexión del pool el canal del comando cuenta en el límite de
+        canales de la conexión (espera a que haya uno libre).
+
+        Args:
+            command: Comando para el shell remoto
+
+        Returns:
+            tuple: (código de salida, salida estándar, salida de errores)
+
+        Raises:
+            paramiko.SSHException: Si no se pudo abrir el canal
+        """
+        slot = self.pool.channel_slot(self) if self.pool is not None else nullcontext()
+        with slot:
+            stdin, stdout, stderr = self.client.exec_command(command)
+            try:
+                output = stdout.read()
+                errors = stderr.read()
+                exit_status = stdout.channel.recv_exit_status()
+            finally:
+                stdout.channel.close()
+        return (exit_status, output.decode('utf-8', errors='replace'),
+                errors.decode('utf-8', errors='replace'))
+
+    def open_extra_sftp(self) -> Optional[paramiko.SFTPClient]:
+        """
+        Abre otro canal SFTP sobre la misma conexión (p. ej. para subir en paralelo)
+
+        Returns:
+            SFTPClient: Canal (hay que cerrarlo con close_extra_sftp()), o None
+            si no quedan canales libres en la conexión
+        """
+        if self.pool is not None:
+            return self.pool.open_channel(self)
+        try:
+            with span("sftp.open", "ssh"):
+                return self.client.open_sftp()
+        except paramiko.ChannelException as e:
+            logger.info("SSH server refused another session channel: %s", e)
+            return None
+
+    def close_extra_sftp(self, sftp: paramiko.SFTPClient):
+        """Cierra un canal abierto con open_extra_sftp()"""
+        if self.pool is not None:
+            self.pool.close_channel(self, sftp)
+            return
+        try:
+            sftp.close()
+        except (paramiko.SSHException, OSError) as e:
+            logger.debug("Error closing SFTP channel: %s", e)
+
     def list_directory(self, remote_path: str) -> Tuple[bool, list, str]:
         """
         Lista el contenido de un directorio remoto
@@ -172,26 +300,53 @@ class SSHClient:
         
         try:
             # Crear directorio recursivamente
-            stdin, stdout, stderr = self.client.exec_command(f'mkdir -p "{remote_path}"')
-            exit_status = stdout.channel.recv_exit_status()
+            with span("ssh.mkdir", "ssh", path=remote_path):
+                exit_status, _, error = self.run_command(f'mkdir -p "{remote_path}"')
             
             if exit_status == 0:
                 return True, "Directorio creado correctamente"
             else:
-                error = stderr.read().decode()
                 return False, f"Error al crear directorio: {error}"
         except Exception as e:
             return False, f"Error al crear directorio: {str(e)}"
     
     def upload_file(self, local_path: str, remote_path: str, 
-                   progress_callback=None) -> Tuple[bool, str]:
+                   progress_callback=None, resume: bool = False,
+                   flow: Optional[Hashable] = None, streams: Optional[int] = None,
+                   chunk_size: int = SFTP_PARALLEL_CHUNK_SIZE,
+                   verify: bool = UPLOAD_VERIFY_HASH,
+                   dedup: bool = UPLOAD_DEDUP) -> Tuple[bool, str]:
         """
         Sube un archivo al servidor remoto usando SFTP optimizado
         
+        Se escribe como ``<remote_path>.part`` y se renombra al terminar, así
+        que el destino nunca queda a medias y una subida fallida se puede
+        continuar. Con ``verify`` se calcula el SHA-256 de los datos a medida
+        que se envían y se compara con el del ``.part`` en el servidor antes
+        de renombrarlo; si no coincide, el archivo se vuelve a subir
+        (UPLOAD_VERIFY_RETRIES veces como máximo) y, si sigue sin coincidir,
+        el ``.part`` se deja en el servidor sin renombrar. Con ``dedup`` no se envía
+        lo que el servidor ya tiene (ver _reuse_remote_copy) y cada subida se
+        anota en el índice de subidas.
+        
         Args:
             local_path: Ruta local del archivo
             remote_path: Ruta remota donde guardar
-            progress_callback: Función callback para progreso (bytes_transferred, total_bytes)
+            progress_callback: Función callback para progreso (bytes_transferred,
+                total_bytes); en cada intento se llama primero con el byte desde
+                el que empieza (lo ya subido si se reanuda, o el tamaño entero
+                si el servidor ya tenía el archivo)
+            resume: True para continuar una subida interrumpida: si existe
+                ``<remote_path>.part`` y su contenido coincide con el principio
+                del archivo local, se sigue desde su tamaño
+            flow: Identificador del trabajo en el limitador de ancho de banda
+                (por defecto, la propia conexión)
+            streams: Canales SFTP en paralelo (por defecto SFTP_PARALLEL_STREAMS
+                si quedan al menos SFTP_PARALLEL_MIN_SIZE bytes; 1 = un solo canal)
+            chunk_size: Bytes de cada trozo de la subida en paralelo
+            verify: Comprobar el hash del archivo remoto (si el servidor no
+                puede calcularlo, solo se comprueba el tamaño)
+            dedup: Reutilizar el contenido que ya está en el servidor
             
         Returns:
             tuple: (éxito: bool, mensaje: str)
@@ -207,7 +362,7 @@ class SSHClient:
             file_size = os.path.getsize(local_path)
             
             # Crear directorio remoto si no existe
-            remote_dir = os.path.dirname(remote_path)
+            remote_dir = posixpath.dirname(remote_path)
             if remote_dir:
                 self.create_directory(remote_dir)
             
@@ -220,20 +375,84 @@ class SSHClient:
                     # Aumentar tamaño de buffer para mejor rendimiento
                     channel.set_combine_stderr(True)
                 
-                # Subir archivo directamente
-                # Paramiko SFTP es confiable para archivos grandes
-                self.sftp.put(local_path, remote_path, callback=progress_callback)
-                
-                # Verificar que el archivo se subió correctamente
-                try:
-                    remote_stat = self.sftp.stat(remote_path)
-                    if remote_stat.st_size == file_size:
-                        return True, f"Archivo subido correctamente ({file_size / 1024 / 1024:.2f} MB)"
-                    else:
-                        return False, f"Error: El archivo remoto tiene un tamaño diferente ({remote_stat.st_size} vs {file_size} bytes)"
-                except (IOError, OSError):
-                    # Si no se puede verificar, asumir que se subió correctamente
-                    return True, "Archivo subido correctamente"
+                part_path = remote_path + UPLOAD_PART_SUFFIX
+                server = self._server_key()
+                index = get_upload_index() if dedup and server else None
+                local_hash = None
+                if index is not None:
+                    reused, local_hash = self._reuse_remote_copy(
+                        index, server, local_path, remote_path, file_size
+                    )
+                    if reused:
+                        if progress_callback:
+                            progress_callback(file_size, file_size)
+                        return True, reused
+
+                offset = self._verified_prefix(local_path, part_path, file_size) if resume else 0
+
+                for attempt in range(UPLOAD_VERIFY_RETRIES + 1):
+                    # The hash sees the same bytes as the upload; a resumed prefix is read locally.
+                    # If deduplication already hashed the whole file, that hash is used instead
+                    needs_hash = (verify or index is not None) and local_hash is None
+                    digest = self._local_digest(local_path, offset) if needs_hash else None
+
+                    # Cada bloque escrito descuenta del limitador de subida compartido
+                    callback = ThrottledCallback(
+                        get_bandwidth_manager(), UPLOAD, flow if flow is not None else id(self),
+                        progress_callback, start=offset
+                    )
+                    callback(offset, file_size)
+
+                    channels = streams
+                    if channels is None:
+                        parallel = file_size - offset >= SFTP_PARALLEL_MIN_SIZE
+                        channels = SFTP_PARALLEL_STREAMS if parallel else 1
+
+                    with span("sftp.upload", "ssh", path=remote_path, bytes=file_size - offset,
+                              offset=offset, streams=channels, attempt=attempt):
+                        if channels > 1:
+                            ParallelUpload(
+                                self, self.sftp, local_path, part_path, file_size,
+                                streams=channels, chunk_size=chunk_size,
+                                progress_callback=callback, digest=digest
+                            ).run(offset)
+                        else:
+                            self._upload_from_offset(
+                                local_path, part_path, offset, file_size, callback, digest
+                            )
+
+                    # Verificar que el archivo se subió correctamente
+                    with span("sftp.verify", "ssh", path=part_path):
+                        remote_size = self.get_file_size(part_path)
+                    if remote_size is not None and remote_size != file_size:
+                        # El .part se queda para continuar en el siguiente intento
+                        return False, f"Error: El archivo remoto tiene un tamaño diferente ({remote_size} vs {file_size} bytes)"
+                    sha256 = digest.hexdigest() if digest is not None else local_hash
+                    if not verify:
+                        break
+
+                    with span("sftp.checksum", "ssh", path=part_path) as s:
+                        remote_hash = self.get_remote_sha256(part_path)
+                        s.set(available=remote_hash is not None, match=remote_hash == sha256)
+                    if remote_hash is None:
+                        logger.info("Server cannot hash %s, upload checked by size only", part_path)
+                        break
+                    if remote_hash == sha256:
+                        break
+                    logger.warning("Checksum mismatch for %s (attempt %d of %d)",
+                                   part_path, attempt + 1, UPLOAD_VERIFY_RETRIES + 1)
+                    offset = 0
+                else:
+                    # The .part stays for inspection and is never renamed; resume verifies its prefix
+                    return False, "Error: El hash del archivo remoto no coincide con el local"
+
+                replace_remote(self.sftp, part_path, remote_path)
+                if index is not None:
+                    index.add(server, remote_path, file_size, sha256)
+                if offset:
+                    return True, (f"Archivo subido correctamente ({file_size / 1024 / 1024:.2f} MB, "
+                                  f"reanudado en {offset / 1024 / 1024:.2f} MB)")
+                return True, f"Archivo subido correctamente ({file_size / 1024 / 1024:.2f} MB)"
             
             except Exception as sftp_error:
                 logger.error("SFTP upload failed: %s", sftp_error)
@@ -242,6 +461,260 @@ class SSHClient:
         except Exception as e:
             return False, f"Error al subir archivo: {str(e)}"
     
+    def _server_key(self) -> Optional[str]:
+        """Servidor de la conexión ("usuario@host:puerto") para el índice de subidas"""
+        if not self.ssh_config:
+            return None
+        return f"{self.ssh_config['username']}@{self.ssh_config['host']}:{self.ssh_config['port']}"
+
+    def _reuse_remote_copy(self, index, server: str, local_path: str,
+                           remote_path: str, file_size: int) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Evita la subida si el servidor ya tiene el contenido del archivo local
+
+        Si el destino ya es idéntico no hace nada; si el índice de subidas
+        conoce otra copia en el servidor, la enlaza en el destino sin enviar
+        datos. El hash local solo se calcula cuando hay candidatos del mismo
+        tamaño. Las entradas del índice que ya no coinciden se eliminan.
+
+        Args:
+            index: UploadIndex
+            server: Servidor ("usuario@host:puerto")
+            local_path: Ruta local del archivo
+            remote_path: Ruta remota de destino
+            file_size: Tamaño del archivo local
+
+        Returns:
+            tuple: (mensaje de éxito si no hace falta subir el archivo o None,
+            SHA-256 del archivo local si se ha calculado o None)
+        """
+        target_size = self.get_file_size(remote_path)
+        if target_size != file_size and not index.has_size(server, file_size):
+            return None, None
+
+        size_mb = file_size / 1024 / 1024
+        with span("upload.dedup", "ssh", path=remote_path, bytes=file_size) as s:
+            local_hash = self._local_digest(local_path, file_size).hexdigest()
+            candidates = index.find(server, file_size, local_hash, folder=posixpath.dirname(remote_path))
+            try:
+                if target_size == file_size and self._remote_copy_matches(
+                        remote_path, file_size, local_hash, indexed=remote_path in candidates):
+                    index.add(server, remote_path, file_size, local_hash)
+                    s.set(result="present")
+                    logger.info("Skipping upload of %s: the server already has it", remote_path)
+                    return f"El archivo ya estaba en el servidor ({size_mb:.2f} MB, sin subir)", local_hash
+
+                for source in candidates:
+                    if source == remote_path:
+                        continue
+                    if not self._remote_copy_matches(source, file_size, local_hash, indexed=True):
+                        logger.info("Upload index entry %s is stale, dropping it", source)
+                        index.remove(server, source)
+                        continue
+                    if self._link_remote(source, remote_path):
+                        index.add(server, remote_path, file_size, local_hash)
+                        s.set(result="linked", source=source)
+                        logger.info("Linked %s to existing remote copy %s", remote_path, source)
+                        return (f"Archivo enlazado en el servidor desde {source} "
+                                f"({size_mb:.2f} MB, sin subir)"), local_hash
+            except (IOError, paramiko.SSHException) as e:
+                # Deduplication is an optimisation: fall back to a normal upload
+                logger.warning("Upload deduplication for %s failed: %s", remote_path, e)
+            s.set(result="upload")
+        return None, local_hash
+
+    def has_uploaded(self, remote_path: str, file_size: int, dedup: bool = UPLOAD_DEDUP) -> bool:
+        """
+        Indica si ``remote_path`` ya tiene el contenido que el índice de subidas
+        registró para él, con ``file_size`` bytes
+
+        Sirve para las subidas cuyo hash no se conoce hasta enviarlas (streaming):
+        se compara el archivo remoto con el hash del índice. Una entrada que ya
+        no coincide se elimina.
+
+        Args:
+            remote_path: Ruta remota de destino
+            file_size: Tamaño que se va a subir
+            dedup: False para no consultar el índice
+
+        Returns:
+            bool: True si no hace falta subir el archivo
+        """
+        server = self._server_key()
+        if not dedup or not server:
+            return False
+        index = get_upload_index()
+        entry = index.get(server, remote_path)
+        if entry is None or entry[0] != file_size:
+            return False
+        if self._remote_copy_matches(remote_path, file_size, entry[1], indexed=True):
+            logger.info("Skipping upload of %s: the server already has it", remote_path)
+            return True
+        logger.info("Upload index entry %s is stale, dropping it", remote_path)
+        index.remove(server, remote_path)
+        return False
+
+    def record_upload(self, remote_path: str, file_size: int, sha256: str,
+                      dedup: bool = UPLOAD_DEDUP):
+        """
+        Anota en el índice de subidas un archivo subido sin upload_file() (p. ej. en streaming)
+
+        Args:
+            remote_path: Ruta remota del archivo
+            file_size: Tamaño en bytes
+            sha256: Hash del contenido enviado en hexadecimal
+            dedup: False para no anotarlo
+        """
+        server = self._server_key()
+        if dedup and server:
+            get_upload_index().add(server, remote_path, file_size, sha256)
+
+    def _remote_copy_matches(self, remote_path: str, file_size: int, sha256: str,
+                             indexed: bool) -> bool:
+        """
+        Comprueba que un archivo remoto tiene el contenido esperado
+
+        Args:
+            indexed: El índice de subidas ya lo da por igual; entonces basta el
+                tamaño salvo que UPLOAD_DEDUP_VERIFY pida el hash remoto
+
+        Returns:
+            bool: True si coincide; si el servidor no puede calcular el hash,
+            True solo para las copias del índice
+        """
+        if self.get_file_size(remote_path) != file_size:
+            return False
+        if indexed and not UPLOAD_DEDUP_VERIFY:
+            return True
+        remote_hash = self.get_remote_sha256(remote_path)
+        if remote_hash is None:
+            # Without a server-side hash, the index and the size are all there is
+            return indexed
+        return remote_hash == sha256
+
+    def _link_remote(self, source: str, remote_path: str) -> bool:
+        """
+        Crea ``remote_path`` en el servidor a partir de otro archivo remoto
+
+        Se intenta un enlace duro y, si no es posible (otro sistema de
+        archivos, sin permiso), una copia con reflink cuando el sistema de
+        archivos lo admite. Las subidas escriben siempre un ``.part`` nuevo y
+        lo renombran, así que nunca modifican un archivo enlazado.
+
+        Returns:
+            bool: True si el destino ya tiene el contenido
+        """
+        part_path = remote_path + UPLOAD_PART_SUFFIX
+        src, dst = shlex.quote(source), shlex.quote(part_path)
+        try:
+            exit_status, _, error = self.run_command(
+                f"ln -f -- {src} {dst} 2>/dev/null || cp -f --reflink=auto -- {src} {dst}"
+            )
+        except (paramiko.SSHException, OSError) as e:
+            logger.debug("Remote link command failed: %s", e)
+            return False
+        if exit_status != 0:
+            logger.info("Could not link %s on the server: %s", source, error.strip())
+            return False
+        try:
+            replace_remote(self.sftp, part_path, remote_path)
+        except IOError:
+            # A .part sharing the source's inode must not be written to by a later upload
+            self.sftp.remove(part_path)
+            raise
+        return True
+
+    def _verified_prefix(self, local_path: str, part_path: str, file_size: int) -> int:
+        """
+        Bytes de una subida parcial que se pueden conservar
+
+        Compara el ``.part`` remoto con el principio del archivo local (entero
+        o por muestras, según RESUME_VERIFY) mediante un hash de cada lado.
+
+        Returns:
+            int: Tamaño del ``.part`` si coincide; 0 si no existe, es más grande
+            que el archivo local o su contenido es distinto
+        """
+        remote_size = self.get_file_size(part_path)
+        if not remote_size:
+            return 0
+        if remote_size > file_size:
+            logger.warning("Partial upload %s is larger than the local file, starting over", part_path)
+            return 0
+
+        ranges = prefix_ranges(remote_size)
+        with span("sftp.verify_prefix", "ssh", path=part_path, bytes=remote_size,
+                  mode=RESUME_VERIFY, compared=sum(length for _, length in ranges)) as s:
+            local_digest = hashlib.sha256()
+            with open(local_path, 'rb') as src:
+                for position, length in ranges:
+                    src.seek(position)
+                    local_digest.update(src.read(length))
+
+            remote_digest = hashlib.sha256()
+            with self.sftp.open(part_path, 'rb') as remote:
+                # readv pide los bloques por adelantado; por lotes para acotar la memoria
+                for batch in range(0, len(ranges), 64):
+                    for data in remote.readv(ranges[batch:batch + 64]):
+                        remote_digest.update(data)
+            match = local_digest.digest() == remote_digest.digest()
+            s.set(match=match)
+
+        if not match:
+            logger.warning("Partial upload %s does not match the local file, starting over", part_path)
+            return 0
+        logger.info("Resuming upload of %s at byte %d (prefix verified)", part_path, remote_size)
+        return remote_size
+
+    def _local_digest(self, local_path: str, end: int):
+        """
+        Hash SHA-256 con los primeros ``end`` bytes del archivo local ya añadidos
+
+        Returns:
+            Objeto de hashlib listo para recibir el resto del archivo
+        """
+        digest = hashlib.sha256()
+        with open(local_path, 'rb') as src:
+            remaining = end
+            while remaining > 0:
+                data = src.read(min(VERIFY_BLOCK_SIZE, remaining))
+                if not data:
+                    break
+                digest.update(data)
+                remaining -= len(data)
+        return digest
+
+    def _upload_from_offset(self, local_path: str, remote_path: str, offset: int,
+                            file_size: int, progress_callback=None, digest=None):
+        """
+        Sube el archivo por un solo canal desde ``offset`` hasta el final
+        
+        Args:
+            local_path: Ruta local del archivo
+            remote_path: Ruta remota (ya contiene los primeros ``offset`` bytes;
+                con ``offset`` 0 se crea o se vacía)
+            offset: Byte desde el que continuar
+            file_size: Tamaño total del archivo local
+            progress_callback: Función callback para progreso (bytes_transferred, total_bytes)
+            digest: Objeto de hashlib al que añadir cada bloque enviado
+        """
+        mode = 'r+b' if offset else 'wb'
+        with open(local_path, 'rb') as src, self.sftp.open(remote_path, mode) as dst:
+            dst.set_pipelined(True)
+            src.seek(offset)
+            dst.seek(offset)
+            transferred = offset
+            while True:
+                chunk = src.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                dst.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+                transferred += len(chunk)
+                if progress_callback:
+                    progress_callback(transferred, file_size)
+    
     def file_exists(self, remote_path: str) -> bool:
         """
         Verifica si un archivo existe en el servidor remoto
@@ -261,6 +734,45 @@ class SSHClient:
         except (IOError, OSError):
             return False
     
+    def get_remote_sha256(self, remote_path: str) -> Optional[str]:
+        """
+        Calcula en el servidor el SHA-256 de un archivo remoto
+
+        Usa la extensión SFTP check-file si el servidor la ofrece y, si no,
+        sha256sum (o shasum) por SSH, así que el archivo no viaja por la red.
+
+        Args:
+            remote_path: Ruta del archivo remoto
+
+        Returns:
+            str: Hash en hexadecimal, None si el servidor no puede calcularlo
+        """
+        if not self.sftp:
+            return None
+
+        try:
+            with self.sftp.open(remote_path, 'rb') as remote:
+                return remote.check('sha256').hex()
+        except (IOError, paramiko.SSHException):
+            pass  # Most servers (OpenSSH included) lack check-file
+
+        if not self.client:
+            return None
+        quoted = shlex.quote(remote_path)
+        try:
+            exit_status, output, _ = self.run_command(
+                f"sha256sum -- {quoted} 2>/dev/null || shasum -a 256 -- {quoted}"
+            )
+            output = output.split()
+        except (paramiko.SSHException, OSError) as e:
+            logger.debug("Remote hash command failed: %s", e)
+            return None
+        # sha256sum prefixes the hash with a backslash for names that need escaping
+        remote_hash = output[0].lstrip('\\').lower() if output else ''
+        if exit_status != 0 or len(remote_hash) != 64:
+            return None
+        return remote_hash
+
     def get_file_size(self, remote_path: str) -> Optional[int]:
         """
         Obtiene el tamaño de un archivo remoto
@@ -48,15 +48,15 @@ def test_ssh_upload(host, port, username, password, key_file, remote_folder, tes
 
     # Verificar carpeta remota
     logger.info("3. Verificando carpeta remota: %s", remote_folder)
-    stdin, stdout, stderr = ssh_client.client.exec_command(f'test -d "{remote_folder}" && echo "EXISTS" || echo "NOT_EXISTS"')
-    folder_exists = stdout.read().decode().strip()
+    _, folder_exists, _ = ssh_client.run_command(f'test -d "{remote_folder}" && echo "EXISTS" || echo "NOT_EXISTS"')
+    folder_exists = folder_exists.strip()
 
     if folder_exists == "EXISTS":
         logger.info("La carpeta existe")
 
         # Verificar permisos de escritura
-        stdin, stdout, stderr = ssh_client.client.exec_command(f'test -w "{remote_folder}" && echo "WRITABLE" || echo "NOT_WRITABLE"')
-        is_writable = stdout.read().decode().strip()
+        _, is_writable, _ = ssh_client.run_command(f'test -w "{remote_folder}" && echo "WRITABLE" || echo "NOT_WRITABLE"')
+        is_writable = is_writable.strip()
 
         if is_writable == "WRITABLE":
             logger.info("La carpeta tiene permisos de escritura")
@@ -74,8 +74,7 @@ def test_ssh_upload(host, port, username, password, key_file, remote_folder, tes
 
     # Verificar espacio en disco
     logger.info("4. Verificando espacio en disco...")
-    stdin, stdout, stderr = ssh_client.client.exec_command(f'df -h "{remote_folder}"')
-    disk_info = stdout.read().decode()
+    _, disk_info, _ = ssh_client.run_command(f'df -h "{remote_folder}"')
     logger.info(disk_info)
 
     # Probar subida de archivo pequeño si se proporciona
@@ -84,7 +83,9 @@ def test_ssh_upload(host, port, username, password, key_file, remote_folder, tes
         import os
         if os.path.exists(test_file_path):
             remote_test_path = f"{remote_folder}/test_upload.tmp"
-            upload_success, upload_msg = ssh_client.upload_file(test_file_path, remote_test_path)
+            upload_success, upload_msg = ssh_client.upload_file(
+                test_file_path, remote_test_path, dedup=False  # the test must really transfer
+            )
             if upload_success:
                 logger.info("Subida de prueba exitosa")
                 # Eliminar archivo de prueba
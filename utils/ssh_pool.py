@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool de conexiones SSH/SFTP reutilizables entre trabajos y diálogos.
+
+Abrir una conexión cuesta TCP, intercambio de claves, autenticación y la
+apertura del canal SFTP. El pool mantiene abiertas las conexiones (con
+keepalive) por servidor, usuario y credencial, y las presta como SSHClient:
+cada préstamo tiene su propio canal SFTP sobre el transporte compartido, y
+``disconnect()`` lo devuelve al pool en vez de cerrar la conexión.
+
+El servidor limita los canales de sesión abiertos a la vez en cada conexión
+(MaxSessions en OpenSSH), así que el pool cuenta los que abre en cada una y
+no pasa de SSH_POOL_MAX_CHANNELS ni del límite que el servidor haya mostrado
+al rechazar un canal; un canal rechazado no cierra la conexión. Los canales
+SFTP adicionales de un préstamo (open_channel) y los comandos (channel_slot)
+también cuentan, y los canales SFTP siempre dejan uno libre para los comandos.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+import paramiko
+
+from config import (
+    SSH_POOL_MAX_CHANNELS, SSH_POOL_IDLE_TIMEOUT, SSH_POOL_PROBE_AFTER,
+    SSH_POOL_PROBE_TIMEOUT, SSH_POOL_CHANNEL_WAIT, SSH_KEEPALIVE_INTERVAL
+)
+from utils.ssh_client import SSHClient
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class _Connection:
+    """Conexión abierta del pool: transporte compartido y canales SFTP libres"""
+
+    __slots__ = ('key', 'client', 'leases', 'idle_sftp', 'channels', 'limit',
+                 'last_used', 'closed')
+
+    def __init__(self, key: tuple, client: paramiko.SSHClient, limit: int):
+        self.key = key
+        self.client = client
+        self.leases = 0
+        self.idle_sftp = []
+        self.channels = 0    # canales de sesión abiertos (prestados y libres)
+        self.limit = limit   # baja si el servidor rechaza un canal
+        self.last_used = time.monotonic()
+        self.closed = False
+
+
+class SSHPool:
+    """
+    Conexiones SSH abiertas por (host, puerto, usuario, clave).
+
+    La contraseña también forma parte de la clave (como hash), para que una
+    credencial distinta no reutilice una conexión autenticada con otra.
+    """
+
+    def __init__(self, max_channels: int = SSH_POOL_MAX_CHANNELS,
+                 idle_timeout: float = SSH_POOL_IDLE_TIMEOUT,
+                 probe_after: float = SSH_POOL_PROBE_AFTER,
+                 keepalive: int = SSH_KEEPALIVE_INTERVAL):
+        """
+        Args:
+            max_channels: Canales de sesión abiertos a la vez por conexión; si
+                todas las del servidor están llenas se abre otra
+            idle_timeout: Segundos sin préstamos tras los que se cierra una conexión
+            probe_after: Segundos de inactividad tras los que una conexión se
+                comprueba con una petición SFTP antes de prestarla
+            keepalive: Segundos entre keepalives del transporte (0 = sin keepalive)
+        """
+        self.max_channels = max_channels
+        self.idle_timeout = idle_timeout
+        self.probe_after = probe_after
+        self.keepalive = keepalive
+        self._connections = []
+        self._leases = {}  # id(SSHClient) -> _Connection
+        self._lock = threading.Lock()
+        self._channel_freed = threading.Condition(self._lock)
+        self._timer = None
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    @staticmethod
+    def key_for(ssh_config: dict) -> tuple:
+        """Clave de la conexión de una configuración SSH"""
+        password = ssh_config.get('password') or ''
+        return (
+            ssh_config['host'], int(ssh_config['port']), ssh_config['username'],
+            ssh_config.get('key_file') or None,
+            hashlib.sha256(password.encode('utf-8')).hexdigest(),
+        )
+
+    def acquire(self, ssh_config: dict) -> Tuple[Optional[SSHClient], str]:
+        """
+        Presta una conexión al servidor de la configuración
+
+        Reutiliza una conexión abierta con canales libres si sigue viva; si
+        no, conecta. Hay que devolverla con disconnect() (o release()).
+
+        Args:
+            ssh_config: Configuración SSH (host, port, username, password, key_file)
+
+        Returns:
+            tuple: (SSHClient o None si no se pudo conectar, mensaje)
+        """
+        key = self.key_for(ssh_config)
+        tried = []
+        with span("ssh.pool.acquire", "ssh", host=ssh_config['host']) as s:
+            while True:
+                with self._lock:
+                    conn = self._pick(key, tried)
+                    if conn is None:
+                        break
+                    conn.leases += 1
+                    if conn.idle_sftp:
+                        sftp = conn.idle_sftp.pop()
+                    else:
+                        # Reserve the channel before opening it outside the lock
+                        sftp = None
+                        conn.channels += 1
+                    idle_for = time.monotonic() - conn.last_used
+                tried.append(conn)
+                client = self._lease(conn, ssh_config, sftp, idle_for)
+                if client is not None:
+                    with self._lock:
+                        self.hits += 1
+                    s.set(reused=True)
+                    return client, "Conexión reutilizada"
+
+            s.set(reused=False)
+            client = SSHClient()
+            ok, message = client.connect(
+                ssh_config['host'], ssh_config['port'], ssh_config['username'],
+                ssh_config.get('password'), ssh_config.get('key_file')
+            )
+            with self._lock:
+                self.misses += 1
+            if not ok:
+                return None, message
+
+            transport = client.client.get_transport()
+            if self.keepalive:
+                transport.set_keepalive(self.keepalive)
+            conn = _Connection(key, client.client, self.max_channels)
+            conn.leases = 1
+            conn.channels = 1
+            client.pool = self
+            with self._lock:
+                self._connections.append(conn)
+                self._leases[id(client)] = conn
+            return client, message
+
+    def _pick(self, key: tuple, tried: list) -> Optional[_Connection]:
+        """Conexión del servidor con canales libres y aún no probada (con el lock tomado)"""
+        candidates = [c for c in self._connections
+                      if c.key == key and c not in tried
+                      and (c.idle_sftp or c.channels + 1 < c.limit)]
+        if not candidates:
+            return None
+        # Mejor una con canal SFTP ya abierto; entre ellas, la usada más recientemente
+        return max(candidates, key=lambda c: (bool(c.idle_sftp), c.last_used))
+
+    def _lease(self, conn: _Connection, ssh_config: dict, sftp, idle_for: float) -> Optional[SSHClient]:
+        """
+        Comprueba una conexión elegida y la envuelve en un SSHClient
+
+        Si el servidor rechaza el canal (límite de sesiones) o el canal falla
+        con la conexión viva, solo se devuelve el préstamo: la conexión sigue
+        en el pool para el resto de sus préstamos.
+
+        Returns:
+            SSHClient: Préstamo, o None si no se pudo usar la conexión (si
+            estaba muerta, se descarta)
+        """
+        transport = conn.client.get_transport()
+        if transport is None or not transport.is_active() or not transport.is_authenticated():
+            self._discard(conn, sftp)
+            return None
+        try:
+            if sftp is not None and idle_for >= self.probe_after:
+                channel = sftp.get_channel()
+                timeout = channel.gettimeout()
+                channel.settimeout(SSH_POOL_PROBE_TIMEOUT)
+                sftp.stat('.')
+                channel.settimeout(timeout)
+            if sftp is None:
+                with span("sftp.open", "ssh"):
+                    sftp = conn.client.open_sftp()
+        except paramiko.ChannelException as e:
+            # The server's session limit (MaxSessions): the connection itself is fine
+            with self._lock:
+                conn.leases -= 1
+            self._unreserve(conn, refused=e)
+            return None
+        except (paramiko.SSHException, OSError, EOFError) as e:
+            logger.info("Pooled SSH connection to %s failed its check: %s", conn.key[0], e)
+            if not transport.is_active():
+                self._discard(conn, sftp)
+                return None
+            # Only this channel is broken
+            with self._lock:
+                conn.leases -= 1
+            self._unreserve(conn)
+            if sftp is not None:
+                self._close_quietly(sftp)
+            return None
+
+        client = SSHClient()
+        client.client = conn.client
+        client.sftp = sftp
+        client.ssh_config = {k: ssh_config.get(k) for k in
+                             ('host', 'port', 'username', 'password', 'key_file')}
+        client.pool = self
+        with self._lock:
+            self._leases[id(client)] = conn
+        return client
+
+    def _discard(self, conn: _Connection, sftp=None):
+        """Saca del pool una conexión muerta y la cierra"""
+        with self._lock:
+            conn.leases -= 1
+            if conn in self._connections:
+                self._connections.remove(conn)
+            channels, conn.idle_sftp = conn.idle_sftp, []
+            conn.closed = True
+        for channel in channels + ([sftp] if sftp is not None else []):
+            self._close_quietly(channel)
+        self._close_quietly(conn.client)
+
+    def release(self, client: SSHClient, reusable: bool = True):
+        """
+        Devuelve un préstamo al pool
+
+        Args:
+            client: SSHClient obtenido con acquire()
+            reusable: False para cerrar su canal SFTP en vez de guardarlo
+                (p. ej. tras un error a mitad de una transferencia)
+        """
+        with self._lock:
+            conn = self._leases.pop(id(client), None)
+        sftp, client.sftp, client.client, client.pool = client.sftp, None, None, None
+        if conn is None:
+            return
+
+        transport = conn.client.get_transport()
+        alive = transport is not None and transport.is_active()
+        close_connection = False
+        with self._lock:
+            conn.leases -= 1
+            conn.last_used = time.monotonic()
+            keep = reusable and alive and sftp is not None and not conn.closed
+            if keep:
+                conn.idle_sftp.append(sftp)
+            elif sftp is not None:
+                conn.channels -= 1
+                self._channel_freed.notify_all()
+            if not alive and conn in self._connections:
+                self._connections.remove(conn)
+            if conn.leases == 0 and conn not in self._connections and not conn.closed:
+                conn.closed = close_connection = True
+        if not keep and sftp is not None:
+            self._close_quietly(sftp)
+        if close_connection:
+            self._close_quietly(conn.client)
+        self._schedule_eviction()
+
+    def open_channel(self, client: SSHClient) -> Optional[paramiko.SFTPClient]:
+        """
+        Abre otro canal SFTP en la conexión de un préstamo, sin esperar
+
+        Args:
+            client: SSHClient obtenido con acquire()
+
+        Returns:
+            SFTPClient: Canal (hay que cerrarlo con close_channel()), o None si
+            la conexión no tiene canales libres
+        """
+        conn, idle = self._reserve(client, spare=1, timeout=0)
+        if conn is None:
+            return None
+        if idle is not None:
+            self._close_quietly(idle)
+        try:
+            with span("sftp.open", "ssh"):
+                return conn.client.open_sftp()
+        except paramiko.ChannelException as e:
+            self._unreserve(conn, refused=e)
+            return None
+        except BaseException:
+            self._unreserve(conn)
+            raise
+
+    def close_channel(self, client: SSHClient, sftp: paramiko.SFTPClient):
+        """Cierra un canal abierto con open_channel()"""
+        self._close_quietly(sftp)
+        with self._lock:
+            conn = self._leases.get(id(client))
+        if conn is not None:
+            self._unreserve(conn)
+
+    @contextmanager
+    def channel_slot(self, client: SSHClient, timeout: float = SSH_POOL_CHANNEL_WAIT):
+        """
+        Reserva un canal de sesión de la conexión de un préstamo para un comando
+
+        Espera a que haya uno libre; el canal del comando debe estar cerrado al
+        salir del bloque.
+
+        Args:
+            client: SSHClient obtenido con acquire()
+            timeout: Segundos de espera como máximo
+
+        Raises:
+            paramiko.SSHException: Si no queda ningún canal libre en ``timeout``
+        """
+        conn, idle = self._reserve(client, spare=0, timeout=timeout)
+        if conn is None:
+            raise paramiko.SSHException("No hay canales libres en la conexión SSH")
+        if idle is not None:
+            self._close_quietly(idle)
+        refused = None
+        try:
+            yield
+        except paramiko.ChannelException as e:
+            refused = e
+            raise
+        finally:
+            self._unreserve(conn, refused)
+
+    def _reserve(self, client: SSHClient, spare: int, timeout: float):
+        """
+        Reserva un canal de sesión en la conexión de un préstamo
+
+        Si la conexión está llena pero tiene canales SFTP libres, se cierra uno
+        para hacer sitio.
+
+        Args:
+            client: SSHClient obtenido con acquire()
+            spare: Canales que deben seguir libres después de este
+            timeout: Segundos de espera a que se libere uno
+
+        Returns:
+            tuple: (conexión o None si no hay sitio, canal SFTP libre que hay
+            que cerrar o None)
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                conn = self._leases.get(id(client))
+                if conn is None or conn.closed:
+                    return None, None
+                if conn.channels + spare < conn.limit:
+                    conn.channels += 1
+                    return conn, None
+                if conn.idle_sftp:
+                    # Its slot passes to the new channel
+                    return conn, conn.idle_sftp.pop()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None, None
+                self._channel_freed.wait(remaining)
+
+    def _unreserve(self, conn: _Connection, refused: Optional[Exception] = None):
+        """
+        Libera un canal reservado
+
+        Args:
+            refused: Error del servidor si rechazó el canal; el límite de la
+                conexión baja a los canales que sí aceptó (como mínimo dos: el
+                canal SFTP de un préstamo y un comando)
+        """
+        with self._lock:
+            conn.channels -= 1
+            if refused is not None and conn.limit > max(conn.channels, 2):
+                conn.limit = max(conn.channels, 2)
+                logger.info("SSH server %s refused a session channel (%s), "
+                            "using at most %d on this connection",
+                            conn.key[0], refused, conn.limit)
+            self._channel_freed.notify_all()
+
+    def _schedule_eviction(self):
+        """Programa el cierre de la próxima conexión que vaya a caducar"""
+        with self._lock:
+            if self._timer is not None:
+                return
+            idle = [c.last_used for c in self._connections if c.leases == 0]
+            if not idle:
+                return
+            delay = max(0.0, min(idle) + self.idle_timeout - time.monotonic())
+            self._timer = threading.Timer(delay + 0.1, self._on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+        self.evict_idle()
+        self._schedule_eviction()
+
+    def evict_idle(self, max_idle: Optional[float] = None) -> int:
+        """
+        Cierra las conexiones sin préstamos desde hace más de ``max_idle`` segundos
+
+        Args:
+            max_idle: Segundos (por defecto, idle_timeout)
+
+        Returns:
+            int: Conexiones cerradas
+        """
+        max_idle = self.idle_timeout if max_idle is None else max_idle
+        now = time.monotonic()
+        with self._lock:
+            expired = [c for c in self._connections
+                       if c.leases == 0 and now - c.last_used >= max_idle]
+            for conn in expired:
+                self._connections.remove(conn)
+                conn.closed = True
+            self.evicted += len(expired)
+        for conn in expired:
+            for sftp in conn.idle_sftp:
+                self._close_quietly(sftp)
+            conn.idle_sftp = []
+            conn.channels = 0
+            self._close_quietly(conn.client)
+        if expired:
+            logger.debug("Closed %d idle SSH connection(s)", len(expired))
+        return len(expired)
+
+    @staticmethod
+    def _close_quietly(closeable):
+        try:
+            closeable.close()
+        except (paramiko.SSHException, OSError, EOFError) as e:
+            logger.debug("Error closing pooled SSH channel: %s", e)
+
+    def close(self):
+        """Cierra las conexiones libres; las prestadas se cierran al devolverlas"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._connections = [c for c in self._connections if not c.leases]
+        self.evict_idle(0)
+
+    def stats(self) -> dict:
+        """
+        Estadísticas del pool
+
+        Returns:
+            dict: connections (abiertas), leased (préstamos en curso),
+            channels (canales de sesión abiertos), idle_channels (canales SFTP
+            libres), hits, misses, hit_rate y evicted
+        """
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'connections': len(self._connections),
+                'leased': sum(c.leases for c in self._connections),
+                'channels': sum(c.channels for c in self._connections),
+                'idle_channels': sum(len(c.idle_sftp) for c in self._connections),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / requests, 3) if requests else None,
+                'evicted': self.evicted,
+            }
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def get_ssh_pool() -> SSHPool:
+    """
+    Pool de conexiones SSH compartido por todo el proceso
+
+    Returns:
+        SSHPool: Pool con los límites de config
+    """
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = SSHPool()
+        return _shared_pool
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Trazas por fases (spans anidados con marcas de tiempo monótonas y atributos)
+exportables al formato Chrome trace, que abren chrome://tracing y Perfetto
+(https://ui.perfetto.dev)
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Traza activa en el hilo (o contexto) actual: (Tracer, carril)
+_current = contextvars.ContextVar('tracing_lane', default=None)
+
+
+class _NullSpan:
+    """Span que no registra nada (no hay traza activa)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Span en curso; al salir del bloque se añade a su traza"""
+
+    __slots__ = ('tracer', 'lane', 'name', 'category', 'attrs', 'start')
+
+    def __init__(self, tracer, lane, name, category, attrs):
+        self.tracer = tracer
+        self.lane = lane
+        self.name = name
+        self.category = category
+        self.attrs = attrs
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer.add(self.lane, self.name, self.category, self.start, end, self.attrs)
+        return False
+
+    def set(self, **attrs):
+        """Añade atributos al span (p. ej. resultados conocidos al final)"""
+        self.attrs.update(attrs)
+
+
+def span(name: str, category: str = "job", **attrs):
+    """
+    Span de la traza activa en el hilo actual
+
+    Sin traza activa devuelve un span vacío, así que instrumentar el código
+    no cuesta nada cuando las trazas están desactivadas.
+
+    Args:
+        name: Nombre del span (p. ej. 'ssh.connect')
+        category: Categoría (filtrable en el visor)
+        **attrs: Atributos del span (valores serializables en JSON)
+
+    Returns:
+        Context manager con un método set(**attrs)
+    """
+    current = _current.get()
+    if current is None:
+        return _NULL_SPAN
+    tracer, lane = current
+    return _Span(tracer, lane, name, category, attrs)
+
+
+class Tracer:
+    """
+    Colección de spans de una traza.
+
+    Cada span va a un carril (una fila del visor): en una traza de sesión,
+    un carril por trabajo. Los spans de un carril se anidan por sus marcas
+    de tiempo.
+    """
+
+    def __init__(self, name: str = "Media Downloader"):
+        self.name = name
+        self._events = []
+        self._lanes = {}  # carril -> nombre
+        self._lock = threading.Lock()
+
+    def add(self, lane: int, name: str, category: str, start_ns: int, end_ns: int, attrs: dict):
+        """Añade un span terminado"""
+        with self._lock:
+            self._events.append((lane, name, category, start_ns, end_ns, attrs))
+
+    def name_lane(self, lane: int, name: str):
+        """Nombre con el que el visor muestra un carril"""
+        with self._lock:
+            self._lanes[lane] = name
+
+    @contextmanager
+    def activate(self, lane: int = 0):
+        """Hace de esta la traza activa (para span()) durante el bloque, en el carril dado"""
+        token = _current.set((self, lane))
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Traza en formato Chrome trace (Trace Event Format)
+
+        Returns:
+            dict: {'traceEvents': [...], 'displayTimeUnit': 'ms'}
+        """
+        pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+            lanes = dict(self._lanes)
+        trace = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                  'args': {'name': self.name}}]
+        for lane, lane_name in sorted(lanes.items()):
+            trace.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': lane,
+                          'args': {'name': lane_name}})
+        # Los padres antes que los hijos cuando empiezan a la vez
+        for lane, name, category, start, end, attrs in sorted(events, key=lambda e: (e[3], -e[4])):
+            trace.append({
+                'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': lane,
+                'ts': start / 1000, 'dur': (end - start) / 1000, 'args': attrs,
+            })
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def export(self, path: str):
+        """
+        Escribe la traza en un archivo JSON (se sustituye de forma atómica)
+
+        Args:
+            path: Archivo de destino
+        """
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_chrome_trace(), f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error("Failed to write trace %s: %s", path, e)
+
+
+class TraceRecorder:
+    """
+    Trazas de los trabajos del pipeline: un archivo por trabajo o uno por sesión.
+
+    - Por trabajo (``directory``): cada trabajo escribe job-<id>.json al terminar.
+    - Por sesión (``session_file``): todos los trabajos comparten una traza, un
+      carril por trabajo, que se reescribe cada vez que termina uno.
+    """
+
+    def __init__(self, directory: Optional[str] = None, session_file: Optional[str] = None):
+        """
+        Args:
+            directory: Carpeta para las trazas por trabajo
+            session_file: Archivo de la traza de sesión
+        """
+        if (directory is None) == (session_file is None):
+            raise ValueError("TraceRecorder needs either a directory or a session file")
+        self.directory = directory
+        self.session_file = session_file
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._session = Tracer() if session_file else None
+        self._export_lock = threading.Lock()
+
+    @contextmanager
+    def job(self, job):
+        """
+        Traza un trabajo durante el bloque (en el hilo que lo ejecuta)
+
+        Abre un span raíz 'job' con la URL y el intento, y exporta la traza al salir.
+
+        Args:
+            job: DownloadJob en ejecución
+        """
+        tracer = self._session or Tracer(f"Media Downloader #{job.job_id}")
+        tracer.name_lane(job.job_id, f"#{job.job_id} {job.title or job.url}")
+        try:
+            with tracer.activate(job.job_id):
+                with span("job", url=job.url, job_id=job.job_id, attempt=job.attempts) as root:
+                    try:
+                        yield
+                    finally:
+                        root.set(state=job.state, title=job.title)
+        finally:
+            tracer.name_lane(job.job_id, f"#{job.job_id} {job.title or job.url}")
+            if self._session is not None:
+                with self._export_lock:
+                    tracer.export(self.session_file)
+            else:
+                # Un archivo por intento si el trabajo se reintenta
+                suffix = f"-{job.attempts}" if job.attempts > 1 else ""
+                tracer.export(os.path.join(self.directory, f"job-{job.job_id}{suffix}.json"))
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice persistente del contenido subido a cada servidor (hash SHA-256 por
+archivo remoto), para no volver a enviar lo que el servidor ya tiene
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class UploadIndex:
+    """
+    Índice SQLite de (servidor, ruta remota) -> (tamaño, sha256).
+
+    Las búsquedas por tamaño permiten descartar casi siempre un archivo nuevo
+    sin calcular su hash; las entradas pueden quedar obsoletas (archivos
+    borrados o cambiados en el servidor), así que quien las use debe
+    comprobarlas y eliminarlas con remove().
+    """
+
+    def __init__(self, db_file: Optional[str] = None):
+        """
+        Inicializa el índice
+
+        Args:
+            db_file: Ruta a la base de datos. Si es None, usa la predeterminada.
+        """
+        if db_file is None:
+            config_dir = Path.home() / ".youtube_downloader"
+            config_dir.mkdir(exist_ok=True)
+            self.db_file = config_dir / "upload_index.sqlite3"
+        else:
+            self.db_file = Path(db_file)
+
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre una conexión a la base de datos"""
+        return sqlite3.connect(str(self.db_file), timeout=10)
+
+    def _init_db(self):
+        """Crea la tabla si no existe"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                " server TEXT NOT NULL,"
+                " remote_path TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " sha256 TEXT NOT NULL,"
+                " uploaded_at REAL NOT NULL,"
+                " PRIMARY KEY (server, remote_path))"
+                " WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS uploads_by_size ON uploads (server, size, sha256)"
+            )
+
+    def has_size(self, server: str, size: int) -> bool:
+        """
+        Indica si hay algún archivo de ese tamaño subido al servidor
+
+        Args:
+            server: Servidor ("usuario@host:puerto")
+            size: Tamaño en bytes
+
+        Returns:
+            bool: True si hay al menos uno
+        """
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT 1 FROM uploads WHERE server = ? AND size = ? LIMIT 1",
+                    (server, size)
+                ).fetchone()
+                return row is not None
+        except sqlite3.Error as e:
+            logger.error("Upload index lookup failed: %s", e)
+            return False
+
+    def get(self, server: str, remote_path: str) -> Optional[Tuple[int, str]]:
+        """
+        Contenido registrado de un archivo remoto
+
+        Args:
+            server: Servidor ("usuario@host:puerto")
+            remote_path: Ruta remota
+
+        Returns:
+            tuple: (tamaño, sha256), o None si no está en el índice
+        """
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT size, sha256 FROM uploads WHERE server = ? AND remote_path = ?",
+                    (server, remote_path)
+                ).fetchone()
+                return (row[0], row[1]) if row else None
+        except sqlite3.Error as e:
+            logger.error("Upload index lookup failed: %s", e)
+            return None
+
+    def find(self, server: str, size: int, sha256: str, folder: Optional[str] = None) -> List[str]:
+        """
+        Archivos remotos del servidor con ese contenido
+
+        Args:
+            server: Servidor ("usuario@host:puerto")
+            size: Tamaño en bytes
+            sha256: Hash del contenido en hexadecimal
+            folder: Carpeta remota cuyos archivos van primero
+
+        Returns:
+            list: Rutas remotas, primero las de ``folder`` y luego las más recientes
+        """
+        try:
+            with self._lock, self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT remote_path FROM uploads WHERE server = ? AND size = ? AND sha256 = ?"
+                    " ORDER BY uploaded_at DESC",
+                    (server, size, sha256.lower())
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Upload index lookup failed: %s", e)
+            return []
+        paths = [row[0] for row in rows]
+        if folder:
+            prefix = folder.rstrip('/') + '/'
+            paths.sort(key=lambda path: not path.startswith(prefix))
+        return paths
+
+    def add(self, server: str, remote_path: str, size: int, sha256: str) -> bool:
+        """
+        Registra el contenido de un archivo remoto (sustituye al anterior)
+
+        Returns:
+            True si se guardó correctamente
+        """
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO uploads (server, remote_path, size, sha256, uploaded_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (server, remote_path, size, sha256.lower(), time.time())
+                )
+            return True
+        except sqlite3.Error as e:
+            logger.error("Upload index write failed: %s", e)
+            return False
+
+    def remove(self, server: str, remote_path: str) -> int:
+        """
+        Elimina la entrada de un archivo remoto (p. ej. porque ya no existe)
+
+        Returns:
+            int: Número de entradas eliminadas
+        """
+        try:
+            with self._lock, self._connect() as conn:
+                return conn.execute(
+                    "DELETE FROM uploads WHERE server = ? AND remote_path = ?",
+                    (server, remote_path)
+                ).rowcount
+        except sqlite3.Error as e:
+            logger.error("Upload index delete failed: %s", e)
+            return 0
+
+    def count(self) -> int:
+        """Número de entradas del índice"""
+        try:
+            with self._lock, self._connect() as conn:
+                return conn.execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error("Upload index count failed: %s", e)
+            return 0
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def get_upload_index() -> UploadIndex:
+    """
+    Índice de subidas compartido por todo el proceso (se crea en el primer uso)
+
+    Returns:
+        UploadIndex: Índice en la carpeta de configuración del usuario
+    """
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = UploadIndex()
+        return _shared_index